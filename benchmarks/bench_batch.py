@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# benchmarks/bench_batch.py
+"""
+Round-trip benchmark for ancient_latin_text_batch over the stdio transport.
+
+Transforms the same set of short snippets with batch sizes from 1 up to
+10,000 and reports calls/sec and snippets/sec for each, showing how batching
+amortizes the per-call JSON-RPC overhead.
+
+Usage:
+    python benchmarks/bench_batch.py --total 10000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+SERVER_PATH = Path(__file__).resolve().parent.parent / "server.py"
+SNIPPET = "The quick brown fox jumps over the lazy dog."
+
+
+async def run_batches(session: ClientSession, snippets: List[str], batch_size: int) -> float:
+    """Transform all snippets in batches of ``batch_size`` and return the elapsed time."""
+    start = time.perf_counter()
+    for offset in range(0, len(snippets), batch_size):
+        batch = snippets[offset:offset + batch_size]
+        if batch_size == 1:
+            await session.call_tool("ancient_latin_text", {"text": batch[0]})
+        else:
+            await session.call_tool("ancient_latin_text_batch", {"texts": batch})
+    return time.perf_counter() - start
+
+
+async def main_async(total: int, batch_sizes: List[int]) -> None:
+    """Run the benchmark against a freshly spawned server."""
+    server_params = StdioServerParameters(
+        command=sys.executable,
+        args=[str(SERVER_PATH)],
+        env=os.environ.copy(),
+    )
+    snippets = [f"{SNIPPET} {i}" for i in range(total)]
+
+    async with stdio_client(server_params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+
+            print(f"{'batch':>7} {'calls':>7} {'seconds':>9} {'calls/s':>10} {'snippets/s':>11}")
+            for batch_size in batch_sizes:
+                calls = -(-total // batch_size)
+                elapsed = await run_batches(session, snippets, batch_size)
+                print(
+                    f"{batch_size:>7} {calls:>7} {elapsed:>9.3f} "
+                    f"{calls / elapsed:>10.1f} {total / elapsed:>11.1f}"
+                )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="ancient_latin_text_batch round-trip benchmark")
+    parser.add_argument("--total", type=int, default=10000, help="Number of snippets to transform")
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[1, 10, 100, 1000, 10000],
+        help="Batch sizes to measure",
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args.total, args.batch_sizes))
+
+
+if __name__ == "__main__":
+    main()
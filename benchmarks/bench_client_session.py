@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# benchmarks/bench_client_session.py
+"""
+Per-request latency of the client CLI with and without session reuse.
+
+Compares running one ``client.py greeting`` process per request, which spawns
+and initializes a new server every time, with sending the same requests
+through a single ``client.py shell`` session.
+
+Usage:
+    python benchmarks/bench_client_session.py --requests 20
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CLIENT = [sys.executable, str(ROOT / "client.py"), "--server-path", str(ROOT / "server.py")]
+
+
+def spawn_per_request(requests: int) -> float:
+    """Return the median latency in ms of running one CLI process per request."""
+    latencies = []
+    for i in range(requests):
+        start = time.perf_counter()
+        subprocess.run(
+            [*CLIENT, "greeting", f"user{i}"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+def shared_session(requests: int) -> float:
+    """Return the median latency in ms of requests sent through one shell session."""
+    shell = subprocess.Popen(
+        [*CLIENT, "shell"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        bufsize=1,
+    )
+    latencies = []
+    try:
+        # Wait for the session to come up before timing requests
+        shell.stdin.write("greeting warmup\n")
+        shell.stdout.readline()
+        for i in range(requests):
+            start = time.perf_counter()
+            shell.stdin.write(f"greeting user{i}\n")
+            shell.stdout.readline()
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        shell.stdin.close()
+        shell.wait()
+    return statistics.median(latencies)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Client session reuse latency benchmark")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per mode")
+    args = parser.parse_args()
+
+    spawned = spawn_per_request(args.requests)
+    shared = shared_session(args.requests)
+    print(f"process per request: {spawned:10.2f} ms/request (median)")
+    print(f"shared session:      {shared:10.2f} ms/request (median)")
+    print(f"speedup:             {spawned / shared:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
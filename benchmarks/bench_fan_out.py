@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# benchmarks/bench_fan_out.py
+"""
+Throughput benchmark for MCPDemoClient.map_tool.
+
+Sends the same tool calls over one session, awaiting them one at a time and
+then through map_tool with increasing concurrency, and reports calls/sec for
+each so the effect of pipelining requests is visible.
+
+Usage:
+    python benchmarks/bench_fan_out.py --calls 1000 --tool add
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from client import MCPDemoClient  # noqa: E402
+
+SNIPPET = "The quick brown fox jumps over the lazy dog."
+
+
+def build_arguments(tool: str, calls: int) -> List[Dict[str, Any]]:
+    """Build one arguments dictionary per call of ``tool``."""
+    if tool == "add":
+        return [{"a": i, "b": i} for i in range(calls)]
+    return [{"text": f"{SNIPPET} {i}", "seed": i} for i in range(calls)]
+
+
+async def main_async(tool: str, calls: int, concurrencies: List[int], pool_size: int) -> None:
+    """Run the benchmark against freshly spawned servers."""
+    arguments = build_arguments(tool, calls)
+
+    async with MCPDemoClient(str(ROOT / "server.py"), pool_size=pool_size) as client:
+        # Warm up the server before measuring
+        await client.map_tool(tool, arguments[:10])
+
+        print(f"{'mode':>14} {'seconds':>9} {'calls/s':>10}")
+        start = time.perf_counter()
+        for args in arguments:
+            await client.session.call_tool(tool, args)
+        elapsed = time.perf_counter() - start
+        print(f"{'sequential':>14} {elapsed:>9.3f} {calls / elapsed:>10.1f}")
+
+        for concurrency in concurrencies:
+            start = time.perf_counter()
+            await client.map_tool(tool, arguments, concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            print(f"{f'map_tool x{concurrency}':>14} {elapsed:>9.3f} {calls / elapsed:>10.1f}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="map_tool fan-out benchmark")
+    parser.add_argument(
+        "--tool",
+        choices=["add", "ancient_latin_text"],
+        default="ancient_latin_text",
+        help="Tool to call",
+    )
+    parser.add_argument("--calls", type=int, default=1000, help="Number of tool calls per mode")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=[1, 4, 16, 64],
+        help="map_tool concurrency limits to measure",
+    )
+    parser.add_argument("--pool-size", type=int, default=1, help="Number of server processes")
+    args = parser.parse_args()
+
+    asyncio.run(main_async(args.tool, args.calls, args.concurrency, args.pool_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# benchmarks/bench_http_load.py
+"""
+Load test for the HTTP transports of server.py.
+
+Starts one server process with ``--transport streamable-http`` (or ``sse``),
+then for each client count opens that many concurrent MCP sessions which call
+a tool in a loop for a fixed duration, and reports requests/sec and latency
+percentiles.
+
+Usage:
+    python benchmarks/bench_http_load.py --clients 1 10 100 --duration 10
+    python benchmarks/bench_http_load.py --url http://127.0.0.1:8000/mcp
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+SERVER_PATH = Path(__file__).resolve().parent.parent / "server.py"
+SNIPPET = "The quick brown fox jumps over the lazy dog."
+
+
+def free_port() -> int:
+    """Return a currently unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    """Block until something accepts connections on ``port``."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit(f"Server did not start listening on port {port}")
+
+
+@asynccontextmanager
+async def open_session(url: str, transport: str) -> AsyncIterator[ClientSession]:
+    """Open an initialized MCP session to ``url``."""
+    if transport == "sse":
+        async with sse_client(url) as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                yield session
+    else:
+        async with streamablehttp_client(url) as (read_stream, write_stream, _):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                yield session
+
+
+class LoadPhase:
+    """Lines up all clients so they connect first and measure over the same period."""
+
+    def __init__(self, clients: int):
+        """Initialize the phase for ``clients`` concurrent clients."""
+        self.clients = clients
+        self.connected = 0
+        self.all_connected = asyncio.Event()
+        self.deadline = float("inf")
+        self.finished = 0
+        self.all_finished = asyncio.Event()
+
+    async def connect(self) -> None:
+        """Wait until every client is connected."""
+        self.connected += 1
+        if self.connected == self.clients:
+            self.all_connected.set()
+        await self.all_connected.wait()
+
+    async def finish(self) -> None:
+        """Wait until every client has stopped sending requests."""
+        self.finished += 1
+        if self.finished == self.clients:
+            self.all_finished.set()
+        await self.all_finished.wait()
+
+
+async def run_client(url: str, transport: str, tool: str, phase: LoadPhase) -> List[float]:
+    """Call ``tool`` in a loop until the phase deadline, returning latencies in ms."""
+    arguments = {"a": 1, "b": 2} if tool == "add" else {"text": SNIPPET, "seed": 1}
+    latencies = []
+    async with open_session(url, transport) as session:
+        await phase.connect()
+        while time.perf_counter() < phase.deadline:
+            start = time.perf_counter()
+            await session.call_tool(tool, arguments)
+            latencies.append((time.perf_counter() - start) * 1000)
+        # Keep the session open until every client has finished
+        await phase.finish()
+    return latencies
+
+
+async def run_load(url: str, transport: str, tool: str, clients: int, duration: float) -> None:
+    """Measure throughput and latency with ``clients`` concurrent sessions."""
+    phase = LoadPhase(clients)
+    tasks = [asyncio.create_task(run_client(url, transport, tool, phase)) for _ in range(clients)]
+    await phase.all_connected.wait()
+    start = time.perf_counter()
+    phase.deadline = start + duration
+    await phase.all_finished.wait()
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for result in await asyncio.gather(*tasks) for latency in result)
+
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{clients:>8} {len(latencies):>9} {len(latencies) / elapsed:>10.1f} "
+        f"{statistics.median(latencies):>9.2f} {p99:>9.2f}"
+    )
+
+
+def start_server(transport: str, port: int, extra_args: List[str]) -> subprocess.Popen:
+    """Start server.py on ``port`` with the given transport."""
+    return subprocess.Popen(
+        [
+            sys.executable,
+            str(SERVER_PATH),
+            "--transport",
+            transport,
+            "--port",
+            str(port),
+            "--log-level",
+            "WARNING",
+            *extra_args,
+        ],
+        env=os.environ.copy(),
+    )
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="HTTP transport load test")
+    parser.add_argument(
+        "--transport", choices=["streamable-http", "sse"], default="streamable-http"
+    )
+    parser.add_argument(
+        "--clients", type=int, nargs="+", default=[1, 10, 100], help="Concurrent client counts"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds to measure per client count"
+    )
+    parser.add_argument(
+        "--tool", choices=["add", "ancient_latin_text"], default="add", help="Tool to call"
+    )
+    parser.add_argument("--url", help="Target an already running server instead of starting one")
+    parser.add_argument(
+        "--server-arg",
+        action="append",
+        default=[],
+        help="Extra argument for the started server, e.g. --server-arg=--stateless",
+    )
+    args = parser.parse_args()
+
+    server: Optional[subprocess.Popen] = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        server = start_server(args.transport, port, args.server_arg)
+        wait_for_port(port)
+        path = "/sse" if args.transport == "sse" else "/mcp"
+        url = f"http://127.0.0.1:{port}{path}"
+
+    try:
+        print(f"{'clients':>8} {'requests':>9} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+        for clients in args.clients:
+            asyncio.run(run_load(url, args.transport, args.tool, clients, args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# benchmarks/bench_latin.py
+"""
+Throughput benchmark for the ancient_latin_text transformation.
+
+Compares the precompiled engine in server.py against the original
+implementation (kept here verbatim as a reference) and reports MB/s.
+
+Usage:
+    python benchmarks/bench_latin.py --size-mb 4 --repeat 3
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import server  # noqa: E402
+
+SAMPLE = (
+    "The quick brown fox jumps over the lazy dog. I think that we will have to "
+    "be with you, and this is the end of the story for they who sing in Rome! "
+    "Whatever happens, Caesar marches onward; the legions follow, the senate waits. "
+)
+
+
+def legacy_ancient_latin_text(text: str) -> str:
+    """Reference copy of the original, uncompiled implementation."""
+    replacements = {
+        "the": "thy",
+        "and": "et",
+        "of": "de",
+        "to": "ad",
+        "in": "in",
+        "is": "est",
+        "for": "pro",
+        "with": "cum",
+        "you": "tu",
+        "I": "ego",
+        "we": "nos",
+        "they": "illi",
+        "this": "hic",
+        "that": "ille",
+        "have": "habeo",
+        "be": "esse",
+        "will": "voluntas",
+    }
+
+    words = text.split()
+    for i, word in enumerate(words):
+        clean_word = word.lower().strip(".,;:!?")
+        if clean_word in replacements:
+            punctuation = ""
+            if not word[-1].isalnum():
+                punctuation = word[-1]
+
+            if word[0].isupper():
+                words[i] = replacements[clean_word].capitalize() + punctuation
+            else:
+                words[i] = replacements[clean_word] + punctuation
+
+    for i, word in enumerate(words):
+        if len(word) > 4 and random.random() < 0.3:
+            if word[-1].isalnum():
+                if random.random() < 0.5:
+                    words[i] = word + "us"
+                else:
+                    words[i] = word + "um"
+
+    latin_phrases = [
+        "Veni, vidi, vici.",
+        "Alea iacta est.",
+        "Carpe diem.",
+        "Et tu, Brute?",
+        "Cogito, ergo sum.",
+    ]
+
+    result = " ".join(words)
+
+    if len(result) > 50 and random.random() < 0.5:
+        phrase = random.choice(latin_phrases)
+        insert_pos = random.randint(0, len(words) - 1)
+        words.insert(insert_pos, phrase)
+        result = " ".join(words)
+
+    return result
+
+
+def build_corpus(size_mb: float) -> str:
+    """Build a corpus of roughly ``size_mb`` megabytes from the sample text."""
+    target = int(size_mb * 1024 * 1024)
+    return (SAMPLE * (target // len(SAMPLE) + 1))[:target]
+
+
+def measure(func: Callable[[str], str], text: str, repeat: int) -> float:
+    """Return the best observed throughput of ``func`` over ``text`` in MB/s."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return len(text) / (1024 * 1024) / best
+
+
+def check_equivalence(text: str) -> None:
+    """Verify both implementations agree when fed the same random stream."""
+    for seed in range(5):
+        random.seed(seed)
+        expected = legacy_ancient_latin_text(text)
+        actual = server.ancient_latin_text(text, seed=seed)
+        if expected != actual:
+            raise SystemExit(f"Output mismatch for seed {seed}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="ancient_latin_text throughput benchmark")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="Corpus size in MB")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per implementation")
+    args = parser.parse_args()
+
+    text = build_corpus(args.size_mb)
+    check_equivalence(text[:100_000])
+
+    legacy = measure(legacy_ancient_latin_text, text, args.repeat)
+    compiled = measure(server.ancient_latin_text, text, args.repeat)
+
+    print(f"corpus:   {args.size_mb:.1f} MB")
+    print(f"legacy:   {legacy:8.2f} MB/s")
+    print(f"compiled: {compiled:8.2f} MB/s")
+    print(f"speedup:  {compiled / legacy:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# benchmarks/bench_mixed_load.py
+"""
+Mixed-load benchmark for tool execution policies.
+
+Runs several large ancient_latin_text calls concurrently while measuring the
+latency of cheap add calls, once per execution policy, to show how offloading
+CPU-bound tools keeps lightweight requests responsive.
+
+Usage:
+    python benchmarks/bench_mixed_load.py --heavy-calls 4 --size-mb 2
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+SERVER_PATH = Path(__file__).resolve().parent.parent / "server.py"
+SNIPPET = "The quick brown fox jumps over the lazy dog. "
+
+
+async def measure_light(session: ClientSession, stop: asyncio.Event) -> List[float]:
+    """Call add repeatedly until ``stop`` is set, returning latencies in ms."""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await session.call_tool("add", {"a": 1, "b": 2})
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def run_policy(policy: str, heavy_calls: int, text: str, workers: int) -> None:
+    """Run the mixed load against a server using ``policy`` for ancient_latin_text."""
+    env = os.environ.copy()
+    env["MCP_TOOL_EXECUTION"] = f"ancient_latin_text={policy}"
+    env["MCP_TOOL_WORKERS"] = str(workers)
+    server_params = StdioServerParameters(command=sys.executable, args=[str(SERVER_PATH)], env=env)
+
+    async with stdio_client(server_params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            # Warm up worker pools before measuring
+            await session.call_tool("ancient_latin_text", {"text": SNIPPET})
+
+            stop = asyncio.Event()
+            light = asyncio.create_task(measure_light(session, stop))
+            start = time.perf_counter()
+            await asyncio.gather(
+                *(
+                    session.call_tool("ancient_latin_text", {"text": text})
+                    for _ in range(heavy_calls)
+                )
+            )
+            heavy_elapsed = time.perf_counter() - start
+            stop.set()
+            latencies = await light
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{policy:>8} {heavy_elapsed:>9.2f} {len(latencies):>7} "
+        f"{statistics.median(latencies):>9.1f} {p99:>9.1f} {latencies[-1]:>9.1f}"
+    )
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    """Run the benchmark for each policy."""
+    text = SNIPPET * int(args.size_mb * 1024 * 1024 / len(SNIPPET))
+    print(
+        f"{'policy':>8} {'heavy s':>9} {'adds':>7} "
+        f"{'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    )
+    for policy in args.policies:
+        await run_policy(policy, args.heavy_calls, text, args.workers)
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="Tool execution policy mixed-load benchmark")
+    parser.add_argument(
+        "--heavy-calls", type=int, default=4, help="Concurrent ancient_latin_text calls"
+    )
+    parser.add_argument(
+        "--size-mb", type=float, default=2.0, help="Input size of each heavy call in MB"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="Pool worker count"
+    )
+    parser.add_argument(
+        "--policies",
+        nargs="+",
+        default=["inline", "thread", "process"],
+        help="Execution policies to compare",
+    )
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
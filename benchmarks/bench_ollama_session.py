@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# benchmarks/bench_ollama_session.py
+"""
+Per-request overhead of OllamaClient with and without connection pooling.
+
+Starts a local stand-in for the Ollama generate endpoint that answers
+immediately, then compares one ``requests.post`` per generation, which opens
+a new TCP connection every time, with OllamaClient's pooled keep-alive
+session.
+
+Usage:
+    python benchmarks/bench_ollama_session.py --requests 2000
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, List
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from client import OllamaClient  # noqa: E402
+
+RESPONSE = json.dumps({"response": "Veni, vidi, vici."}).encode()
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Answers every generate request with a fixed response."""
+
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment, avoiding delayed-ACK stalls on kept-alive connections
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_POST(self) -> None:
+        """Handle a generate request."""
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format: str, *args: object) -> None:
+        """Silence per-request logging."""
+
+
+def measure(generate: Callable[[str], object], requests_count: int) -> List[float]:
+    """Return the latency in ms of each of ``requests_count`` generations."""
+    latencies = []
+    for i in range(requests_count):
+        start = time.perf_counter()
+        generate(f"prompt {i}")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: List[float]) -> None:
+    """Print the median and p99 of ``latencies``."""
+    latencies = sorted(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{label:>18} {statistics.median(latencies):>9.3f} {p99:>9.3f}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description="OllamaClient connection pooling benchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per mode")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    ollama = OllamaClient(base_url, "bench")
+
+    def post_per_request(prompt: str) -> object:
+        payload = {"model": "bench", "prompt": prompt, "stream": False}
+        return requests.post(ollama.api_url, json=payload).json()
+
+    try:
+        print(f"{'mode':>18} {'p50 ms':>9} {'p99 ms':>9}")
+        report("requests.post", measure(post_per_request, args.requests))
+        report("pooled session", measure(ollama.generate, args.requests))
+    finally:
+        ollama.close()
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,33 +10,402 @@ This client demonstrates how to interact with the three main components of MCP:
 """
 
 import argparse
+import functools
+import hashlib
 import json
 import sys
 import os
 import asyncio
+import shlex
+import sqlite3
 import subprocess
-from typing import Dict, List, Optional, Union, Any, Tuple
-from contextlib import AsyncExitStack
+import threading
+import time
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sized,
+    Union,
+    Any,
+    Tuple,
+)
+from contextlib import AsyncExitStack, contextmanager, nullcontext
+from urllib.parse import quote
 
+import anyio
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from mcp import ClientSession, StdioServerParameters, types
 from mcp.client.stdio import stdio_client
+from pydantic import AnyUrl
+
+
+def extract_prompt_texts(prompt: types.GetPromptResult) -> Tuple[str, Optional[str]]:
+    """
+    Extract the user and system texts from an MCP prompt.
+    
+    MCP prompt messages have no system role, so the server sends its
+    instructions as the first user messages: the last user message is the
+    request and any before it are joined into the system text.
+    
+    Args:
+        prompt: The prompt returned by the MCP session
+        
+    Returns:
+        The user text and the system text, if the prompt has one
+        
+    Raises:
+        ValueError: If the prompt is malformed or has no user message
+    """
+    if not isinstance(prompt, types.GetPromptResult):
+        raise ValueError("Invalid prompt format")
+    
+    texts = [
+        message.content.text
+        for message in prompt.messages
+        if message.role == "user" and isinstance(message.content, types.TextContent)
+    ]
+    if not texts:
+        raise ValueError("Missing user message")
+    
+    return texts[-1], "\n\n".join(texts[:-1]) or None
+
+
+class LLMResponseCache:
+    """
+    On-disk cache of LLM generations, stored in a SQLite database.
+    
+    Entries are keyed by a hash of the generate request (model, system text,
+    user text and any generation options), expire ``ttl`` seconds after they
+    were stored, and are evicted least recently used first whenever the entry
+    or the byte budget is exceeded.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10000,
+        max_bytes: int = 100 * 1024 * 1024,
+        ttl: Optional[float] = 7 * 24 * 3600,
+    ):
+        """
+        Initialize the cache, creating the database if needed.
+        
+        Args:
+            path: Path of the SQLite database file
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached responses in bytes
+            ttl: Optional time to live of an entry in seconds
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+    
+    @staticmethod
+    def key(payload: Dict[str, Any]) -> str:
+        """
+        Compute the cache key of a generate request.
+        
+        Args:
+            payload: The generate request body; its ``stream`` flag is ignored
+            
+        Returns:
+            The hex digest identifying the request
+        """
+        request = {name: value for name, value in payload.items() if name != "stream"}
+        return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response, marking it as most recently used.
+        
+        Args:
+            key: The cache key
+            
+        Returns:
+            The cached response, or None if it is missing or expired
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] >= self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            response: str = row[0]
+            return response
+    
+    def put(self, key: str, response: str) -> None:
+        """
+        Store a response, evicting expired and least recently used entries to stay within bounds.
+        
+        Responses larger than the whole byte budget are not cached.
+        
+        Args:
+            key: The cache key
+            response: The generated response
+        """
+        size = len(response.encode())
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                    (key, response, size, now, now),
+                )
+                if self.ttl is not None:
+                    self._db.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl,))
+                
+                entries, total = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+                if entries > self.max_entries or total > self.max_bytes:
+                    self._evict(entries, total)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+    
+    def _evict(self, entries: int, total: int) -> None:
+        """Delete least recently used entries until both budgets are met."""
+        evicted = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if entries <= self.max_entries and total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            entries -= 1
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", evicted)
+    
+    def clear(self) -> None:
+        """Remove all entries, keeping the counters."""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters and current usage.
+        
+        Returns:
+            Dictionary of counters, sizes and limits
+        """
+        with self._lock:
+            entries, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+        }
+    
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+
+class Tracer:
+    """
+    Records timed spans and exports them in the Chrome trace event format.
+    
+    Every span is a complete event on the track of the asyncio task (or,
+    outside of asyncio, the thread) it ran in, so concurrent requests show up
+    side by side when the file is opened in chrome://tracing or Perfetto.
+    """
+
+    def __init__(self) -> None:
+        """Initialize a tracer with no recorded spans."""
+        self.events: List[Dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._tracks: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+    
+    def _track(self) -> int:
+        """Get the track id of the current task or thread, naming new tracks."""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        owner: Union[asyncio.Task, threading.Thread]
+        if task is not None:
+            owner, name = task, task.get_name()
+        else:
+            owner = threading.current_thread()
+            name = owner.name
+        with self._lock:
+            tid = self._tracks.get(owner)
+            if tid is None:
+                tid = self._tracks[owner] = len(self._tracks) + 1
+                self.events.append({
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                })
+            return tid
+    
+    @contextmanager
+    def span(self, name: str, category: str = "client", **args: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Time the enclosed block as one span.
+        
+        Args:
+            name: Name of the span
+            category: Category of the span, e.g. "mcp" or "ollama"
+            **args: Details to attach to the span
+        
+        Returns:
+            A context manager yielding the span's details, which the block may add to
+        """
+        tid = self._track()
+        start = time.perf_counter()
+        try:
+            yield args
+        except Exception as e:
+            args["error"] = repr(e)
+            raise
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.events.append({
+                    "name": name,
+                    "cat": category,
+                    "ph": "X",
+                    "ts": round((start - self._origin) * 1_000_000, 3),
+                    "dur": round((end - start) * 1_000_000, 3),
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": args,
+                })
+    
+    def write(self, path: str) -> None:
+        """
+        Write the recorded spans to a JSON trace file.
+        
+        Args:
+            path: Path of the trace file
+        """
+        with self._lock:
+            trace = {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+        with open(path, "w") as f:
+            json.dump(trace, f, default=str)
+
+
+def trace_span(
+    tracer: Optional[Tracer], name: str, category: str = "client", **args: Any
+) -> ContextManager[Dict[str, Any]]:
+    """
+    Time the enclosed block as a span of ``tracer``, if tracing is enabled.
+    
+    Args:
+        tracer: The tracer, or None to record nothing
+        name: Name of the span
+        category: Category of the span
+        **args: Details to attach to the span
+    
+    Returns:
+        A context manager yielding the span's details
+    """
+    if tracer is None:
+        return nullcontext(args)
+    return tracer.span(name, category, **args)
 
 
 class OllamaClient:
     """Client for interacting with Ollama API."""
 
-    def __init__(self, base_url: str = "http://localhost:11434", model: str = "llama3"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "llama3",
+        pool_size: int = 10,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 300.0,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        cache: Optional[LLMResponseCache] = None,
+        tracer: Optional[Tracer] = None,
+    ):
         """
         Initialize the Ollama Client.
         
+        Requests go through one ``requests.Session``, so connections to the
+        Ollama server are kept alive and reused instead of opened per request.
+        
         Args:
             base_url: URL of the Ollama API
             model: The model to use for generation
+            pool_size: Maximum number of connections kept open to the server
+            connect_timeout: Seconds to wait for a connection to be established
+            read_timeout: Seconds to wait for the server to send a response
+            retries: Number of retries for failed connections and busy responses
+            backoff_factor: Base delay in seconds of the exponential backoff between retries
+            cache: Optional cache returning earlier responses to identical requests
+            tracer: Optional tracer recording a span per generation
         """
         self.base_url = base_url
         self.model = model
         self.api_url = f"{base_url}/api/generate"
+        self.cache = cache
+        self.tracer = tracer
+        self.timeout = (connect_timeout, read_timeout)
+        
+        retry = Retry(
+            total=retries,
+            # A generation that timed out mid-read is not worth repeating
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def close(self) -> None:
+        """Close the pooled connections to the Ollama server."""
+        self.session.close()
     
     def generate(self, prompt: str, system: Optional[str] = None) -> str:
         """
@@ -58,49 +427,577 @@ class OllamaClient:
         if system:
             payload["system"] = system
         
+        with trace_span(self.tracer, "ollama generate", "ollama", model=self.model) as span:
+            cache = self.cache
+            key = None
+            if cache is not None:
+                key = cache.key(payload)
+                cached = cache.get(key)
+                if cached is not None:
+                    span["cached"] = True
+                    return cached
+            
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                result: str = response.json().get("response", "")
+                if cache is not None and key is not None:
+                    cache.put(key, result)
+                return result
+            except requests.RequestException as e:
+                print(f"Error communicating with Ollama: {e}")
+                return f"Error: {e}"
+    
+    def process_mcp_prompt(self, prompt: types.GetPromptResult) -> str:
+        """
+        Process an MCP prompt with Ollama.
+        
+        Args:
+            prompt: The prompt returned by the MCP session
+            
+        Returns:
+            The generated response
+        """
         try:
-            response = requests.post(self.api_url, json=payload)
-            response.raise_for_status()
-            result = response.json()
-            return result.get("response", "")
-        except requests.RequestException as e:
-            print(f"Error communicating with Ollama: {e}")
+            user_text, system_text = extract_prompt_texts(prompt)
+        except ValueError as e:
             return f"Error: {e}"
+        
+        # Generate response
+        return self.generate(user_text, system_text)
+
+
+class AsyncOllamaClient:
+    """Asyncio-native client for interacting with Ollama API."""
+
+    RETRY_STATUSES = (429, 502, 503, 504)
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:11434",
+        model: str = "llama3",
+        pool_size: int = 10,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 300.0,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        cache: Optional[LLMResponseCache] = None,
+        tracer: Optional[Tracer] = None,
+    ):
+        """
+        Initialize the async Ollama Client.
+        
+        Generations are awaited without blocking the event loop, so several
+        of them and any MCP calls can run concurrently. Connections are pooled
+        and kept alive by one ``httpx.AsyncClient``, created on first use.
+        
+        Args:
+            base_url: URL of the Ollama API
+            model: The model to use for generation
+            pool_size: Maximum number of connections kept open to the server
+            connect_timeout: Seconds to wait for a connection to be established
+            read_timeout: Seconds to wait for the server to send a response
+            retries: Number of retries for failed connections and busy responses
+            backoff_factor: Base delay in seconds of the exponential backoff between retries
+            cache: Optional cache returning earlier responses to identical requests
+            tracer: Optional tracer recording a span per generation
+        """
+        self.base_url = base_url
+        self.model = model
+        self.api_url = f"{base_url}/api/generate"
+        self.cache = cache
+        self.tracer = tracer
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The pooled HTTP client, created on first use."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                # The transport retries refused connections; busy responses are retried in _post
+                transport=httpx.AsyncHTTPTransport(limits=self.limits, retries=self.retries),
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the pooled connections to the Ollama server."""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
     
-    def process_mcp_prompt(self, prompt_data: Dict[str, Any]) -> str:
+    async def _post(self, payload: Dict[str, Any]) -> httpx.Response:
+        """
+        Send a generate request, retrying busy responses with exponential backoff.
+        
+        Args:
+            payload: The JSON request body
+            
+        Returns:
+            The last response received
+        """
+        for attempt in range(self.retries + 1):
+            response = await self.client.post(self.api_url, json=payload)
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.retries:
+                return response
+            await asyncio.sleep(self.backoff_factor * 2 ** attempt)
+        return response
+    
+    def _payload(self, prompt: str, system: Optional[str], stream: bool) -> Dict[str, Any]:
+        """Build the JSON body of a generate request."""
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": stream
+        }
+        
+        if system:
+            payload["system"] = system
+        return payload
+    
+    async def generate(self, prompt: str, system: Optional[str] = None) -> str:
+        """
+        Generate a response from the Ollama model.
+        
+        Args:
+            prompt: The prompt to send to the model
+            system: Optional system message
+            
+        Returns:
+            The generated response
+        """
+        payload = self._payload(prompt, system, stream=False)
+        
+        with trace_span(self.tracer, "ollama generate", "ollama", model=self.model) as span:
+            # SQLite calls block, so the cache is used from a thread to keep the event loop free
+            cache = self.cache
+            key = None
+            if cache is not None:
+                key = cache.key(payload)
+                cached = await asyncio.to_thread(cache.get, key)
+                if cached is not None:
+                    span["cached"] = True
+                    return cached
+            
+            try:
+                response = await self._post(payload)
+                response.raise_for_status()
+                result: str = response.json().get("response", "")
+                if cache is not None and key is not None:
+                    await asyncio.to_thread(cache.put, key, result)
+                return result
+            except httpx.HTTPError as e:
+                print(f"Error communicating with Ollama: {e}")
+                return f"Error: {e}"
+    
+    async def process_mcp_prompt(self, prompt: types.GetPromptResult) -> str:
         """
         Process an MCP prompt with Ollama.
         
         Args:
-            prompt_data: The MCP prompt data
+            prompt: The prompt returned by the MCP session
             
         Returns:
             The generated response
         """
-        if not isinstance(prompt_data, dict) or "messages" not in prompt_data:
-            return "Error: Invalid prompt format"
+        try:
+            user_text, system_text = extract_prompt_texts(prompt)
+        except ValueError as e:
+            return f"Error: {e}"
         
-        # Extract system and user messages
-        system_message = next((m for m in prompt_data["messages"] if m["role"] == "system"), None)
-        user_message = next((m for m in prompt_data["messages"] if m["role"] == "user"), None)
+        return await self.generate(user_text, system_text)
+    
+    async def generate_stream(
+        self, prompt: str, system: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate a response from the Ollama model, yielding tokens as they arrive.
         
-        if not user_message or "content" not in user_message or "text" not in user_message["content"]:
-            return "Error: Missing user message"
+        Ollama streams one JSON object per line; each line is decoded as soon
+        as it is received, so the first token is available long before the
+        generation finishes.
         
-        system_text = None
-        if system_message and "content" in system_message and "text" in system_message["content"]:
-            system_text = system_message["content"]["text"]
+        Args:
+            prompt: The prompt to send to the model
+            system: Optional system message
+            
+        Returns:
+            An async iterator over the generated tokens
+        """
+        payload = self._payload(prompt, system, stream=True)
         
-        user_text = user_message["content"]["text"]
+        start = time.perf_counter()
+        with trace_span(self.tracer, "ollama generate_stream", "ollama", model=self.model) as span:
+            # SQLite calls block, so the cache is used from a thread to keep the event loop free
+            cache = self.cache
+            key = None
+            if cache is not None:
+                key = cache.key(payload)
+                cached = await asyncio.to_thread(cache.get, key)
+                if cached is not None:
+                    span["cached"] = True
+                    yield cached
+                    return
+            
+            tokens: List[str] = []
+            try:
+                async with self.client.stream("POST", self.api_url, json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if "error" in chunk:
+                            yield f"Error: {chunk['error']}"
+                            return
+                        if chunk.get("response"):
+                            if not tokens:
+                                first_token = time.perf_counter() - start
+                                span["first_token_ms"] = round(first_token * 1000, 3)
+                            tokens.append(chunk["response"])
+                            yield chunk["response"]
+                        if chunk.get("done"):
+                            span["tokens"] = len(tokens)
+                            # Only complete generations are cached
+                            if cache is not None and key is not None:
+                                await asyncio.to_thread(cache.put, key, "".join(tokens))
+                            return
+            except httpx.HTTPError as e:
+                print(f"Error communicating with Ollama: {e}")
+                yield f"Error: {e}"
+    
+    async def process_mcp_prompt_stream(self, prompt: types.GetPromptResult) -> AsyncIterator[str]:
+        """
+        Process an MCP prompt with Ollama, yielding tokens as they arrive.
         
-        # Generate response
-        return self.generate(user_text, system_text)
+        Args:
+            prompt: The prompt returned by the MCP session
+            
+        Returns:
+            An async iterator over the generated tokens
+        """
+        try:
+            user_text, system_text = extract_prompt_texts(prompt)
+        except ValueError as e:
+            yield f"Error: {e}"
+            return
+        
+        async for token in self.generate_stream(user_text, system_text):
+            yield token
+
+
+class PoolMember:
+    """One server process of a SessionPool, owned by its own background task."""
+
+    def __init__(
+        self,
+        index: int,
+        server_params: StdioServerParameters,
+        sampling_callback: Callable[..., Any],
+        on_exit: Optional[Callable[["PoolMember"], None]] = None,
+    ):
+        """
+        Initialize the pool member.
+        
+        Args:
+            index: Position of the member in the pool
+            server_params: Parameters for spawning the server process
+            sampling_callback: Callback answering sampling requests
+            on_exit: Called when the server process exits without being stopped
+        """
+        self.index = index
+        self.server_params = server_params
+        self.sampling_callback = sampling_callback
+        self.on_exit = on_exit
+        self.session: Optional[ClientSession] = None
+        self.outstanding = 0
+        self.requests = 0
+        self.restarts = 0
+        self.error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._lock = asyncio.Lock()
+    
+    @property
+    def healthy(self) -> bool:
+        """Whether the member has an initialized session."""
+        return self.session is not None
+    
+    @staticmethod
+    async def _relay(source: Any, sink: Any) -> None:
+        """Forward the server's messages to the session until the server's output ends."""
+        async with sink:
+            async for message in source:
+                await sink.send(message)
+    
+    async def _run(self) -> None:
+        """Own the transport and session contexts until asked to stop or the server exits."""
+        try:
+            async with stdio_client(self.server_params) as (read_stream, write_stream):
+                # Relaying the server's output lets the member notice the process
+                # exiting at once, instead of when a request or health check fails
+                relay_send, relay_receive = anyio.create_memory_object_stream[Any](0)
+                relay = asyncio.create_task(self._relay(read_stream, relay_send))
+                try:
+                    async with ClientSession(
+                        relay_receive,
+                        write_stream,
+                        sampling_callback=self.sampling_callback,
+                    ) as session:
+                        await session.initialize()
+                        self.session = session
+                        self._ready.set()
+                        stop = asyncio.create_task(self._stop.wait())
+                        await asyncio.wait({relay, stop}, return_when=asyncio.FIRST_COMPLETED)
+                        stop.cancel()
+                        self.session = None
+                        if not self._stop.is_set() and self.on_exit is not None:
+                            self.on_exit(self)
+                finally:
+                    relay.cancel()
+                    await asyncio.gather(relay, return_exceptions=True)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.session = None
+            self._ready.set()
+    
+    async def start(self) -> None:
+        """Spawn the server process and wait until its session is initialized."""
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self.error = None
+        self._task = asyncio.create_task(self._run())
+        await self._ready.wait()
+        if self.error is not None:
+            raise RuntimeError(
+                f"Pool member {self.index} failed to start: {self.error}"
+            ) from self.error
+    
+    async def stop(self) -> None:
+        """Close the session and stop the server process."""
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+    
+    async def restart(self) -> None:
+        """Replace the server process with a fresh one."""
+        async with self._lock:
+            await self.stop()
+            self.restarts += 1
+            await self.start()
+
+
+class SessionPool:
+    """
+    Pool of MCP server processes, each with its own session.
+    
+    Requests go to the healthy member with the fewest outstanding requests.
+    Members whose server process exits or whose transport fails are marked
+    unhealthy and restarted in the background right away; health-check pings
+    catch servers that are still running but stop answering. The pool exposes the ClientSession
+    methods used by MCPDemoClient, so it can stand in for a single session.
+    """
+
+    def __init__(
+        self,
+        server_params: StdioServerParameters,
+        size: int,
+        sampling_callback: Callable[..., Any],
+        health_check_interval: Optional[float] = 10.0,
+        health_check_timeout: float = 5.0,
+    ):
+        """
+        Initialize the pool.
+        
+        Args:
+            server_params: Parameters for spawning each server process
+            size: Number of server processes
+            sampling_callback: Callback answering sampling requests
+            health_check_interval: Seconds between health checks, or None to disable them
+            health_check_timeout: Seconds a member may take to answer a ping
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.members = [
+            PoolMember(i, server_params, sampling_callback, on_exit=self._schedule_restart)
+            for i in range(size)
+        ]
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self._health_task: Optional[asyncio.Task] = None
+        self._restarts: Dict[int, asyncio.Task] = {}
+    
+    async def start(self) -> None:
+        """Start all server processes concurrently."""
+        try:
+            await asyncio.gather(*(member.start() for member in self.members))
+        except BaseException:
+            await self.stop()
+            raise
+        
+        if self.health_check_interval is not None:
+            self._health_task = asyncio.create_task(self._health_loop(self.health_check_interval))
+    
+    async def stop(self) -> None:
+        """Stop health checks and all server processes."""
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        
+        await asyncio.gather(*self._restarts.values(), return_exceptions=True)
+        await asyncio.gather(*(member.stop() for member in self.members), return_exceptions=True)
+    
+    def _schedule_restart(self, member: PoolMember) -> None:
+        """Restart a member in the background unless a restart is already running."""
+        task = self._restarts.get(member.index)
+        if task is None or task.done():
+            self._restarts[member.index] = asyncio.create_task(member.restart())
+    
+    async def check_health(self) -> None:
+        """Ping every member and restart those that are down or unresponsive."""
+        for member in self.members:
+            session = member.session
+            if session is None:
+                self._schedule_restart(member)
+                continue
+            try:
+                await asyncio.wait_for(session.send_ping(), self.health_check_timeout)
+            except Exception:
+                self._schedule_restart(member)
+    
+    async def _health_loop(self, interval: float) -> None:
+        """Run health checks every ``interval`` seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_health()
+    
+    async def _dispatch(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Send a request to the healthy member with the fewest outstanding requests."""
+        healthy = [member for member in self.members if member.healthy]
+        if not healthy:
+            raise RuntimeError("No healthy MCP server in the pool")
+        
+        member = min(healthy, key=lambda m: m.outstanding)
+        session = member.session
+        member.outstanding += 1
+        member.requests += 1
+        try:
+            return await getattr(session, method)(*args, **kwargs)
+        except (
+            anyio.ClosedResourceError,
+            anyio.BrokenResourceError,
+            anyio.EndOfStream,
+            ConnectionError,
+        ):
+            # The server process is gone; requests in flight fail but new ones go elsewhere
+            self._schedule_restart(member)
+            raise
+        finally:
+            member.outstanding -= 1
+    
+    async def call_tool(self, *args: Any, **kwargs: Any) -> types.CallToolResult:
+        """Call a tool on the least busy server."""
+        result: types.CallToolResult = await self._dispatch("call_tool", *args, **kwargs)
+        return result
+    
+    async def read_resource(self, *args: Any, **kwargs: Any) -> types.ReadResourceResult:
+        """Read a resource from the least busy server."""
+        result: types.ReadResourceResult = await self._dispatch("read_resource", *args, **kwargs)
+        return result
+    
+    async def get_prompt(self, *args: Any, **kwargs: Any) -> types.GetPromptResult:
+        """Get a prompt from the least busy server."""
+        result: types.GetPromptResult = await self._dispatch("get_prompt", *args, **kwargs)
+        return result
+    
+    async def send_ping(self) -> types.EmptyResult:
+        """Ping the least busy server."""
+        result: types.EmptyResult = await self._dispatch("send_ping")
+        return result
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """
+        Get per-member load and health information.
+        
+        Returns:
+            One dictionary per server process
+        """
+        return [
+            {
+                "index": member.index,
+                "healthy": member.healthy,
+                "outstanding": member.outstanding,
+                "requests": member.requests,
+                "restarts": member.restarts,
+            }
+            for member in self.members
+        ]
+
+
+class TracedSession:
+    """Wraps a session or SessionPool, recording a span around every request sent through it."""
+
+    TRACED_METHODS = frozenset({
+        "call_tool",
+        "read_resource",
+        "get_prompt",
+        "send_ping",
+        "list_tools",
+        "list_resources",
+        "list_resource_templates",
+        "list_prompts",
+    })
+    
+    def __init__(self, session: Any, tracer: Tracer):
+        """
+        Initialize the wrapper.
+        
+        Args:
+            session: The ClientSession or SessionPool to wrap
+            tracer: The tracer recording the spans
+        """
+        self.session = session
+        self.tracer = tracer
+    
+    def __getattr__(self, attr: str) -> Any:
+        """Get an attribute of the wrapped session, tracing request methods."""
+        value = getattr(self.session, attr)
+        if attr not in self.TRACED_METHODS:
+            return value
+        
+        async def traced(*args: Any, **kwargs: Any) -> Any:
+            target = args[0] if args else kwargs.get("name", kwargs.get("uri"))
+            name = attr if target is None else f"{attr} {str(target)[:60]}"
+            with self.tracer.span(name, "mcp"):
+                return await value(*args, **kwargs)
+        
+        return traced
+
+
+# What MCPDemoClient sends its requests through
+MCPSession = Union[ClientSession, SessionPool, TracedSession]
 
 
 class MCPDemoClient:
     """Client for interacting with the MCP Demo Server."""
 
-    def __init__(self, server_path: str = "./server.py", ollama_url: str = "http://localhost:11434", ollama_model: str = "llama3"):
+    def __init__(
+        self,
+        server_path: str = "./server.py",
+        ollama_url: str = "http://localhost:11434",
+        ollama_model: str = "llama3",
+        pool_size: int = 1,
+        llm_cache: Optional[LLMResponseCache] = None,
+        tracer: Optional[Tracer] = None,
+    ):
         """
         Initialize the MCP Demo Client.
         
@@ -108,73 +1005,234 @@ class MCPDemoClient:
             server_path: Path to the server script
             ollama_url: URL of the Ollama API
             ollama_model: The Ollama model to use
+            pool_size: Number of server processes; more than one creates a SessionPool
+            llm_cache: Optional cache of Ollama responses to identical prompts
+            tracer: Optional tracer recording spans around connecting, every request and
+                every generation
         """
         self.server_path = server_path
-        self.ollama = OllamaClient(ollama_url, ollama_model)
-        self.session = None
+        self.tracer = tracer
+        self.ollama = AsyncOllamaClient(ollama_url, ollama_model, cache=llm_cache, tracer=tracer)
+        self.pool_size = pool_size
+        self.session: Optional[MCPSession] = None
+        # Owns the transport and session contexts opened by connect()
+        self._exit_stack: Optional[AsyncExitStack] = None
+        self._pool: Optional[SessionPool] = None
+        # Parsed gods:// responses by limit, with the dataset version they belong to
+        self._gods_cache: Dict[Optional[int], Tuple[str, List[Dict[str, str]]]] = {}
         
-    async def connect(self):
+    def _server_parameters(self) -> StdioServerParameters:
         """
-        Connect to the MCP server.
+        Get the parameters for spawning the MCP server over stdio.
         
-        This method establishes a connection to the MCP server using stdio transport.
+        Returns:
+            The server parameters
         """
         # Ensure the server script exists
         if not os.path.exists(self.server_path):
             raise FileNotFoundError(f"Server script not found at {self.server_path}")
         
         # Set up server parameters with the correct Python interpreter
-        python_executable = sys.executable
-        server_params = StdioServerParameters(
-            command=python_executable,
+        return StdioServerParameters(
+            command=sys.executable,
             args=[self.server_path],
-            env=os.environ,
+            env=dict(os.environ),
+        )
+    
+    @staticmethod
+    async def _sampling_callback(
+        context: Any, params: types.CreateMessageRequestParams
+    ) -> types.CreateMessageResult:
+        """Answer sampling requests from the server with a fixed response."""
+        return types.CreateMessageResult(
+            role="assistant",
+            content=types.TextContent(
+                type="text",
+                text="Sample response from MCP client",
+            ),
+            model="sample-model",
+            stopReason="endTurn",
         )
+    
+    async def connect(self) -> MCPSession:
+        """
+        Connect to the MCP server.
         
-        # Create a simple sampling callback
-        async def sampling_callback(
-            context: Any, params: types.CreateMessageRequestParams
-        ) -> types.CreateMessageResult:
-            return types.CreateMessageResult(
-                role="assistant",
-                content=types.TextContent(
-                    type="text",
-                    text="Sample response from MCP client",
-                ),
-                model="sample-model",
-                stopReason="endTurn",
-            )
+        This method establishes a connection to the MCP server using stdio transport.
+        The server process and session stay open until disconnect() is called, so
+        one connection can serve any number of requests. connect() and
+        disconnect() must be called from the same task.
         
-        # Use the async context manager properly
-        async with stdio_client(server_params) as (read_stream, write_stream):
-            # Create and initialize the session
-            self.session = ClientSession(
-                read_stream, 
-                write_stream,
-                sampling_callback=sampling_callback
-            )
+        With a pool_size above one, a SessionPool of server processes is started
+        instead and used in place of the session.
+        
+        Returns:
+            The initialized session or pool
+        """
+        if self.session:
+            return self.session
+        
+        with trace_span(self.tracer, "connect", pool_size=self.pool_size):
+            if self.pool_size > 1:
+                pool = SessionPool(
+                    self._server_parameters(), self.pool_size, self._sampling_callback
+                )
+                await pool.start()
+                self._pool = pool
+                self.session = pool if self.tracer is None else TracedSession(pool, self.tracer)
+                return self.session
             
-            # Initialize the session
-            await self.session.initialize()
+            stack = AsyncExitStack()
+            try:
+                with trace_span(self.tracer, "spawn server"):
+                    read_stream, write_stream = await stack.enter_async_context(
+                        stdio_client(self._server_parameters())
+                    )
+                session = await stack.enter_async_context(
+                    ClientSession(
+                        read_stream,
+                        write_stream,
+                        sampling_callback=self._sampling_callback,
+                    )
+                )
+                with trace_span(self.tracer, "initialize", "mcp"):
+                    await session.initialize()
+            except BaseException:
+                await stack.aclose()
+                raise
             
+            self._exit_stack = stack
+            self.session = session if self.tracer is None else TracedSession(session, self.tracer)
             return self.session
     
     async def disconnect(self):
         """
         Disconnect from the MCP server.
         
-        This method closes the connection to the MCP server.
+        This method closes the session, stops the server process and releases
+        the pooled Ollama connections.
         """
-        if self.session:
-            await self.session.aclose()
+        with trace_span(self.tracer, "disconnect"):
+            await self.ollama.aclose()
+            stack, self._exit_stack = self._exit_stack, None
+            pool, self._pool = self._pool, None
             self.session = None
+            if stack is not None:
+                await stack.aclose()
+            if pool is not None:
+                await pool.stop()
+    
+    async def __aenter__(self) -> "MCPDemoClient":
+        """Connect when entering an ``async with`` block."""
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Disconnect when leaving an ``async with`` block."""
+        await self.disconnect()
     
-    async def transform_to_ancient_latin(self, text: str) -> str:
+    async def _bounded_gather(
+        self,
+        calls: Iterable[Callable[[], Awaitable[Any]]],
+        concurrency: int,
+        size: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Run calls concurrently with at most ``concurrency`` of them in flight.
+        
+        ``concurrency`` worker tasks pull calls from ``calls`` as they become
+        free, so only the calls in flight exist at any time, however long
+        ``calls`` is.
+        
+        Args:
+            calls: Zero-argument coroutine functions, one per request
+            concurrency: Maximum number of requests awaiting a response at once
+            size: Number of calls, if known, to allocate the results up front
+            
+        Returns:
+            The results, in the order of ``calls``
+        """
+        if not self.session:
+            raise RuntimeError("Not connected to MCP server")
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        
+        pending = enumerate(calls)
+        results: List[Any] = [None] * (size or 0)
+        
+        async def worker() -> None:
+            # Taking the next call never awaits, so workers cannot take the same one
+            for index, call in pending:
+                result = await call()
+                if index >= len(results):
+                    results.extend([None] * (index + 1 - len(results)))
+                results[index] = result
+        
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        except BaseException:
+            # Do not leave the remaining requests running after the first failure
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+        return results
+    
+    async def map_tool(
+        self,
+        name: str,
+        arguments: Iterable[Dict[str, Any]],
+        concurrency: int = 16,
+    ) -> List[types.CallToolResult]:
+        """
+        Call a tool once per set of arguments, keeping many requests in flight.
+        
+        Requests are pipelined over the session instead of waiting for each
+        round trip, so the server can work on several of them at once.
+        
+        Args:
+            name: The tool to call
+            arguments: One arguments dictionary per call
+            concurrency: Maximum number of calls awaiting a response at once
+            
+        Returns:
+            The tool responses, in the order of ``arguments``
+        """
+        session = self.session
+        if session is None:
+            raise RuntimeError("Not connected to MCP server")
+        
+        return await self._bounded_gather(
+            (functools.partial(session.call_tool, name, args) for args in arguments),
+            concurrency,
+            len(arguments) if isinstance(arguments, Sized) else None,
+        )
+    
+    async def map_resource(self, uris: Iterable[str], concurrency: int = 16) -> List[str]:
+        """
+        Read many resources, keeping many requests in flight.
+        
+        Args:
+            uris: The resource URIs
+            concurrency: Maximum number of reads awaiting a response at once
+            
+        Returns:
+            The text of each resource, in the order of ``uris``
+        """
+        return await self._bounded_gather(
+            (functools.partial(self._read_resource_text, uri) for uri in uris),
+            concurrency,
+            len(uris) if isinstance(uris, Sized) else None,
+        )
+    
+    async def transform_to_ancient_latin(self, text: str, seed: Optional[int] = None) -> str:
         """
         Transform text to appear as if written in ancient Latin.
         
         Args:
             text: The text to transform
+            seed: Optional seed making the output reproducible
             
         Returns:
             Text transformed to resemble ancient Latin
@@ -182,15 +1240,96 @@ class MCPDemoClient:
         if not self.session:
             raise RuntimeError("Not connected to MCP server")
         
-        response = await self.session.call_tool("ancient_latin_text", {"text": text})
+        arguments: Dict[str, Any] = {"text": text}
+        if seed is not None:
+            arguments["seed"] = seed
+        
+        response = await self.session.call_tool("ancient_latin_text", arguments)
+        return "".join(
+            block.text for block in response.content if isinstance(block, types.TextContent)
+        )
+    
+    async def transform_to_ancient_latin_batch(
+        self, texts: List[str], seed: Optional[int] = None
+    ) -> List[str]:
+        """
+        Transform many texts to ancient Latin with a single tool call.
+        
+        Args:
+            texts: The texts to transform
+            seed: Optional seed making the output reproducible
+            
+        Returns:
+            The transformed texts, in input order
+        """
+        if not self.session:
+            raise RuntimeError("Not connected to MCP server")
+        
+        arguments: Dict[str, Any] = {"texts": texts}
+        if seed is not None:
+            arguments["seed"] = seed
+        
+        response = await self.session.call_tool("ancient_latin_text_batch", arguments)
+        if response.structuredContent is not None:
+            translations: List[str] = response.structuredContent["result"]
+            return translations
+        return [block.text for block in response.content if isinstance(block, types.TextContent)]
+    
+    async def transform_to_ancient_latin_stream(
+        self,
+        text: str,
+        on_chunk: Callable[[str], None],
+        chunk_size: Optional[int] = None,
+        seed: Optional[int] = None,
+        return_text: bool = False,
+    ) -> types.CallToolResult:
+        """
+        Transform text to ancient Latin, receiving output chunks as they are produced.
+        
+        The output only arrives through ``on_chunk``; the final response is a
+        summary, so the text does not cross the wire twice.
+        
+        Args:
+            text: The text to transform
+            on_chunk: Called with each transformed chunk as soon as it arrives
+            chunk_size: Optional number of input characters per server-side chunk
+            seed: Optional seed making the output reproducible
+            return_text: Whether the final response should also hold the complete text
+            
+        Returns:
+            The final tool response, with the number of chunks and characters sent
+        """
+        if not self.session:
+            raise RuntimeError("Not connected to MCP server")
+        
+        async def progress_callback(
+            progress: float, total: Optional[float], message: Optional[str]
+        ) -> None:
+            if message is not None:
+                on_chunk(message)
+        
+        arguments: Dict[str, Any] = {"text": text}
+        if chunk_size is not None:
+            arguments["chunk_size"] = chunk_size
+        if seed is not None:
+            arguments["seed"] = seed
+        if return_text:
+            arguments["return_text"] = True
+        
+        response = await self.session.call_tool(
+            "ancient_latin_text_stream",
+            arguments,
+            progress_callback=progress_callback,
+        )
         return response
     
-    async def get_ancient_latin_text_resource(self, text: str) -> str:
+    async def get_ancient_latin_text_resource(self, text: str, seed: Optional[int] = None) -> str:
         """
         Get text transformed to ancient Latin using the resource endpoint.
         
         Args:
             text: The text to transform
+            seed: Optional seed making the resource content reproducible
             
         Returns:
             Text transformed to resemble ancient Latin
@@ -198,13 +1337,21 @@ class MCPDemoClient:
         if not self.session:
             raise RuntimeError("Not connected to MCP server")
         
-        content, _ = await self.session.read_resource(f"ancientlatin://{text}")
-        return content
+        # Encode every reserved character, so spaces and slashes stay part of the text
+        uri = f"ancientlatin://{quote(text, safe='')}"
+        if seed is not None:
+            uri += f"/{seed}"
+        
+        return await self._read_resource_text(uri)
     
     async def get_greek_gods(self, limit: Optional[int] = None) -> List[Dict[str, str]]:
         """
         Get information about Greek gods.
         
+        Responses are kept together with the dataset version reported by
+        gods://version, and reused without fetching or parsing them again
+        for as long as that version does not change.
+        
         Args:
             limit: Maximum number of records to return (default: all available)
             
@@ -214,12 +1361,60 @@ class MCPDemoClient:
         if not self.session:
             raise RuntimeError("Not connected to MCP server")
         
-        uri = "gods://"
-        if limit is not None:
-            uri += f"?limit={limit}"
+        version = await self._read_resource_text("gods://version")
+        cached = self._gods_cache.get(limit)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        uri = "gods://text" if limit is None else f"gods://text/{limit}"
+        gods: List[Dict[str, str]] = json.loads(await self._read_resource_text(uri))
+        self._gods_cache[limit] = (version, gods)
+        return gods
+    
+    async def _read_resource_text(self, uri: str) -> str:
+        """
+        Read a resource and return its text content.
+        
+        Args:
+            uri: The resource URI
+            
+        Returns:
+            The text of the first content item
+        """
+        if self.session is None:
+            raise RuntimeError("Not connected to MCP server")
         
-        content, _ = await self.session.read_resource(uri)
-        return json.loads(content)
+        result = await self.session.read_resource(AnyUrl(uri))
+        content = result.contents[0]
+        if isinstance(content, types.BlobResourceContents):
+            raise ValueError(f"Resource {uri} is binary, expected text")
+        return content.text
+    
+    async def iter_greek_gods(self, page_size: int = 100) -> AsyncIterator[Dict[str, str]]:
+        """
+        Iterate over all Greek gods, fetching one page at a time.
+        
+        Only one page is held in memory at once, so large datasets can be
+        consumed incrementally.
+        
+        Args:
+            page_size: Number of records fetched per request
+            
+        Returns:
+            An async iterator over dictionaries containing information about Greek gods
+        """
+        if not self.session:
+            raise RuntimeError("Not connected to MCP server")
+        
+        uri = f"gods://page/{page_size}"
+        while True:
+            page = json.loads(await self._read_resource_text(uri))
+            for god in page["items"]:
+                yield god
+            
+            if not page["next_cursor"]:
+                break
+            uri = f"gods://page/{page_size}/{page['next_cursor']}"
     
     async def get_greeting(self, name: str) -> str:
         """
@@ -234,15 +1429,39 @@ class MCPDemoClient:
         if not self.session:
             raise RuntimeError("Not connected to MCP server")
         
-        content, _ = await self.session.read_resource(f"greeting://{name}")
-        return content
+        return await self._read_resource_text(f"greeting://{name}")
+    
+    async def _process_prompt(
+        self, prompt: types.GetPromptResult, on_token: Optional[Callable[[str], None]]
+    ) -> str:
+        """
+        Process an MCP prompt with Ollama, optionally streaming the tokens.
+        
+        Args:
+            prompt: The prompt returned by the MCP session
+            on_token: Called with each token as soon as it arrives, if given
+            
+        Returns:
+            The complete response
+        """
+        if on_token is None:
+            return await self.ollama.process_mcp_prompt(prompt)
+        
+        tokens = []
+        async for token in self.ollama.process_mcp_prompt_stream(prompt):
+            on_token(token)
+            tokens.append(token)
+        return "".join(tokens)
     
-    async def chat_about_mcp(self, message: str) -> str:
+    async def chat_about_mcp(
+        self, message: str, on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
         """
         Chat with an MCP expert about the Model Control Protocol using Ollama.
         
         Args:
             message: The user's message or question about MCP
+            on_token: Called with each response token as soon as it arrives, if given
             
         Returns:
             Response from the MCP expert via Ollama
@@ -264,18 +1483,21 @@ class MCPDemoClient:
         if topic:
             params["topic"] = topic
         
-        prompt_data = await self.session.get_prompt("mcp_expert", params)
+        prompt = await self.session.get_prompt("mcp_expert", params)
         
         # Process the prompt with Ollama
-        return self.ollama.process_mcp_prompt(prompt_data)
+        return await self._process_prompt(prompt, on_token)
     
-    async def get_code_review(self, code: str, language: str = "python") -> str:
+    async def get_code_review(
+        self, code: str, language: str = "python", on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
         """
         Get a code review using the code_review prompt and Ollama.
         
         Args:
             code: The code to review
             language: The programming language of the code
+            on_token: Called with each response token as soon as it arrives, if given
             
         Returns:
             A code review response from Ollama
@@ -283,17 +1505,20 @@ class MCPDemoClient:
         if not self.session:
             raise RuntimeError("Not connected to MCP server")
         
-        prompt_data = await self.session.get_prompt("code_review", {"code": code, "language": language})
+        prompt = await self.session.get_prompt("code_review", {"code": code, "language": language})
         
         # Process the prompt with Ollama
-        return self.ollama.process_mcp_prompt(prompt_data)
+        return await self._process_prompt(prompt, on_token)
     
-    async def get_commit_message(self, changes: str) -> str:
+    async def get_commit_message(
+        self, changes: str, on_token: Optional[Callable[[str], None]] = None
+    ) -> str:
         """
         Get a Git commit message suggestion using Ollama.
         
         Args:
             changes: Git diff or description of changes
+            on_token: Called with each response token as soon as it arrives, if given
             
         Returns:
             A suggested commit message from Ollama
@@ -301,10 +1526,10 @@ class MCPDemoClient:
         if not self.session:
             raise RuntimeError("Not connected to MCP server")
         
-        prompt_data = await self.session.get_prompt("git_commit", {"changes": changes})
+        prompt = await self.session.get_prompt("git_commit", {"changes": changes})
         
         # Process the prompt with Ollama
-        return self.ollama.process_mcp_prompt(prompt_data)
+        return await self._process_prompt(prompt, on_token)
 
 
 def print_json(data: Union[Dict, List]) -> None:
@@ -317,67 +1542,187 @@ def print_json(data: Union[Dict, List]) -> None:
     print(json.dumps(data, indent=2))
 
 
-async def run_command(args):
+async def execute_command(client: MCPDemoClient, args: argparse.Namespace) -> None:
+    """
+    Execute a single CLI command on a connected client and print its result.
+    
+    Args:
+        client: The connected client
+        args: Parsed command line arguments
+    """
+    if getattr(args, "model", None):
+        client.ollama.model = args.model
+    
+    if args.command == "latin" and args.stream:
+        await client.transform_to_ancient_latin_stream(
+            args.text, lambda chunk: print(chunk, end="", flush=True), seed=args.seed
+        )
+        print()
+    elif args.command == "latin":
+        result = await client.transform_to_ancient_latin(args.text, args.seed)
+        print(result)
+    elif args.command == "latin-batch":
+        translations = await client.transform_to_ancient_latin_batch(args.texts, args.seed)
+        print_json(translations)
+    elif args.command == "latin-resource":
+        result = await client.get_ancient_latin_text_resource(args.text, args.seed)
+        print(result)
+    elif args.command == "gods" and args.page_size:
+        async for god in client.iter_greek_gods(args.page_size):
+            print(json.dumps(god))
+    elif args.command == "gods":
+        gods = await client.get_greek_gods(args.limit)
+        print_json(gods)
+    elif args.command == "greeting":
+        result = await client.get_greeting(args.name)
+        print(result)
+    elif args.command in ("chat", "review", "commit"):
+        on_token = None if args.no_stream else lambda token: print(token, end="", flush=True)
+        if args.command == "chat":
+            result = await client.chat_about_mcp(args.message, on_token)
+        elif args.command == "review":
+            result = await client.get_code_review(args.code, args.language, on_token)
+        else:
+            result = await client.get_commit_message(args.changes, on_token)
+        # Streamed tokens have already been printed
+        print("" if on_token else result)
+
+
+async def run_shell(
+    client: MCPDemoClient, parser: argparse.ArgumentParser, timing: bool = False
+) -> None:
+    """
+    Run commands read from stdin, one per line, over a single session.
+    
+    Each line uses the same syntax as the command line, e.g. ``greeting World``.
+    The server is started and initialized once, so every command after the
+    first only costs a round trip.
+    
+    Args:
+        client: The connected client
+        parser: The CLI argument parser used to parse each line
+        timing: Whether to print the latency of each command to stderr
+    """
+    interactive = sys.stdin.isatty()
+    while True:
+        if interactive:
+            print("mcp> ", end="", flush=True)
+        line = await asyncio.to_thread(sys.stdin.readline)
+        if not line:
+            break
+        
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line in ("exit", "quit"):
+            break
+        
+        try:
+            args = parser.parse_args(shlex.split(line))
+        except SystemExit:
+            # argparse has already reported the problem
+            continue
+        
+        if args.command in (None, "shell"):
+            print(f"Unsupported command in shell: {line}", file=sys.stderr)
+            continue
+        
+        start = time.perf_counter()
+        try:
+            with trace_span(client.tracer, f"command {args.command}", "cli"):
+                await execute_command(client, args)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+        if timing:
+            print(f"[{(time.perf_counter() - start) * 1000:.2f} ms]", file=sys.stderr)
+        sys.stdout.flush()
+
+
+async def run_command(
+    args: argparse.Namespace, parser: Optional[argparse.ArgumentParser] = None
+) -> None:
     """
     Run the specified command with the MCP client.
     
     Args:
         args: Command line arguments
+        parser: The CLI argument parser, required by the shell command
     """
+    llm_cache = None
+    if args.llm_cache:
+        llm_cache = LLMResponseCache(
+            args.llm_cache,
+            max_bytes=int(args.llm_cache_max_mb * 1024 * 1024),
+            ttl=args.llm_cache_ttl or None,
+        )
+    
+    tracer = Tracer() if args.trace else None
+    
     # Create client
     client = MCPDemoClient(
         server_path=args.server_path,
         ollama_url=args.ollama_url, 
-        ollama_model=getattr(args, "model", "llama3")
+        ollama_model=getattr(args, "model", "llama3"),
+        pool_size=args.pool_size,
+        llm_cache=llm_cache,
+        tracer=tracer,
     )
     
+    # Keep one session open for the whole command, or for every command of a shell
     try:
-        # Connect to the server
-        await client.connect()
-        
-        # Execute command
-        if args.command == "latin":
-            result = await client.transform_to_ancient_latin(args.text)
-            print(result)
-        elif args.command == "latin-resource":
-            result = await client.get_ancient_latin_text_resource(args.text)
-            print(result)
-        elif args.command == "gods":
-            result = await client.get_greek_gods(args.limit)
-            print_json(result)
-        elif args.command == "greeting":
-            result = await client.get_greeting(args.name)
-            print(result)
-        elif args.command == "chat":
-            result = await client.chat_about_mcp(args.message)
-            print(result)
-        elif args.command == "review":
-            result = await client.get_code_review(args.code, args.language)
-            print(result)
-        elif args.command == "commit":
-            result = await client.get_commit_message(args.changes)
-            print(result)
+        async with client:
+            if args.command == "shell":
+                await run_shell(client, parser or build_parser(), args.timing)
+            else:
+                with trace_span(tracer, f"command {args.command}", "cli"):
+                    await execute_command(client, args)
     finally:
-        # Disconnect from the server
-        await client.disconnect()
+        if llm_cache is not None:
+            llm_cache.close()
+        if tracer is not None:
+            tracer.write(args.trace)
 
 
-def main() -> None:
-    """Run the MCP Demo Client CLI."""
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line argument parser.
+    
+    Returns:
+        The argument parser
+    """
     parser = argparse.ArgumentParser(description="MCP Demo Client")
     subparsers = parser.add_subparsers(dest="command", help="Command to run")
     
     # Latin text transformation (tool)
     latin_parser = subparsers.add_parser("latin", help="Transform text to ancient Latin using tool")
     latin_parser.add_argument("text", help="Text to transform")
+    latin_parser.add_argument(
+        "--stream", action="store_true", help="Print output chunks as they are produced"
+    )
+    latin_parser.add_argument("--seed", type=int, help="Seed for reproducible output")
+    
+    # Batch Latin text transformation (tool)
+    latin_batch_parser = subparsers.add_parser(
+        "latin-batch", help="Transform many texts to ancient Latin in one call"
+    )
+    latin_batch_parser.add_argument("texts", nargs="+", help="Texts to transform")
+    latin_batch_parser.add_argument("--seed", type=int, help="Seed for reproducible output")
     
     # Latin text transformation (resource)
-    latin_resource_parser = subparsers.add_parser("latin-resource", help="Transform text to ancient Latin using resource")
+    latin_resource_parser = subparsers.add_parser(
+        "latin-resource", help="Transform text to ancient Latin using resource"
+    )
     latin_resource_parser.add_argument("text", help="Text to transform")
+    latin_resource_parser.add_argument("--seed", type=int, help="Seed for reproducible output")
     
     # Greek gods data
     gods_parser = subparsers.add_parser("gods", help="Get Greek gods data")
     gods_parser.add_argument("--limit", type=int, help="Maximum number of records to return")
+    gods_parser.add_argument(
+        "--page-size",
+        type=int,
+        help="Stream all records as JSON lines, fetching pages of this size",
+    )
     
     # Greeting
     greeting_parser = subparsers.add_parser("greeting", help="Get a personalized greeting")
@@ -387,21 +1732,72 @@ def main() -> None:
     chat_parser = subparsers.add_parser("chat", help="Chat about MCP")
     chat_parser.add_argument("message", help="Message or question about MCP")
     chat_parser.add_argument("--model", default="llama3", help="Ollama model to use")
+    chat_parser.add_argument(
+        "--no-stream", action="store_true", help="Print the response only once it is complete"
+    )
     
     # Code review
     review_parser = subparsers.add_parser("review", help="Get a code review")
     review_parser.add_argument("code", help="Code to review")
     review_parser.add_argument("--language", default="python", help="Programming language")
     review_parser.add_argument("--model", default="llama3", help="Ollama model to use")
+    review_parser.add_argument(
+        "--no-stream", action="store_true", help="Print the response only once it is complete"
+    )
     
     # Commit message
     commit_parser = subparsers.add_parser("commit", help="Get a commit message suggestion")
     commit_parser.add_argument("changes", help="Git diff or description of changes")
     commit_parser.add_argument("--model", default="llama3", help="Ollama model to use")
+    commit_parser.add_argument(
+        "--no-stream", action="store_true", help="Print the response only once it is complete"
+    )
+    
+    # Long-lived shell reusing one session
+    shell_parser = subparsers.add_parser(
+        "shell", help="Run commands read from stdin over a single session"
+    )
+    shell_parser.add_argument(
+        "--timing", action="store_true", help="Print the latency of each command to stderr"
+    )
     
     # Add global arguments
     parser.add_argument("--ollama-url", default="http://localhost:11434", help="Ollama API URL")
-    parser.add_argument("--server-path", default="./server.py", help="Path to the MCP server script")
+    parser.add_argument(
+        "--server-path", default="./server.py", help="Path to the MCP server script"
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=1,
+        help="Number of server processes to spread requests over",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        help="Path of an SQLite database caching Ollama responses to identical prompts",
+    )
+    parser.add_argument(
+        "--llm-cache-ttl",
+        type=float,
+        default=7 * 24 * 3600,
+        help="Seconds a cached response stays valid (0: forever)",
+    )
+    parser.add_argument(
+        "--llm-cache-max-mb",
+        type=float,
+        default=100.0,
+        help="Maximum total size of cached responses in MB",
+    )
+    parser.add_argument(
+        "--trace", help="Write a Chrome trace format JSON file of where the command spent its time"
+    )
+    
+    return parser
+
+
+def main() -> None:
+    """Run the MCP Demo Client CLI."""
+    parser = build_parser()
     
     # Parse arguments
     args = parser.parse_args()
@@ -411,7 +1807,7 @@ def main() -> None:
         sys.exit(1)
     
     # Run the command asynchronously
-    asyncio.run(run_command(args))
+    asyncio.run(run_command(args, parser))
 
 
 if __name__ == "__main__":
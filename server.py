@@ -9,20 +9,292 @@ This server demonstrates the core components of the MCP protocol:
 - Prompts: User-controlled templates for AI interactions
 """
 
+import argparse
+import asyncio
+import base64
+import binascii
+import cProfile
 import csv
+import functools
+import hashlib
+import importlib.metadata
 import io
+import json
+import logging
+import marshal
+import math
+import mmap
+import multiprocessing
+import os
 import random
+import re
+import signal
+import socket
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, Union, Any
+from types import FrameType
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+    Any,
+)
+from urllib.parse import unquote
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.server.fastmcp.prompts.base import Message, UserMessage
+from mcp.types import (
+    CallToolRequest,
+    CallToolResult,
+    GetPromptRequest,
+    GetPromptResult,
+    ReadResourceRequest,
+    ReadResourceResult,
+)
 
 # Create an MCP server
 mcp = FastMCP("MCP Demo Server")
 
 
+# === EXECUTION ===
+EXECUTION_POLICIES = ("inline", "thread", "process", "auto")
+
+
+def _warm_worker() -> None:
+    """Do nothing; submitted to start pool workers before the first real call."""
+
+
+def _exit_with_parent(parent: int) -> None:
+    """
+    Make a process pool worker exit once the server that started it is gone.
+    
+    Args:
+        parent: Process id of the server
+    """
+    def watch() -> None:
+        while os.getppid() == parent:
+            time.sleep(1.0)
+        os._exit(0)
+    
+    threading.Thread(target=watch, name="parent-watch", daemon=True).start()
+
+
+def input_size(value: Any) -> int:
+    """
+    Measure the text in tool arguments.
+    
+    Args:
+        value: A tool argument, or a dictionary of them
+        
+    Returns:
+        Total length of the strings in the value, including inside lists and dictionaries
+    """
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(input_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(input_size(item) for item in value.values())
+    return 0
+
+
+class ToolExecutor:
+    """
+    Runs synchronous tool functions according to a per-tool execution policy.
+    
+    - inline: call the function directly on the event loop
+    - thread: run it in a shared thread pool
+    - process: run it in a shared process pool, so CPU-bound tools use all cores
+    - auto: run it inline for small inputs and in the process pool for large ones
+    
+    Pools are created on first use and shared by all tools with that policy.
+    A process pool call costs about a millisecond of pickling and IPC, and the
+    first call in each worker pays for spawning it and importing this module,
+    which is why small inputs are better served inline.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        policies: Optional[Dict[str, str]] = None,
+        offload_threshold: int = 32 * 1024,
+    ):
+        """
+        Initialize the executor.
+        
+        Args:
+            max_workers: Worker count of each pool (default: number of CPUs)
+            policies: Mapping of tool name to execution policy
+            offload_threshold: Characters of input from which "auto" tools use the process pool
+        """
+        self.max_workers = max_workers
+        self.offload_threshold = offload_threshold
+        self.policies: Dict[str, str] = {}
+        self._pools: Dict[str, Executor] = {}
+        self._lock = threading.Lock()
+        for name, policy in (policies or {}).items():
+            self.set_policy(name, policy)
+    
+    def set_policy(self, name: str, policy: str) -> None:
+        """
+        Set the execution policy of a tool.
+        
+        Args:
+            name: The tool name
+            policy: One of "inline", "thread", "process" or "auto"
+        """
+        if policy not in EXECUTION_POLICIES:
+            raise ValueError(f"Unknown execution policy {policy!r} for tool {name!r}")
+        self.policies[name] = policy
+    
+    def get_policy(self, name: str) -> str:
+        """
+        Get the execution policy of a tool.
+        
+        Args:
+            name: The tool name
+            
+        Returns:
+            The tool's policy, "inline" if none was set
+        """
+        return self.policies.get(name, "inline")
+    
+    def _get_pool(self, policy: str) -> Executor:
+        """Get or lazily create the pool for a policy."""
+        with self._lock:
+            pool = self._pools.get(policy)
+            if pool is None:
+                if policy == "process":
+                    # Spawned workers do not inherit the event loop or its threads
+                    pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_exit_with_parent,
+                        initargs=(os.getpid(),),
+                    )
+                else:
+                    pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="mcp-tool"
+                    )
+                self._pools[policy] = pool
+            return pool
+    
+    async def run(self, name: str, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Any:
+        """
+        Call a tool function according to its policy.
+        
+        Functions run in the process pool must be importable module-level functions
+        with picklable arguments and results.
+        
+        Args:
+            name: The tool name
+            fn: The synchronous tool function
+            kwargs: Arguments for the function
+            
+        Returns:
+            The function's result
+        """
+        policy = self.get_policy(name)
+        if policy == "auto":
+            policy = "process" if input_size(kwargs) >= self.offload_threshold else "inline"
+        if policy == "inline":
+            return fn(**kwargs)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(policy), functools.partial(fn, **kwargs))
+    
+    def warm(self) -> None:
+        """
+        Start the process pool workers in the background, if any tool may use them.
+        
+        Returns immediately, so the server can start serving while the workers
+        spawn and import this module instead of on the first offloaded call.
+        """
+        if not any(policy in ("process", "auto") for policy in self.policies.values()):
+            return
+        pool = self._get_pool("process")
+        for _ in range(self.max_workers or os.cpu_count() or 1):
+            pool.submit(_warm_worker)
+    
+    def shutdown(self) -> None:
+        """Shut down all worker pools."""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.shutdown()
+
+
+def _parse_policies(spec: str) -> Dict[str, str]:
+    """
+    Parse a comma-separated list of tool=policy pairs.
+    
+    Args:
+        spec: For example "ancient_latin_text=process,add=inline"
+        
+    Returns:
+        Mapping of tool name to policy
+    """
+    policies = {}
+    for item in spec.split(","):
+        if item.strip():
+            name, _, policy = item.partition("=")
+            policies[name.strip()] = policy.strip()
+    return policies
+
+
+# CPU-heavy tools move large inputs to the process pool; MCP_TOOL_EXECUTION overrides per tool
+executor = ToolExecutor(
+    max_workers=int(os.environ["MCP_TOOL_WORKERS"]) if os.environ.get("MCP_TOOL_WORKERS") else None,
+    policies={
+        "ancient_latin_text": "auto",
+        "ancient_latin_text_batch": "auto",
+        **_parse_policies(os.environ.get("MCP_TOOL_EXECUTION", "")),
+    },
+    offload_threshold=int(os.environ.get("MCP_TOOL_OFFLOAD_THRESHOLD", str(32 * 1024))),
+)
+
+
+ToolFunction = TypeVar("ToolFunction", bound=Callable[..., Any])
+
+
+def offloaded_tool(fn: ToolFunction) -> ToolFunction:
+    """
+    Register a synchronous function as an MCP tool run through the executor.
+    
+    The function itself is returned unchanged, so it can still be called directly.
+    
+    Args:
+        fn: The tool function
+        
+    Returns:
+        The original function
+    """
+    @functools.wraps(fn)
+    async def run_tool(**kwargs: Any) -> Any:
+        return await executor.run(fn.__name__, fn, kwargs)
+    
+    mcp.add_tool(run_tool, name=fn.__name__)
+    return fn
+
+
 # === TOOLS ===
-@mcp.tool()
+@offloaded_tool
 def add(a: int, b: int) -> int:
     """
     Add two numbers together.
@@ -37,305 +309,2536 @@ def add(a: int, b: int) -> int:
     return a + b
 
 
-@mcp.tool()
-def ancient_latin_text(text: str) -> str:
+# Latin transformation tables, built once at import time
+LATIN_REPLACEMENTS: Dict[str, str] = {
+    "the": "thy",
+    "and": "et",
+    "of": "de",
+    "to": "ad",
+    "in": "in",
+    "is": "est",
+    "for": "pro",
+    "with": "cum",
+    "you": "tu",
+    "I": "ego",
+    "we": "nos",
+    "they": "illi",
+    "this": "hic",
+    "that": "ille",
+    "have": "habeo",
+    "be": "esse",
+    "will": "voluntas",
+}
+
+LATIN_PHRASES: Tuple[str, ...] = (
+    "Veni, vidi, vici.",
+    "Alea iacta est.",
+    "Carpe diem.",
+    "Et tu, Brute?",
+    "Cogito, ergo sum.",
+)
+
+LATIN_PUNCTUATION = ".,;:!?"
+
+# Longer tokens are rarely repeated words, so they are compiled without going through the cache
+LATIN_MAX_CACHED_WORD = 64
+
+
+def _compile_latin_word(word: str) -> Tuple[str, bool, bool]:
     """
-    Transform text to appear as if written in ancient Latin.
+    Compile a single whitespace-delimited token.
     
-    This tool applies various transformations to make modern text
-    resemble ancient Latin writing style and vocabulary.
+    The replacement step only depends on the token itself, so results for
+    tokens of up to LATIN_MAX_CACHED_WORD characters are memoized through
+    ``_compile_cached_latin_word`` and repeated words cost a single cache lookup.
     
     Args:
-        text: The input text to transform
+        word: The token to compile
         
     Returns:
-        Text transformed to resemble ancient Latin
+        Tuple of (replaced token, suffix candidate, ends with alphanumeric)
     """
-    # Replace common English words with Latin-like equivalents
-    replacements = {
-        "the": "thy",
-        "and": "et",
-        "of": "de",
-        "to": "ad",
-        "in": "in",
-        "is": "est",
-        "for": "pro",
-        "with": "cum",
-        "you": "tu",
-        "I": "ego",
-        "we": "nos",
-        "they": "illi",
-        "this": "hic",
-        "that": "ille",
-        "have": "habeo",
-        "be": "esse",
-        "will": "voluntas",
-    }
-    
-    # Apply replacements
-    words = text.split()
-    for i, word in enumerate(words):
-        # Strip punctuation for comparison
-        clean_word = word.lower().strip(".,;:!?")
-        if clean_word in replacements:
-            # Preserve capitalization and punctuation
-            punctuation = ""
-            if not word[-1].isalnum():
-                punctuation = word[-1]
-            
-            if word[0].isupper():
-                words[i] = replacements[clean_word].capitalize() + punctuation
-            else:
-                words[i] = replacements[clean_word] + punctuation
-    
-    # Add Latin-like suffixes to some words
-    for i, word in enumerate(words):
-        if len(word) > 4 and random.random() < 0.3:
-            if word[-1].isalnum():
-                if random.random() < 0.5:
-                    words[i] = word + "us"
-                else:
-                    words[i] = word + "um"
-    
-    # Join words and add some Latin phrases
-    latin_phrases = [
-        "Veni, vidi, vici.",
-        "Alea iacta est.",
-        "Carpe diem.",
-        "Et tu, Brute?",
-        "Cogito, ergo sum."
-    ]
-    
-    result = " ".join(words)
-    
-    # Randomly insert a Latin phrase
-    if len(result) > 50 and random.random() < 0.5:
-        phrase = random.choice(latin_phrases)
-        insert_pos = random.randint(0, len(words) - 1)
-        words.insert(insert_pos, phrase)
-        result = " ".join(words)
+    replacement = LATIN_REPLACEMENTS.get(word.lower().strip(LATIN_PUNCTUATION))
+    if replacement is not None:
+        # Preserve capitalization and trailing punctuation
+        punctuation = "" if word[-1].isalnum() else word[-1]
+        if word[0].isupper():
+            replacement = replacement.capitalize()
+        word = replacement + punctuation
     
-    return result
+    return word, len(word) > 4, word[-1].isalnum()
 
 
-# === RESOURCES ===
-# Create a fake CSV with Greek gods data
-GREEK_GODS_CSV = """name,domain,symbol,roman_name
-Zeus,Sky and Thunder,Lightning bolt,Jupiter
-Poseidon,Sea and Earthquakes,Trident,Neptune
-Hades,Underworld,Helmet of darkness,Pluto
-Athena,Wisdom and War,Owl,Minerva
-Apollo,Sun and Music,Lyre,Apollo
-Artemis,Moon and Hunt,Bow and arrow,Diana
-Aphrodite,Love and Beauty,Dove,Venus
-Hermes,Messengers and Travelers,Winged sandals,Mercury
-Ares,War,Spear,Mars
-Hephaestus,Fire and Forge,Hammer,Vulcan
-Demeter,Agriculture,Wheat,Ceres
-Dionysus,Wine and Festivity,Grapevine,Bacchus
-Hera,Marriage and Family,Peacock,Juno
-Hestia,Hearth and Home,Hearth,Vesta
-"""
+_compile_cached_latin_word = lru_cache(maxsize=65536)(_compile_latin_word)
 
 
-@mcp.resource("gods://text/{limit}")
-def get_greek_gods(limit: Optional[int] = 10) -> List[Dict[str, str]]:
+# Unseeded transformations use one generator per thread rather than the
+# shared module-level one
+_rng_local = threading.local()
+
+
+def _reset_thread_rngs() -> None:
+    """Drop inherited generators so forked workers do not share a random stream."""
+    global _rng_local
+    _rng_local = threading.local()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_thread_rngs)
+
+
+def latin_rng(seed: Optional[int] = None) -> random.Random:
     """
-    Get information about Greek gods from a CSV dataset.
+    Get the random generator for a single Latin transformation.
     
     Args:
-        limit: Maximum number of records to return (default: 10)
+        seed: Optional seed; identical (text, seed) pairs give identical output
         
     Returns:
-        List of dictionaries containing information about Greek gods
+        A new generator seeded with ``seed``, or this thread's generator if no seed is given
+    """
+    if seed is not None:
+        return random.Random(seed)
+    
+    rng = getattr(_rng_local, "rng", None)
+    if rng is None:
+        rng = _rng_local.rng = random.Random()
+    return rng
+
+
+def transform_latin_words(words: List[str], rng: random.Random) -> List[str]:
     """
-    csv_file = io.StringIO(GREEK_GODS_CSV)
-    reader = csv.DictReader(csv_file)
+    Apply word replacements and Latin suffixes to a list of tokens.
     
-    result = []
-    for i, row in enumerate(reader):
-        if limit is not None and i >= limit:
-            break
-        result.append(row)
+    Args:
+        words: Whitespace-delimited tokens
+        rng: Random generator deciding which words receive suffixes
+        
+    Returns:
+        The transformed tokens
+    """
+    compile_word = _compile_cached_latin_word
+    compile_long_word = _compile_latin_word
+    rand = rng.random
+    result: List[str] = []
+    append = result.append
+    for token in words:
+        if len(token) <= LATIN_MAX_CACHED_WORD:
+            word, suffix_candidate, alnum_end = compile_word(token)
+        else:
+            word, suffix_candidate, alnum_end = compile_long_word(token)
+        if suffix_candidate and rand() < 0.3 and alnum_end:
+            word += "us" if rand() < 0.5 else "um"
+        append(word)
     
     return result
 
 
-# Also add a resource version of the ancient Latin text transformation
-@mcp.resource("ancientlatin://{text}")
-def get_ancient_latin_text(text: str) -> str:
+@offloaded_tool
+def ancient_latin_text(text: str, seed: Optional[int] = None) -> str:
     """
-    Get text transformed to appear as if written in ancient Latin.
+    Transform text to appear as if written in ancient Latin.
     
-    This resource applies the same transformations as the ancient_latin_text tool
-    but is accessed as a resource rather than a tool.
+    This tool applies various transformations to make modern text
+    resemble ancient Latin writing style and vocabulary.
     
     Args:
-        text: The text to transform
+        text: The input text to transform
+        seed: Optional seed making the output reproducible
         
     Returns:
         Text transformed to resemble ancient Latin
     """
-    return ancient_latin_text(text)
+    rng = latin_rng(seed)
+    words = transform_latin_words(text.split(), rng)
+    
+    # Randomly insert a Latin phrase, measuring the joined length without joining
+    if sum(map(len, words)) + len(words) - 1 > 50 and rng.random() < 0.5:
+        phrase = rng.choice(LATIN_PHRASES)
+        insert_pos = rng.randint(0, len(words) - 1)
+        words.insert(insert_pos, phrase)
+    
+    return " ".join(words)
 
 
-# === PROMPTS ===
-# Updated to follow MCP prompt specification
-@mcp.prompt("mcp_expert")
-def get_mcp_expert_prompt(topic: Optional[str] = None) -> Dict[str, Any]:
+@offloaded_tool
+def ancient_latin_text_batch(texts: List[str], seed: Optional[int] = None) -> List[str]:
     """
-    Get a prompt template for answering questions about MCP.
+    Transform many texts to ancient Latin in a single call.
     
-    This prompt helps guide AI models to provide accurate and helpful
-    information about the Model Control Protocol.
+    Batching amortizes the per-call protocol overhead for many short texts.
     
     Args:
-        topic: Optional specific MCP topic to focus on
+        texts: The input texts to transform
+        seed: Optional seed applied to every text, so each result matches
+            ancient_latin_text(text, seed)
         
     Returns:
-        A structured prompt with messages in MCP format
+        The transformed texts, in input order
     """
-    base_prompt = """You are an MCP (Model Control Protocol) expert assistant. Your goal is to provide accurate, 
-helpful information about the MCP protocol, its components, and how to use it effectively.
+    return [ancient_latin_text(text, seed) for text in texts]
 
-The MCP protocol consists of three main components:
-1. Tools: Model-controlled functions that allow AI models to take actions
-2. Resources: Application-controlled data that models can access but not modify
-3. Prompts: User-controlled templates for AI interactions
 
-When answering questions about MCP, focus on:
-- Explaining concepts clearly with examples
-- Providing practical implementation advice
-- Suggesting best practices for MCP architecture
-- Helping troubleshoot common issues
+# Default number of characters consumed per chunk by the streaming tool
+STREAM_CHUNK_SIZE = 64 * 1024
 
-Remember that MCP is designed to create safer, more controllable AI systems by clearly 
-defining the boundaries between model control, application control, and user control."""
 
-    topic_content = ""
-    if topic:
-        if topic.lower() == "tools":
-            topic_content = """
-Tools in MCP are model-controlled functions that allow AI models to take actions.
-They are defined on the server side and can be invoked by the client.
-Tools have a name, description, and parameters, and they return a result.
-Examples include text transformation, data processing, or external API calls."""
-        elif topic.lower() == "resources":
-            topic_content = """
-Resources in MCP are application-controlled data that models can access but not modify.
-They are defined on the server side and can be accessed by the client.
-Resources have a URI and can return various types of data.
-Examples include database records, file contents, or API responses."""
-        elif topic.lower() == "prompts":
-            topic_content = """
-Prompts in MCP are user-controlled templates for AI interactions.
-They are defined on the server side and can be used by the client.
-Prompts have a name, description, and optional arguments.
-They return structured messages with roles and content.
-Prompts can include dynamic content from resources and support multi-step workflows."""
-
-    # Return structured messages in MCP format
-    return {
-        "messages": [
-            {
-                "role": "system",
-                "content": {
-                    "type": "text",
-                    "text": base_prompt + topic_content
-                }
-            },
-            {
-                "role": "user",
-                "content": {
-                    "type": "text",
-                    "text": "Please tell me about " + (topic if topic else "MCP in general")
-                }
-            }
-        ]
-    }
+def iter_text_chunks(text: str, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Split a string into fixed-size chunks without regard to word boundaries.
+    
+    Args:
+        text: The text to split
+        chunk_size: Maximum number of characters per chunk
+        
+    Returns:
+        An iterator over the chunks
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
 
 
-@mcp.prompt("code_review")
-def get_code_review_prompt(code: str, language: Optional[str] = "python") -> Dict[str, Any]:
+def stream_ancient_latin_text(chunks: Iterable[str], seed: Optional[int] = None) -> Iterator[str]:
     """
-    Get a prompt template for code review.
+    Transform text to ancient Latin incrementally, one input chunk at a time.
     
-    This prompt helps guide AI models to provide helpful code reviews.
+    Words split across chunk boundaries are carried over to the next chunk,
+    so the concatenated output matches the word-level behavior of
+    ancient_latin_text. The Latin phrase is considered once, as soon as the
+    output grows past 50 characters, and is inserted into that chunk.
     
     Args:
-        code: The code to review
-        language: The programming language of the code
+        chunks: Pieces of the input text, e.g. from iter_text_chunks or a file
+        seed: Optional seed making the output reproducible for the same chunking
         
     Returns:
-        A structured prompt with messages in MCP format
+        An iterator over transformed chunks whose concatenation is the result
     """
-    return {
-        "messages": [
-            {
-                "role": "system",
-                "content": {
-                    "type": "text",
-                    "text": f"You are an expert {language} developer. Your task is to review code and provide constructive feedback."
-                }
-            },
-            {
-                "role": "user",
-                "content": {
-                    "type": "text",
-                    "text": f"Please review this {language} code and suggest improvements:\n\n```{language}\n{code}\n```"
-                }
-            }
-        ]
-    }
+    rng = latin_rng(seed)
+    carry = ""
+    separator = ""
+    output_length = 0
+    phrase_pending = True
+    
+    def emit(words: List[str]) -> str:
+        nonlocal separator, output_length, phrase_pending
+        words = transform_latin_words(words, rng)
+        output_length += sum(map(len, words)) + len(words)
+        if phrase_pending and output_length > 50:
+            phrase_pending = False
+            if rng.random() < 0.5:
+                phrase = rng.choice(LATIN_PHRASES)
+                words.insert(rng.randint(0, len(words) - 1), phrase)
+        
+        piece = separator + " ".join(words)
+        separator = " "
+        return piece
+    
+    for chunk in chunks:
+        data = carry + chunk
+        words = data.split()
+        # A chunk not ending in whitespace may have cut its last word in half
+        carry = words.pop() if words and not data[-1].isspace() else ""
+        if words:
+            yield emit(words)
+    
+    if carry:
+        yield emit([carry])
 
 
-@mcp.prompt("git_commit")
-def get_git_commit_prompt(changes: str) -> Dict[str, Any]:
+@mcp.tool()
+async def ancient_latin_text_stream(
+    text: str,
+    ctx: Context,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+    seed: Optional[int] = None,
+    return_text: bool = False,
+) -> Dict[str, Any]:
     """
-    Get a prompt template for generating Git commit messages.
+    Transform text to ancient Latin, streaming partial output as progress.
     
-    This prompt helps guide AI models to write clear and concise commit messages.
+    Each transformed chunk is sent to the client as the message of a progress
+    notification as soon as it is ready, so output is visible before the whole
+    input has been processed. Chunks are not kept once sent, so the output is
+    neither held in memory nor sent again in the response unless asked for.
+    
+    Only the output is streamed: MCP tool arguments arrive in a single request,
+    so ``text`` is received and held in full before the first chunk is
+    transformed. Inputs too large for one request must be split by the client.
     
     Args:
-        changes: Git diff or description of changes
+        text: The input text to transform
+        ctx: The MCP request context
+        chunk_size: Number of input characters processed per chunk
+        seed: Optional seed making the output reproducible
+        return_text: Whether to also return the complete transformed text
         
     Returns:
-        A structured prompt with messages in MCP format
+        The number of chunks and characters sent, and the text if return_text is set
     """
-    return {
-        "messages": [
-            {
-                "role": "system",
-                "content": {
-                    "type": "text",
-                    "text": "You are an expert at writing clear, concise, and informative Git commit messages."
-                }
-            },
-            {
-                "role": "user",
-                "content": {
-                    "type": "text",
-                    "text": f"Generate a commit message for these changes:\n\n{changes}"
-                }
+    chunks = 0
+    characters = 0
+    pieces: Optional[List[str]] = [] if return_text else None
+    for piece in stream_ancient_latin_text(iter_text_chunks(text, chunk_size), seed):
+        chunks += 1
+        characters += len(piece)
+        if pieces is not None:
+            pieces.append(piece)
+        await ctx.report_progress(chunks, message=piece)
+    
+    summary: Dict[str, Any] = {"chunks": chunks, "characters": characters}
+    if pieces is not None:
+        summary["text"] = "".join(pieces)
+    return summary
+
+
+# === CACHING ===
+def estimate_size(value: Any) -> int:
+    """
+    Estimate the memory held by a value, including the items of containers.
+    
+    ``sys.getsizeof`` alone only counts a tuple's pointers, so a key like
+    ``(text, seed)`` would weigh the same however long ``text`` is.
+    
+    Args:
+        value: The value to measure
+        
+    Returns:
+        Approximate size in bytes
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list, frozenset, set)):
+        size += sum(estimate_size(item) for item in value)
+    elif isinstance(value, dict):
+        size += sum(estimate_size(key) + estimate_size(item) for key, item in value.items())
+    return size
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache bounded by entry count, total size and age.
+    
+    Entries are evicted least recently used first whenever either the entry
+    or the byte budget is exceeded, and expire ``ttl`` seconds after insertion.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl: Optional[float] = None,
+        sizeof: Callable[[Any], int] = estimate_size,
+    ):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of cached entries
+            max_bytes: Maximum total size of cached keys and values in bytes
+            ttl: Optional time to live of an entry in seconds
+            sizeof: Function measuring the size in bytes of a key or value
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[Any, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: Any) -> Optional[Any]:
+        """
+        Look up a cached value, marking it as most recently used.
+        
+        Args:
+            key: The cache key
+            
+        Returns:
+            The cached value, or None if it is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, size, expires_at = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, key: Any, value: Any) -> None:
+        """
+        Store a value, evicting least recently used entries to stay within bounds.
+        
+        Values larger than the whole byte budget are not cached.
+        
+        Args:
+            key: The cache key
+            value: The value to cache
+        """
+        size = self.sizeof(key) + self.sizeof(value)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Remove all entries, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters and current usage.
+        
+        Returns:
+            Dictionary of counters, sizes and limits
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
             }
-        ]
-    }
 
 
-# Dynamic greeting resource (from original example)
-@mcp.resource("greeting://{name}")
-def get_greeting(name: str) -> str:
+# Serialized JSON responses of static resources
+json_response_cache = ResultCache(max_entries=256, max_bytes=64 * 1024 * 1024)
+# Serialized JSON responses of resources with a client-chosen size, kept apart so they
+# cannot evict the static responses above
+json_page_cache = ResultCache(max_entries=32, max_bytes=8 * 1024 * 1024)
+
+
+def cached_json_resource(
+    uri: str, version: Callable[[], str], cache: Optional[ResultCache] = json_response_cache
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
     """
-    Get a personalized greeting for the given name.
+    Register a function as an MCP resource whose JSON response is serialized once.
+    
+    Responses are cached per distinct set of URI parameters together with the
+    backing data's version, so a new version is serialized afresh while stale
+    entries age out of the LRU. The decorated function is returned unchanged
+    and keeps returning Python objects when called directly.
     
     Args:
-        name: The name to include in the greeting
+        uri: The resource URI template
+        version: Returns the current version of the data behind the resource
+        cache: The cache keeping the serialized responses, or None to serialize every read
         
     Returns:
-        A personalized greeting message
+        A decorator registering the resource
     """
-    return f"Hello, {name}!"
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def read_resource(**kwargs: Any) -> str:
+            if cache is None:
+                return json.dumps(fn(**kwargs), ensure_ascii=False, separators=(",", ":"))
+            
+            key = (uri, version(), tuple(sorted(kwargs.items())))
+            payload: Optional[str] = cache.get(key)
+            if payload is None:
+                payload = json.dumps(fn(**kwargs), ensure_ascii=False, separators=(",", ":"))
+                cache.put(key, payload)
+            return payload
+        
+        mcp.resource(uri, mime_type="application/json")(read_resource)
+        return fn
+    
+    return decorator
+
+
+# === RESOURCES ===
+# Create a fake CSV with Greek gods data
+GREEK_GODS_CSV = """name,domain,symbol,roman_name
+Zeus,Sky and Thunder,Lightning bolt,Jupiter
+Poseidon,Sea and Earthquakes,Trident,Neptune
+Hades,Underworld,Helmet of darkness,Pluto
+Athena,Wisdom and War,Owl,Minerva
+Apollo,Sun and Music,Lyre,Apollo
+Artemis,Moon and Hunt,Bow and arrow,Diana
+Aphrodite,Love and Beauty,Dove,Venus
+Hermes,Messengers and Travelers,Winged sandals,Mercury
+Ares,War,Spear,Mars
+Hephaestus,Fire and Forge,Hammer,Vulcan
+Demeter,Agriculture,Wheat,Ceres
+Dionysus,Wine and Festivity,Grapevine,Bacchus
+Hera,Marriage and Family,Peacock,Juno
+Hestia,Hearth and Home,Hearth,Vesta
+"""
+
+
+# Words too common to be useful as domain keywords
+DOMAIN_STOPWORDS = frozenset({"and", "of", "the"})
+
+
+def build_gods_indexes(
+    fieldnames: Tuple[str, ...], rows: Iterable[Tuple[str, ...]]
+) -> Tuple[Dict[str, int], Dict[str, int], Dict[str, List[int]]]:
+    """
+    Build the lookup indexes of a gods table.
+    
+    Args:
+        fieldnames: Column names, including name, roman_name and domain
+        rows: Records as tuples in column order
+        
+    Returns:
+        Tuple of (row by lowercase name, row by lowercase Roman name, rows by domain keyword)
+    """
+    by_name: Dict[str, int] = {}
+    by_roman_name: Dict[str, int] = {}
+    by_domain: Dict[str, List[int]] = {}
+    
+    name_col = fieldnames.index("name")
+    roman_col = fieldnames.index("roman_name")
+    domain_col = fieldnames.index("domain")
+    for i, row in enumerate(rows):
+        by_name.setdefault(row[name_col].lower(), i)
+        by_roman_name.setdefault(row[roman_col].lower(), i)
+        for keyword in set(re.findall(r"\w+", row[domain_col].lower())) - DOMAIN_STOPWORDS:
+            by_domain.setdefault(keyword, []).append(i)
+    
+    return by_name, by_roman_name, by_domain
+
+
+class GodsTable:
+    """
+    Gods dataset parsed once into tuple rows with lookup indexes.
+    
+    Names and Roman names are indexed case-insensitively for O(1) lookups,
+    and every word of a god's domain is indexed as a keyword.
+    """
+
+    __slots__ = ("fieldnames", "rows", "version", "by_name", "by_roman_name", "by_domain")
+
+    def __init__(
+        self,
+        fieldnames: Tuple[str, ...],
+        rows: List[Tuple[str, ...]],
+        version: Optional[str] = None,
+    ):
+        """
+        Initialize the table and build its indexes.
+        
+        Args:
+            fieldnames: Column names
+            rows: Records as tuples in column order
+            version: Identifier of the data, derived from its content if omitted
+        """
+        self.fieldnames = fieldnames
+        self.rows = rows
+        self.version = version or hashlib.sha1(repr((fieldnames, rows)).encode()).hexdigest()[:16]
+        self.by_name, self.by_roman_name, self.by_domain = build_gods_indexes(fieldnames, rows)
+    
+    @classmethod
+    def from_csv(cls, text: str) -> "GodsTable":
+        """
+        Parse a CSV document with a header row.
+        
+        Args:
+            text: The CSV content
+            
+        Returns:
+            The parsed table
+        """
+        reader = csv.reader(io.StringIO(text))
+        fieldnames = tuple(next(reader))
+        version = hashlib.sha1(text.encode()).hexdigest()[:16]
+        return cls(fieldnames, [tuple(row) for row in reader if row], version)
+    
+    def __len__(self) -> int:
+        """Return the number of records."""
+        return len(self.rows)
+    
+    def record(self, index: int) -> Dict[str, str]:
+        """
+        Get a record as a dictionary.
+        
+        Args:
+            index: Row index
+            
+        Returns:
+            Dictionary mapping column names to values
+        """
+        return dict(zip(self.fieldnames, self.rows[index]))
+    
+    def rows_between(self, start: int, stop: int) -> List[Tuple[str, ...]]:
+        """
+        Get the rows in [start, stop).
+        
+        Args:
+            start: Index of the first row
+            stop: Index after the last row
+            
+        Returns:
+            Records as tuples in column order
+        """
+        return self.rows[start:stop]
+    
+    def head(self, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Get the first records of the table.
+        
+        Args:
+            limit: Maximum number of records to return (default: all)
+            
+        Returns:
+            List of records as dictionaries
+        """
+        rows = self.rows if limit is None else self.rows[:max(limit, 0)]
+        fieldnames = self.fieldnames
+        return [dict(zip(fieldnames, row)) for row in rows]
+    
+    def find_by_name(self, name: str) -> Optional[Dict[str, str]]:
+        """Get the record of a god by Greek name, ignoring case."""
+        index = self.by_name.get(name.lower())
+        return None if index is None else self.record(index)
+    
+    def find_by_roman_name(self, roman_name: str) -> Optional[Dict[str, str]]:
+        """Get the record of a god by Roman name, ignoring case."""
+        index = self.by_roman_name.get(roman_name.lower())
+        return None if index is None else self.record(index)
+    
+    def find_by_domain(self, keyword: str) -> List[Dict[str, str]]:
+        """Get the records of all gods whose domain contains a keyword, ignoring case."""
+        return [self.record(index) for index in self.by_domain.get(keyword.lower(), [])]
+
+
+class MappedGodsTable:
+    """
+    Gods dataset served from a CSV file through a read-only memory map.
+    
+    Nothing is parsed up front: the offsets of rows are discovered lazily as
+    far as a request needs them, and only the rows being returned are decoded.
+    The lookup indexes are built on the first lookup, which scans the file once.
+    Quoted fields may contain commas, quotes and newlines.
+    """
+
+    __slots__ = (
+        "path", "fieldnames", "version", "_file", "_mmap", "_starts", "_ends", "_scan_pos",
+        "_complete", "_indexes", "_lock",
+    )
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Open the file and read its header row.
+        
+        Args:
+            path: Path to a UTF-8 CSV file with a header row
+        """
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self.version = self.file_version(os.fstat(self._file.fileno()))
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Gods dataset is empty: {self.path}") from None
+        
+        # Row i spans bytes [_starts[i], _ends[i]) of the file
+        self._starts = array("q")
+        self._ends = array("q")
+        header_end = self._record_end(0)
+        self.fieldnames = self._parse(0, header_end)
+        self._scan_pos = header_end
+        self._complete = False
+        self._indexes: Optional[Tuple[Dict[str, int], Dict[str, int], Dict[str, List[int]]]] = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def file_version(stat: os.stat_result) -> str:
+        """Derive a version from the inode, size and modification time of a file."""
+        return f"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    
+    def changed(self) -> bool:
+        """
+        Check whether the file at ``path`` is no longer the one that is mapped.
+        
+        Returns:
+            True if the file was replaced or modified, False if it is unchanged or missing
+        """
+        try:
+            return self.file_version(self.path.stat()) != self.version
+        except OSError:
+            # Keep serving the mapped data while the path is briefly missing during a replace
+            return False
+    
+    @property
+    def indexed_rows(self) -> int:
+        """Number of rows whose offsets have been discovered so far."""
+        return len(self._starts)
+    
+    def _record_end(self, pos: int) -> int:
+        """Find the end of the record starting at ``pos``, honoring quoted newlines."""
+        mm = self._mmap
+        size = len(mm)
+        quotes = 0
+        while True:
+            newline = mm.find(b"\n", pos)
+            end = size if newline < 0 else newline + 1
+            quotes += mm[pos:end].count(b'"')
+            if quotes % 2 == 0 or end >= size:
+                return end
+            pos = end
+    
+    def _parse(self, start: int, end: int) -> Tuple[str, ...]:
+        """Decode and parse the record stored at [start, end)."""
+        text = self._mmap[start:end].decode("utf-8")
+        return tuple(next(csv.reader(io.StringIO(text)), ()))
+    
+    def _scan(self, count: Optional[int] = None) -> None:
+        """Discover row offsets until ``count`` rows are known or the file ends."""
+        with self._lock:
+            mm = self._mmap
+            size = len(mm)
+            pos = self._scan_pos
+            while not self._complete and (count is None or len(self._starts) < count):
+                if pos >= size:
+                    self._complete = True
+                    break
+                end = self._record_end(pos)
+                if mm[pos:end].strip():
+                    self._starts.append(pos)
+                    self._ends.append(end)
+                pos = end
+            self._scan_pos = pos
+    
+    def __len__(self) -> int:
+        """Return the number of records, scanning the whole file if needed."""
+        self._scan()
+        return len(self._starts)
+    
+    def record(self, index: int) -> Dict[str, str]:
+        """
+        Get a record as a dictionary.
+        
+        Args:
+            index: Row index
+            
+        Returns:
+            Dictionary mapping column names to values
+        """
+        self._scan(index + 1)
+        return dict(zip(self.fieldnames, self._parse(self._starts[index], self._ends[index])))
+    
+    def rows_between(self, start: int, stop: int) -> List[Tuple[str, ...]]:
+        """
+        Get the rows in [start, stop), decoding only those rows.
+        
+        Args:
+            start: Index of the first row
+            stop: Index after the last row
+            
+        Returns:
+            Records as tuples in column order
+        """
+        self._scan(stop)
+        stop = min(stop, len(self._starts))
+        return [self._parse(self._starts[i], self._ends[i]) for i in range(start, stop)]
+    
+    def head(self, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Get the first records of the table.
+        
+        Args:
+            limit: Maximum number of records to return (default: all)
+            
+        Returns:
+            List of records as dictionaries
+        """
+        if limit is None:
+            limit = len(self)
+        fieldnames = self.fieldnames
+        return [dict(zip(fieldnames, row)) for row in self.rows_between(0, max(limit, 0))]
+    
+    def _get_indexes(self) -> Tuple[Dict[str, int], Dict[str, int], Dict[str, List[int]]]:
+        """Build the lookup indexes on first use."""
+        if self._indexes is None:
+            self._scan()
+            rows = (self._parse(start, end) for start, end in zip(self._starts, self._ends))
+            indexes = build_gods_indexes(self.fieldnames, rows)
+            with self._lock:
+                self._indexes = indexes
+        return self._indexes
+    
+    def find_by_name(self, name: str) -> Optional[Dict[str, str]]:
+        """Get the record of a god by Greek name, ignoring case."""
+        index = self._get_indexes()[0].get(name.lower())
+        return None if index is None else self.record(index)
+    
+    def find_by_roman_name(self, roman_name: str) -> Optional[Dict[str, str]]:
+        """Get the record of a god by Roman name, ignoring case."""
+        index = self._get_indexes()[1].get(roman_name.lower())
+        return None if index is None else self.record(index)
+    
+    def find_by_domain(self, keyword: str) -> List[Dict[str, str]]:
+        """Get the records of all gods whose domain contains a keyword, ignoring case."""
+        return [self.record(index) for index in self._get_indexes()[2].get(keyword.lower(), [])]
+    
+    def close(self) -> None:
+        """Release the memory map and the file."""
+        self._mmap.close()
+        self._file.close()
+
+
+def load_gods_table(path: Optional[str] = None) -> Union[GodsTable, MappedGodsTable]:
+    """
+    Load the gods dataset.
+    
+    Args:
+        path: Optional CSV file to serve through a memory map; defaults to the
+            MCP_GODS_CSV environment variable, then to the built-in GREEK_GODS_CSV
+        
+    Returns:
+        The gods table
+    """
+    path = path or os.environ.get("MCP_GODS_CSV")
+    if path:
+        return MappedGodsTable(path)
+    return GodsTable.from_csv(GREEK_GODS_CSV)
+
+
+GREEK_GODS = load_gods_table()
+
+# Minimum number of seconds between checks of a mapped gods file for changes
+GODS_CHECK_INTERVAL = float(os.environ.get("MCP_GODS_CHECK_INTERVAL", "1.0"))
+_gods_checked_at = time.monotonic()
+_gods_lock = threading.Lock()
+
+
+def reload_gods_table(path: Optional[str] = None) -> None:
+    """
+    Replace the served gods dataset, e.g. after its file changed.
+    
+    Cached responses of the previous data are not served again since the
+    table's version is part of their cache key.
+    
+    Args:
+        path: Optional CSV file, see load_gods_table
+    """
+    global GREEK_GODS
+    previous, GREEK_GODS = GREEK_GODS, load_gods_table(path)
+    if isinstance(previous, MappedGodsTable):
+        previous.close()
+
+
+def gods_table() -> Union[GodsTable, MappedGodsTable]:
+    """
+    Get the served gods dataset, reloading a mapped file that has been replaced.
+    
+    The file is checked at most every GODS_CHECK_INTERVAL seconds. Replace it
+    by writing a new file and renaming it over the old path; editing it in
+    place is unsupported, since reading a mapped file that was truncated can
+    crash the server before the change is noticed.
+    
+    Returns:
+        The current gods table
+    """
+    global GREEK_GODS, _gods_checked_at
+    table = GREEK_GODS
+    if not isinstance(table, MappedGodsTable):
+        return table
+    if time.monotonic() - _gods_checked_at < GODS_CHECK_INTERVAL:
+        return table
+    
+    with _gods_lock:
+        if GREEK_GODS is not table:
+            return GREEK_GODS
+        _gods_checked_at = time.monotonic()
+        if not table.changed():
+            return table
+        try:
+            GREEK_GODS = MappedGodsTable(table.path)
+        except (OSError, ValueError) as e:
+            logging.warning(
+                "Keeping the previous gods dataset, reloading %s failed: %s", table.path, e
+            )
+            return table
+    
+    # Resources are read on the event loop thread, so no request is still using the old map
+    table.close()
+    return GREEK_GODS
+
+
+def get_gods_version() -> str:
+    """Get the version of the currently served gods dataset."""
+    return gods_table().version
+
+
+# Most records served in one gods://text response; larger datasets are read page by page
+GODS_MAX_TEXT_ROWS = int(os.environ.get("MCP_GODS_MAX_TEXT_ROWS", "10000"))
+
+
+def gods_head(limit: Optional[int]) -> List[Dict[str, str]]:
+    """
+    Get the first records of the gods dataset, refusing more than GODS_MAX_TEXT_ROWS.
+    
+    At most one record past the cap is decoded, however large the dataset is.
+    
+    Args:
+        limit: Maximum number of records to return, or None for all
+        
+    Returns:
+        List of dictionaries containing information about Greek gods
+        
+    Raises:
+        ValueError: If more than GODS_MAX_TEXT_ROWS records would be returned
+    """
+    cap = GODS_MAX_TEXT_ROWS
+    gods = gods_table().head(cap + 1 if limit is None else min(limit, cap + 1))
+    if len(gods) > cap:
+        raise ValueError(
+            f"More than {cap} gods requested; read them page by page from gods://page/{{limit}}"
+        )
+    return gods
+
+
+@cached_json_resource("gods://text/{limit}", get_gods_version, json_page_cache)
+def get_greek_gods(limit: Optional[int] = 10) -> List[Dict[str, str]]:
+    """
+    Get information about Greek gods from a CSV dataset.
+    
+    Args:
+        limit: Maximum number of records to return (default: 10)
+        
+    Returns:
+        List of dictionaries containing information about Greek gods
+    """
+    return gods_head(limit)
+
+
+@cached_json_resource("gods://text", get_gods_version)
+def get_all_greek_gods() -> List[Dict[str, str]]:
+    """
+    Get information about all Greek gods in the dataset.
+    
+    Datasets of more than GODS_MAX_TEXT_ROWS records are refused; read them
+    from the paginated gods://page resources instead.
+    
+    Returns:
+        List of dictionaries containing information about Greek gods
+    """
+    return gods_head(None)
+
+
+@mcp.resource("gods://version")
+def get_greek_gods_version() -> str:
+    """
+    Get the version of the gods dataset.
+    
+    The version changes whenever the data behind the gods:// resources does,
+    so clients can keep parsed responses until it changes, like an HTTP ETag.
+    
+    Returns:
+        An opaque version string
+    """
+    return get_gods_version()
+
+
+# Largest page served by the paginated gods resources
+GODS_MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(offset: int) -> str:
+    """
+    Encode a row offset as an opaque, URI-safe pagination cursor.
+    
+    Args:
+        offset: Index of the first row of the next page
+        
+    Returns:
+        The cursor
+    """
+    return base64.urlsafe_b64encode(f"offset:{offset}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decode a pagination cursor created by encode_cursor.
+    
+    Args:
+        cursor: The cursor
+        
+    Returns:
+        The row offset it encodes
+    """
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, _, offset = decoded.partition(":")
+        if prefix == "offset" and offset.isdigit():
+            return int(offset)
+    except (binascii.Error, UnicodeDecodeError):
+        pass
+    raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def paginate_gods(limit: int, offset: int = 0) -> Dict[str, Any]:
+    """
+    Get one page of the gods dataset.
+    
+    Args:
+        limit: Maximum number of records in the page
+        offset: Index of the first record
+        
+    Returns:
+        Dictionary with the page's "items" and the "next_cursor" (None on the last page)
+    """
+    if not 1 <= limit <= GODS_MAX_PAGE_SIZE:
+        raise ValueError(f"Page size must be between 1 and {GODS_MAX_PAGE_SIZE}")
+    
+    # Fetch one extra row to find out whether another page follows
+    table = gods_table()
+    rows = table.rows_between(offset, offset + limit + 1)
+    fieldnames = table.fieldnames
+    return {
+        "items": [dict(zip(fieldnames, row)) for row in rows[:limit]],
+        "next_cursor": encode_cursor(offset + limit) if len(rows) > limit else None,
+    }
+
+
+@cached_json_resource("gods://page/{limit}", get_gods_version, json_page_cache)
+def get_greek_gods_first_page(limit: int) -> Dict[str, Any]:
+    """
+    Get the first page of Greek gods.
+    
+    Args:
+        limit: Maximum number of records in the page
+        
+    Returns:
+        Dictionary with the page's "items" and the "next_cursor" to pass to
+        gods://page/{limit}/{cursor}, or None on the last page
+    """
+    return paginate_gods(limit)
+
+
+# Each page of a walk is read once, so caching them would only evict responses that get reused
+@cached_json_resource("gods://page/{limit}/{cursor}", get_gods_version, cache=None)
+def get_greek_gods_page(limit: int, cursor: str) -> Dict[str, Any]:
+    """
+    Get the page of Greek gods starting at a cursor.
+    
+    Args:
+        limit: Maximum number of records in the page
+        cursor: The next_cursor returned with the previous page
+        
+    Returns:
+        Dictionary with the page's "items" and the "next_cursor", or None on the last page
+    """
+    return paginate_gods(limit, decode_cursor(cursor))
+
+
+@mcp.resource("gods://name/{name}")
+def get_greek_god_by_name(name: str) -> Dict[str, str]:
+    """
+    Get information about a single Greek god by name.
+    
+    Args:
+        name: The god's Greek name, case-insensitive
+        
+    Returns:
+        Dictionary containing information about the god
+    """
+    god = gods_table().find_by_name(name)
+    if god is None:
+        raise ValueError(f"Unknown Greek god: {name}")
+    return god
+
+
+@mcp.resource("gods://roman/{roman_name}")
+def get_greek_god_by_roman_name(roman_name: str) -> Dict[str, str]:
+    """
+    Get information about a Greek god by the name of its Roman counterpart.
+    
+    Args:
+        roman_name: The Roman name, case-insensitive
+        
+    Returns:
+        Dictionary containing information about the god
+    """
+    god = gods_table().find_by_roman_name(roman_name)
+    if god is None:
+        raise ValueError(f"Unknown Roman god: {roman_name}")
+    return god
+
+
+@mcp.resource("gods://domain/{keyword}")
+def get_greek_gods_by_domain(keyword: str) -> List[Dict[str, str]]:
+    """
+    Get information about all Greek gods whose domain mentions a keyword.
+    
+    Args:
+        keyword: A word of the domain, e.g. "war" or "sea", case-insensitive
+        
+    Returns:
+        List of dictionaries containing information about Greek gods
+    """
+    return gods_table().find_by_domain(keyword)
+
+
+# Cache for seeded ancientlatin:// reads, configured through the environment
+latin_cache = ResultCache(
+    max_entries=int(os.environ.get("MCP_LATIN_CACHE_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.environ.get("MCP_LATIN_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+    ttl=float(os.environ["MCP_LATIN_CACHE_TTL"]) if os.environ.get("MCP_LATIN_CACHE_TTL") else None,
+)
+
+
+# Also add a resource version of the ancient Latin text transformation
+@mcp.resource("ancientlatin://{text}")
+def get_ancient_latin_text(text: str) -> str:
+    """
+    Get text transformed to appear as if written in ancient Latin.
+    
+    This resource applies the same transformations as the ancient_latin_text tool
+    but is accessed as a resource rather than a tool.
+    
+    Args:
+        text: The URL-encoded text to transform
+        
+    Returns:
+        Text transformed to resemble ancient Latin
+    """
+    return ancient_latin_text(unquote(text))
+
+
+@mcp.resource("ancientlatin://{text}/{seed}")
+def get_seeded_ancient_latin_text(text: str, seed: int) -> str:
+    """
+    Get text transformed to ancient Latin, reproducibly for a given seed.
+    
+    Unlike ancientlatin://{text}, the same URI always yields the same content,
+    so results are served from latin_cache when available.
+    
+    Args:
+        text: The URL-encoded text to transform
+        seed: Seed for the random transformations
+        
+    Returns:
+        Text transformed to resemble ancient Latin
+    """
+    text = unquote(text)
+    key = (text, seed)
+    result: Optional[str] = latin_cache.get(key)
+    if result is None:
+        result = ancient_latin_text(text, seed=seed)
+        latin_cache.put(key, result)
+    
+    return result
+
+
+@mcp.resource("cache://ancientlatin")
+def get_latin_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit, miss and eviction counters of the ancientlatin:// result cache.
+    
+    Returns:
+        Dictionary of cache counters, sizes and limits
+    """
+    return latin_cache.stats()
+
+
+# === PROMPTS ===
+MCP_EXPERT_BASE_PROMPT = """\
+You are an MCP (Model Control Protocol) expert assistant. Your goal is to provide accurate, 
+helpful information about the MCP protocol, its components, and how to use it effectively.
+
+The MCP protocol consists of three main components:
+1. Tools: Model-controlled functions that allow AI models to take actions
+2. Resources: Application-controlled data that models can access but not modify
+3. Prompts: User-controlled templates for AI interactions
+
+When answering questions about MCP, focus on:
+- Explaining concepts clearly with examples
+- Providing practical implementation advice
+- Suggesting best practices for MCP architecture
+- Helping troubleshoot common issues
+
+Remember that MCP is designed to create safer, more controllable AI systems by clearly 
+defining the boundaries between model control, application control, and user control."""
+
+
+class TemplateRegistry:
+    """
+    Directory of text templates, one ``<name><suffix>`` file per template.
+    
+    Nothing is read at startup: the directory is listed on first use and each
+    template is read the first time it is requested. At most once every
+    ``check_interval`` seconds, lookups check whether the directory or any
+    loaded file changed, relisting and rereading them as needed, so templates
+    can be added or edited without restarting the server.
+    """
+
+    def __init__(
+        self, directory: Union[str, Path], suffix: str = ".txt", check_interval: float = 1.0
+    ) -> None:
+        """
+        Initialize the registry.
+        
+        Args:
+            directory: Directory containing the template files
+            suffix: File name suffix of templates
+            check_interval: Minimum number of seconds between checks for changes
+        """
+        self.directory = Path(directory)
+        self.suffix = suffix
+        self.check_interval = check_interval
+        # Lower-case template names to files, listed on first use
+        self._paths: Optional[Dict[str, Path]] = None
+        self._directory_stamp: Optional[int] = None
+        # Loaded templates with the (mtime, size) of the file they were read from
+        self._templates: Dict[str, Tuple[Optional[Tuple[int, int]], str]] = {}
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+        """Return the modification time and size of a file, or None if it is gone."""
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _refresh(self) -> Dict[str, Path]:
+        """Return the template files by name, relisting and dropping stale templates if due."""
+        now = time.monotonic()
+        if self._paths is not None and now - self._checked_at < self.check_interval:
+            return self._paths
+        self._checked_at = now
+        
+        try:
+            directory_stamp: Optional[int] = self.directory.stat().st_mtime_ns
+        except OSError:
+            directory_stamp = None
+        paths = self._paths
+        if paths is None or directory_stamp != self._directory_stamp:
+            self._directory_stamp = directory_stamp
+            paths = self._paths = {}
+            if directory_stamp is not None:
+                for path in self.directory.glob(f"*{self.suffix}"):
+                    paths[path.name[:-len(self.suffix)].lower()] = path
+        
+        for name, (stamp, _) in list(self._templates.items()):
+            cached_path = paths.get(name)
+            if cached_path is None or self._stamp(cached_path) != stamp:
+                del self._templates[name]
+        return paths
+    
+    def get(self, name: str) -> Optional[str]:
+        """
+        Look up a template by case-insensitive name.
+        
+        Args:
+            name: The template name
+            
+        Returns:
+            The template text without surrounding whitespace, or None if there is no such template
+        """
+        name = name.lower()
+        with self._lock:
+            paths = self._refresh()
+            entry = self._templates.get(name)
+            if entry is not None:
+                return entry[1]
+            
+            path = paths.get(name)
+            if path is None:
+                return None
+            stamp = self._stamp(path)
+            try:
+                text = path.read_text(encoding="utf-8").strip()
+            except OSError:
+                return None
+            self._templates[name] = (stamp, text)
+            return text
+    
+    def names(self) -> List[str]:
+        """
+        List the available templates.
+        
+        Returns:
+            The sorted template names
+        """
+        with self._lock:
+            return sorted(self._refresh())
+    
+    def reload(self) -> None:
+        """Forget all loaded templates and relist the directory on the next lookup."""
+        with self._lock:
+            self._paths = None
+            self._templates.clear()
+            self._checked_at = float("-inf")
+
+
+# Extra system prompt text for each mcp_expert topic, one file per topic
+PROMPT_TEMPLATES_DIR = Path(
+    os.environ.get("MCP_PROMPT_TEMPLATES_DIR", Path(__file__).resolve().parent / "prompt_templates")
+)
+mcp_expert_topics = TemplateRegistry(
+    PROMPT_TEMPLATES_DIR / "mcp_expert",
+    check_interval=float(os.environ.get("MCP_PROMPT_RELOAD_INTERVAL", "1.0")),
+)
+
+
+def prompt_messages(instructions: str, request: str) -> List[Message]:
+    """
+    Build the messages of a prompt from its instructions and request.
+    
+    MCP prompt messages have no system role, so the instructions are sent as
+    the first user message and the request as the last one. Clients may pass
+    every message before the last to their model as the system prompt.
+    
+    Args:
+        instructions: Instructions for the model, i.e. the system prompt
+        request: The actual request
+        
+    Returns:
+        The prompt messages in MCP format
+    """
+    return [UserMessage(instructions), UserMessage(request)]
+
+
+def render_mcp_expert_prompt(
+    topic: Optional[str] = None, topic_content: Optional[str] = None
+) -> List[Message]:
+    """
+    Build the mcp_expert prompt messages for a topic.
+    
+    Args:
+        topic: Optional specific MCP topic to focus on
+        topic_content: Optional extra system prompt text about the topic
+        
+    Returns:
+        The prompt messages in MCP format
+    """
+    system_text = MCP_EXPERT_BASE_PROMPT
+    if topic_content:
+        system_text += "\n" + topic_content
+    
+    request = "Please tell me about " + (topic if topic else "MCP in general")
+    return prompt_messages(system_text, request)
+
+
+# Rendered prompts by topic, with the topic text they were rendered from; shared, so never modified
+mcp_expert_prompts = ResultCache(max_entries=1024)
+
+
+# Updated to follow MCP prompt specification
+@mcp.prompt("mcp_expert")
+def get_mcp_expert_prompt(topic: Optional[str] = None) -> List[Message]:
+    """
+    Get a prompt template for answering questions about MCP.
+    
+    This prompt helps guide AI models to provide accurate and helpful
+    information about the Model Control Protocol. Topic texts come from
+    the mcp_expert_topics registry, and rendered prompts are reused until
+    their topic text changes.
+    
+    Args:
+        topic: Optional specific MCP topic to focus on
+        
+    Returns:
+        The prompt messages in MCP format
+    """
+    topic_content = mcp_expert_topics.get(topic) if topic else None
+    cached = mcp_expert_prompts.get(topic)
+    if cached is not None and cached[0] is topic_content:
+        cached_prompt: List[Message] = cached[1]
+        return cached_prompt
+    
+    prompt = render_mcp_expert_prompt(topic, topic_content)
+    mcp_expert_prompts.put(topic, (topic_content, prompt))
+    return prompt
+
+
+@mcp.prompt("code_review")
+def get_code_review_prompt(code: str, language: Optional[str] = "python") -> List[Message]:
+    """
+    Get a prompt template for code review.
+    
+    This prompt helps guide AI models to provide helpful code reviews.
+    
+    Args:
+        code: The code to review
+        language: The programming language of the code
+        
+    Returns:
+        The prompt messages in MCP format
+    """
+    return prompt_messages(
+        f"You are an expert {language} developer. "
+        "Your task is to review code and provide constructive feedback.",
+        f"Please review this {language} code and suggest improvements:\n\n"
+        f"```{language}\n{code}\n```",
+    )
+
+
+@mcp.prompt("git_commit")
+def get_git_commit_prompt(changes: str) -> List[Message]:
+    """
+    Get a prompt template for generating Git commit messages.
+    
+    This prompt helps guide AI models to write clear and concise commit messages.
+    
+    Args:
+        changes: Git diff or description of changes
+        
+    Returns:
+        The prompt messages in MCP format
+    """
+    return prompt_messages(
+        "You are an expert at writing clear, concise, and informative Git commit messages.",
+        f"Generate a commit message for these changes:\n\n{changes}",
+    )
+
+
+# Dynamic greeting resource (from original example)
+@mcp.resource("greeting://{name}")
+def get_greeting(name: str) -> str:
+    """
+    Get a personalized greeting for the given name.
+    
+    Args:
+        name: The name to include in the greeting
+        
+    Returns:
+        A personalized greeting message
+    """
+    return f"Hello, {name}!"
+
+
+# === METRICS ===
+class LatencyHistogram:
+    """
+    Latency histogram with logarithmic buckets in the style of HdrHistogram.
+    
+    Latencies are recorded in whole microseconds into buckets that split every
+    power of two into ``SUB_BUCKETS`` equal parts, so percentiles are accurate
+    to within about 6% at any scale while recording stays a few integer
+    operations and a list index.
+    """
+
+    SUB_BUCKET_BITS = 4
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.counts: List[int] = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    @classmethod
+    def bucket_index(cls, micros: int) -> int:
+        """
+        Get the bucket of a latency.
+        
+        Args:
+            micros: The latency in microseconds
+        
+        Returns:
+            Index of the bucket covering the latency
+        """
+        if micros < cls.SUB_BUCKETS:
+            return micros
+        shift = micros.bit_length() - 1 - cls.SUB_BUCKET_BITS
+        return shift * cls.SUB_BUCKETS + (micros >> shift)
+    
+    @classmethod
+    def bucket_limit(cls, index: int) -> int:
+        """
+        Get the highest latency in a bucket.
+        
+        Args:
+            index: The bucket index
+        
+        Returns:
+            The highest latency in microseconds that falls into the bucket
+        """
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        return ((index - shift * cls.SUB_BUCKETS + 1) << shift) - 1
+    
+    def record(self, seconds: float) -> None:
+        """
+        Record one latency.
+        
+        Args:
+            seconds: The latency in seconds
+        """
+        index = self.bucket_index(int(seconds * 1_000_000))
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+    
+    def percentile(self, percent: float) -> float:
+        """
+        Get the latency below which ``percent`` percent of the recorded latencies fall.
+        
+        Args:
+            percent: The percentile, between 0 and 100
+        
+        Returns:
+            The latency in seconds, or 0.0 if nothing was recorded
+        """
+        if not self.count:
+            return 0.0
+        
+        rank = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_limit(index) / 1_000_000, self.max)
+        return self.max
+
+
+class HandlerMetrics:
+    """Call, error and response size counters and the latency histogram of one handler."""
+    
+    def __init__(self) -> None:
+        """Initialize zeroed metrics."""
+        self.calls = 0
+        self.errors = 0
+        self.response_chars = 0
+        self.latency = LatencyHistogram()
+
+
+class ServerMetrics:
+    """
+    Thread-safe registry of the metrics of every tool, resource and prompt handler.
+    
+    Handlers are identified by their kind and name. Resources are named by
+    their URI template rather than the requested URI, so the number of
+    tracked handlers stays bounded however many distinct URIs clients read.
+    """
+
+    QUANTILES = (50, 95, 99)
+    
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._handlers: Dict[Tuple[str, str], HandlerMetrics] = {}
+        self._lock = threading.Lock()
+    
+    def record(
+        self, kind: str, name: str, seconds: float, error: bool = False, response_chars: int = 0
+    ) -> None:
+        """
+        Record one handled request.
+        
+        Args:
+            kind: The handler kind, "tool", "resource" or "prompt"
+            name: The tool or prompt name, or the resource URI template
+            seconds: How long the handler took
+            error: Whether the handler failed
+            response_chars: Size of the text and binary content of the response
+        """
+        with self._lock:
+            metrics = self._handlers.get((kind, name))
+            if metrics is None:
+                metrics = self._handlers[(kind, name)] = HandlerMetrics()
+            metrics.calls += 1
+            metrics.errors += error
+            metrics.response_chars += response_chars
+            metrics.latency.record(seconds)
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Get the metrics of every handler called so far.
+        
+        Returns:
+            One entry per handler with its counters and latency percentiles in milliseconds
+        """
+        with self._lock:
+            handlers = []
+            for (kind, name), metrics in sorted(self._handlers.items()):
+                latency = metrics.latency
+                latency_ms = {
+                    f"p{quantile}": round(latency.percentile(quantile) * 1000, 3)
+                    for quantile in self.QUANTILES
+                }
+                latency_ms["mean"] = round(latency.total / latency.count * 1000, 3)
+                latency_ms["max"] = round(latency.max * 1000, 3)
+                handlers.append({
+                    "kind": kind,
+                    "name": name,
+                    "calls": metrics.calls,
+                    "errors": metrics.errors,
+                    "response_chars": metrics.response_chars,
+                    "latency_ms": latency_ms,
+                })
+            return handlers
+    
+    def prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        
+        Returns:
+            Counters per handler and a latency summary with p50, p95 and p99 quantiles
+        """
+        def labels(kind: str, name: str, **extra: str) -> str:
+            pairs = {"kind": kind, "name": name, **extra}
+            return "{" + ",".join(
+                f'{key}="{escape_label(value)}"' for key, value in pairs.items()
+            ) + "}"
+        
+        counters = (
+            ("mcp_handler_calls_total", "Requests handled.", "calls"),
+            ("mcp_handler_errors_total", "Requests that failed.", "errors"),
+            (
+                "mcp_handler_response_chars_total",
+                "Characters of content returned.",
+                "response_chars",
+            ),
+        )
+        with self._lock:
+            handlers = sorted(self._handlers.items())
+            lines = []
+            for metric, help_text, attribute in counters:
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for (kind, name), metrics in handlers:
+                    lines.append(f"{metric}{labels(kind, name)} {getattr(metrics, attribute)}")
+            
+            lines.append("# HELP mcp_handler_latency_seconds Time spent handling requests.")
+            lines.append("# TYPE mcp_handler_latency_seconds summary")
+            for (kind, name), metrics in handlers:
+                latency = metrics.latency
+                for quantile in self.QUANTILES:
+                    quantile_labels = labels(kind, name, quantile=str(quantile / 100))
+                    value = latency.percentile(quantile)
+                    lines.append(f"mcp_handler_latency_seconds{quantile_labels} {value:.6f}")
+                handler_labels = labels(kind, name)
+                lines.append(f"mcp_handler_latency_seconds_sum{handler_labels} {latency.total:.6f}")
+                lines.append(f"mcp_handler_latency_seconds_count{handler_labels} {latency.count}")
+        return "\n".join(lines) + "\n"
+    
+    def reset(self) -> None:
+        """Forget all recorded metrics."""
+        with self._lock:
+            self._handlers.clear()
+
+
+server_metrics = ServerMetrics()
+
+
+def escape_label(value: str) -> str:
+    """
+    Escape a Prometheus label value.
+    
+    Args:
+        value: The raw label value
+    
+    Returns:
+        The value with backslashes, double quotes and newlines escaped
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def response_chars(result: Any) -> int:
+    """
+    Measure the size of a tool, resource or prompt result.
+    
+    Args:
+        result: A CallToolResult, ReadResourceResult or GetPromptResult
+    
+    Returns:
+        Total length of the text and base64 blob content in the result
+    """
+    blocks: Iterable[Any]
+    if isinstance(result, CallToolResult):
+        blocks = result.content
+    elif isinstance(result, ReadResourceResult):
+        blocks = result.contents
+    elif isinstance(result, GetPromptResult):
+        blocks = [message.content for message in result.messages]
+    else:
+        return 0
+    return sum(
+        len(getattr(block, "text", None) or getattr(block, "blob", None) or "") for block in blocks
+    )
+
+
+class HandlerNames:
+    """
+    Bounded handler names for metrics labels, read through FastMCP's public listing API.
+    
+    Only registered tool and prompt names, static resource URIs and URI templates are
+    kept, never the names or URIs clients request, so a client cannot grow the label
+    set or the memory behind it. The lists are read again when a request names
+    something unknown, at most once per ``REFRESH_SECONDS``, to pick up handlers added
+    after startup.
+    """
+    
+    REFRESH_SECONDS = 1.0
+    
+    def __init__(self) -> None:
+        self.tools: FrozenSet[str] = frozenset()
+        self.prompts: FrozenSet[str] = frozenset()
+        self.resources: FrozenSet[str] = frozenset()
+        self.templates: Tuple[Tuple[str, "re.Pattern[str]"], ...] = ()
+        self._refreshed = -math.inf
+    
+    async def refresh(self) -> None:
+        """Read the registered handlers again, unless they were read moments ago."""
+        now = time.monotonic()
+        if now - self._refreshed < self.REFRESH_SECONDS:
+            return
+        self._refreshed = now
+        self.tools = frozenset(tool.name for tool in await mcp.list_tools())
+        self.prompts = frozenset(prompt.name for prompt in await mcp.list_prompts())
+        self.resources = frozenset(str(resource.uri) for resource in await mcp.list_resources())
+        self.templates = tuple(
+            (template.uriTemplate, self.template_pattern(template.uriTemplate))
+            for template in await mcp.list_resource_templates()
+        )
+    
+    @staticmethod
+    def template_pattern(uri_template: str) -> "re.Pattern[str]":
+        """
+        Compile a URI template into a pattern matching the URIs it serves.
+        
+        Args:
+            uri_template: A template such as "greeting://{name}"
+        
+        Returns:
+            A pattern matching each parameter against one or more characters other than "/"
+        """
+        return re.compile(re.sub(r"\\\{(\w+)\\\}", r"(?P<\1>[^/]+)", re.escape(uri_template)))
+    
+    def match(self, kind: str, request: Any) -> Optional[str]:
+        """
+        Find the registered handler serving a request.
+        
+        Args:
+            kind: The handler kind, "tool", "resource" or "prompt"
+            request: The request to label
+        
+        Returns:
+            The tool or prompt name, the static resource URI or the URI template, or None
+        """
+        if kind != "resource":
+            names = self.tools if kind == "tool" else self.prompts
+            name: str = request.params.name
+            return name if name in names else None
+        
+        uri = str(request.params.uri)
+        if uri in self.resources:
+            return uri
+        for uri_template, pattern in self.templates:
+            if pattern.fullmatch(uri):
+                return uri_template
+        return None
+    
+    async def label(self, kind: str, request: Any) -> str:
+        """
+        Name the handler serving a request.
+        
+        Args:
+            kind: The handler kind, "tool", "resource" or "prompt"
+            request: The request to label
+        
+        Returns:
+            The name of the registered handler, or "unknown"
+        """
+        name = self.match(kind, request)
+        if name is None:
+            await self.refresh()
+            name = self.match(kind, request)
+        return name or "unknown"
+
+
+handler_names = HandlerNames()
+
+# The handler kind each instrumented request type is recorded under
+HANDLER_KINDS: Dict[type, str] = {
+    CallToolRequest: "tool",
+    ReadResourceRequest: "resource",
+    GetPromptRequest: "prompt",
+}
+
+
+def instrument_handler(
+    kind: str, handler: Callable[[Any], Awaitable[Any]]
+) -> Callable[[Any], Awaitable[Any]]:
+    """
+    Wrap a request handler to record its metrics in ``server_metrics``.
+    
+    Args:
+        kind: The handler kind to record
+        handler: The request handler to wrap
+    
+    Returns:
+        The instrumented handler
+    """
+    @functools.wraps(handler)
+    async def instrumented(request: Any) -> Any:
+        name = await handler_names.label(kind, request)
+        start = time.perf_counter()
+        try:
+            result = await handler(request)
+        except Exception:
+            server_metrics.record(kind, name, time.perf_counter() - start, error=True)
+            raise
+        
+        elapsed = time.perf_counter() - start
+        root = result.root
+        error = bool(getattr(root, "isError", False))
+        server_metrics.record(kind, name, elapsed, error, response_chars(root))
+        return result
+    
+    return instrumented
+
+
+def fastmcp_request_handlers() -> Optional[Dict[type, Callable[[Any], Awaitable[Any]]]]:
+    """
+    Get the request handler table of the low-level server behind ``mcp``.
+    
+    FastMCP has no public hook around its request handlers, so this is the one place
+    the server reaches into FastMCP internals. The layout is that of mcp 1.x, where
+    FastMCP registers its handlers with the low-level server as it is created; on any
+    other major version, or if the table is missing, metrics are left off with a
+    warning rather than failing at import.
+    
+    Returns:
+        The handler table keyed by request type, or None if it cannot be used safely
+    """
+    version = importlib.metadata.version("mcp")
+    low_level_server = getattr(mcp, "_mcp_server", None)
+    handlers = getattr(low_level_server, "request_handlers", None)
+    if (
+        version.split(".")[0] != "1"
+        or not isinstance(handlers, dict)
+        or not all(request_type in handlers for request_type in HANDLER_KINDS)
+    ):
+        logging.warning("Handler metrics are disabled: unsupported mcp version %s", version)
+        return None
+    return handlers
+
+
+def instrument_server() -> None:
+    """Record metrics of every tool call, resource read and prompt request served by ``mcp``."""
+    handlers = fastmcp_request_handlers()
+    if handlers is None:
+        return
+    for request_type, kind in HANDLER_KINDS.items():
+        handlers[request_type] = instrument_handler(kind, handlers[request_type])
+
+
+instrument_server()
+
+
+@mcp.resource("metrics://server")
+def get_server_metrics() -> List[Dict[str, Any]]:
+    """
+    Get call counts, error counts, response sizes and latency percentiles of every handler.
+    
+    With --workers, each worker process keeps its own metrics.
+    
+    Returns:
+        One entry per tool, resource template and prompt called so far
+    """
+    return server_metrics.snapshot()
+
+
+async def prometheus_metrics(request: Any) -> Any:
+    """
+    Serve ``server_metrics`` in the Prometheus text format.
+    
+    Args:
+        request: The Starlette request
+    
+    Returns:
+        The plain text response
+    """
+    from starlette.responses import PlainTextResponse
+    
+    return PlainTextResponse(server_metrics.prometheus(), media_type="text/plain; version=0.0.4")
+
+
+# === PROFILING ===
+PROFILE_MODES = ("sampling", "deterministic")
+PROFILE_MAX_DURATION = 300.0
+
+
+class StackSampler:
+    """
+    Statistical profiler sampling the stack of every thread at a fixed interval.
+    
+    Samples are taken by a background thread through ``sys._current_frames``,
+    so the profiled code is not instrumented and runs at close to full speed.
+    Stacks are aggregated in the collapsed format used by flame graph tools:
+    the thread name followed by the frames from the root to the leaf.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """
+        Initialize the sampler.
+        
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.samples = 0
+        self.stacks: Dict[Tuple[str, ...], int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampling thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+    
+    def _run(self) -> None:
+        """Take samples until stopped."""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, innermost in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                frame: Optional[FrameType] = innermost
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                key = (names.get(ident, str(ident)), *reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+    
+    def top(self, n: int) -> List[Dict[str, Any]]:
+        """
+        Get the functions most often found running.
+        
+        Args:
+            n: Number of functions to return
+        
+        Returns:
+            Functions by descending samples in which they were the innermost frame
+        """
+        own: Dict[str, int] = {}
+        total: Dict[str, int] = {}
+        for stack, count in self.stacks.items():
+            frames = stack[1:]
+            if frames:
+                own[frames[-1]] = own.get(frames[-1], 0) + count
+            for function in set(frames):
+                total[function] = total.get(function, 0) + count
+        
+        functions = sorted(
+            total, key=lambda function: (own.get(function, 0), total[function]), reverse=True
+        )
+        return [
+            {
+                "function": function,
+                "self_samples": own.get(function, 0),
+                "total_samples": total[function],
+            }
+            for function in functions[:n]
+        ]
+    
+    def collapsed(self) -> str:
+        """
+        Render the samples as collapsed stacks.
+        
+        Returns:
+            One ``thread;outer;...;inner count`` line per distinct stack
+        """
+        return "\n".join(
+            f"{';'.join(stack)} {count}" for stack, count in sorted(self.stacks.items())
+        )
+
+
+def top_profiled_functions(
+    stats: Dict[Tuple[str, int, str], Tuple[Any, ...]], n: int
+) -> List[Dict[str, Any]]:
+    """
+    Get the functions that spent the most time in their own code in a deterministic profile.
+    
+    Args:
+        stats: The profile statistics in the pstats format, by (filename, line, function)
+        n: Number of functions to return
+    
+    Returns:
+        Functions by descending time spent in their own code
+    """
+    rows = sorted(stats.items(), key=lambda row: row[1][2], reverse=True)
+    return [
+        {
+            "function": f"{name} ({filename}:{line})",
+            "calls": calls,
+            "self_seconds": round(own_time, 6),
+            "total_seconds": round(total_time, 6),
+        }
+        for (filename, line, name), (_, calls, own_time, total_time, _) in rows[:n]
+    ]
+
+
+# Only one profile can run at a time
+_profile_lock = threading.Lock()
+
+
+async def profile_server(
+    duration: float = 5.0, mode: str = "sampling", top: int = 20, interval_ms: float = 5.0
+) -> Dict[str, Any]:
+    """
+    Profile the running server for a while, then report where its time went.
+    
+    Requests keep being served while profiling. Sampling mode periodically
+    records the stack of every thread and returns collapsed stacks for flame
+    graph tools. Deterministic mode traces every call on the event loop thread
+    with cProfile and returns the statistics in the pstats file format,
+    base64 encoded. Work in the process pool is not covered by either mode.
+    
+    Args:
+        duration: Seconds to profile for
+        mode: "sampling" or "deterministic"
+        top: Number of hottest functions to list
+        interval_ms: Milliseconds between samples in sampling mode
+    
+    Returns:
+        The hottest functions and the full profile
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(
+            f"Unknown profiling mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}"
+        )
+    if not 0 < duration <= PROFILE_MAX_DURATION:
+        raise ValueError(f"duration must be between 0 and {PROFILE_MAX_DURATION:g} seconds")
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    
+    try:
+        if mode == "deterministic":
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                await asyncio.sleep(duration)
+            finally:
+                profile.disable()
+            profile.create_stats()
+            stats = profile.stats
+            return {
+                "mode": mode,
+                "duration": duration,
+                "functions": top_profiled_functions(stats, top),
+                "pstats": base64.b64encode(marshal.dumps(stats)).decode("ascii"),
+            }
+        
+        sampler = StackSampler(interval_ms / 1000)
+        sampler.start()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            sampler.stop()
+        return {
+            "mode": mode,
+            "duration": duration,
+            "samples": sampler.samples,
+            "functions": sampler.top(top),
+            "collapsed": sampler.collapsed(),
+        }
+    finally:
+        _profile_lock.release()
+
+
+def enable_profiler() -> None:
+    """
+    Register the profile_server tool, which is left out unless --enable-profiler is given.
+    
+    Called once by each process serving ``mcp``: by main, or by every worker with --workers.
+    """
+    mcp.add_tool(profile_server)
+
+
+# === TRANSPORTS ===
+TRANSPORTS = ("stdio", "sse", "streamable-http")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """
+    Build the server command line argument parser.
+    
+    Returns:
+        The argument parser
+    """
+    parser = argparse.ArgumentParser(description="MCP Demo Server")
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default="stdio",
+        help="stdio serves one client over stdin/stdout; "
+        "sse and streamable-http serve many over HTTP",
+    )
+    parser.add_argument(
+        "--log-level", default="INFO", help="Log level, e.g. WARNING to skip per-request logs"
+    )
+    
+    http = parser.add_argument_group("HTTP transports")
+    http.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    http.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    http.add_argument(
+        "--stateless", action="store_true", help="Use a fresh session per streamable-http request"
+    )
+    http.add_argument(
+        "--json-response",
+        action="store_true",
+        help="Answer streamable-http requests with JSON instead of SSE streams",
+    )
+    http.add_argument(
+        "--backlog", type=int, default=2048, help="Maximum number of pending connections"
+    )
+    http.add_argument(
+        "--limit-concurrency",
+        type=int,
+        help="Reject requests with 503 beyond this many in progress",
+    )
+    http.add_argument(
+        "--timeout-keep-alive",
+        type=int,
+        default=5,
+        help="Seconds to keep idle connections open",
+    )
+    http.add_argument(
+        "--http",
+        choices=["auto", "h11", "httptools"],
+        default="auto",
+        help="HTTP protocol implementation",
+    )
+    http.add_argument(
+        "--loop",
+        choices=["auto", "asyncio", "uvloop"],
+        default="auto",
+        help="Event loop implementation",
+    )
+    http.add_argument(
+        "--metrics-path",
+        help="Also serve handler metrics in the Prometheus text format at this path, e.g. /metrics",
+    )
+    
+    workers = parser.add_argument_group("Worker processes")
+    workers.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Serve streamable-http from this many worker processes; "
+        "implies --stateless and --json-response",
+    )
+    workers.add_argument(
+        "--reuse-port",
+        action="store_true",
+        help="Give each worker its own SO_REUSEPORT socket instead of sharing one listening socket",
+    )
+    
+    admin = parser.add_argument_group("Administration")
+    admin.add_argument(
+        "--enable-profiler",
+        action="store_true",
+        default=os.environ.get("MCP_ENABLE_PROFILER", "").lower() in ("1", "true", "yes"),
+        help="Offer the profile_server tool, which profiles the live server on request "
+        "(also MCP_ENABLE_PROFILER=1)",
+    )
+    return parser
+
+
+# Paths prometheus_metrics is already routed at, so apps created again do not repeat the route
+metrics_paths: Set[str] = set()
+
+
+def create_http_app(args: argparse.Namespace) -> Any:
+    """
+    Create the ASGI application serving ``mcp`` over an HTTP transport.
+    
+    Args:
+        args: Parsed server command line arguments
+        
+    Returns:
+        The Starlette application
+    """
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    mcp.settings.stateless_http = args.stateless
+    mcp.settings.json_response = args.json_response
+    if args.metrics_path and args.metrics_path not in metrics_paths:
+        route = mcp.custom_route(args.metrics_path, methods=["GET"], include_in_schema=False)
+        route(prometheus_metrics)
+        metrics_paths.add(args.metrics_path)
+    if args.transport == "sse":
+        return mcp.sse_app()
+    return mcp.streamable_http_app()
+
+
+def run_http(
+    args: argparse.Namespace, app: Any = None, sockets: Optional[List[socket.socket]] = None
+) -> None:
+    """
+    Serve ``mcp`` to many concurrent clients over HTTP with uvicorn.
+    
+    Args:
+        args: Parsed server command line arguments
+        app: Optional ASGI application to serve instead of a new one from create_http_app
+        sockets: Optional already bound sockets to accept connections from
+    """
+    # Imported here so stdio servers do not pay for loading the HTTP stack
+    import uvicorn
+    
+    config = uvicorn.Config(
+        app or create_http_app(args),
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level.lower(),
+        access_log=logging.getLogger().isEnabledFor(logging.INFO),
+        backlog=args.backlog,
+        limit_concurrency=args.limit_concurrency,
+        timeout_keep_alive=args.timeout_keep_alive,
+        http=args.http,
+        loop=args.loop,
+    )
+    uvicorn.Server(config).run(sockets=sockets)
+
+
+# === WORKERS ===
+class WorkerStats:
+    """
+    Per-worker counters kept in shared memory, so any worker can report on all of them.
+    
+    Each worker slot holds the pid and start time of its current worker, the
+    number of HTTP requests handled in the slot and how often the slot's
+    worker has been replaced.
+    """
+
+    FIELDS = ("pid", "started", "requests", "restarts")
+
+    def __init__(self, workers: int) -> None:
+        """
+        Initialize zeroed counters.
+        
+        Args:
+            workers: Number of worker slots
+        """
+        self.workers = workers
+        self._values = multiprocessing.get_context("spawn").Array("q", workers * len(self.FIELDS))
+    
+    def _add(self, index: int, field: str, amount: int) -> None:
+        """Add to one counter of a worker slot."""
+        offset = index * len(self.FIELDS) + self.FIELDS.index(field)
+        with self._values.get_lock():
+            self._values[offset] += amount
+    
+    def worker_started(self, index: int) -> None:
+        """Record that the calling process now serves slot ``index``."""
+        offset = index * len(self.FIELDS)
+        with self._values.get_lock():
+            self._values[offset] = os.getpid()
+            self._values[offset + 1] = int(time.time())
+    
+    def record_request(self, index: int) -> None:
+        """Count a request handled by slot ``index``."""
+        self._add(index, "requests", 1)
+    
+    def record_restart(self, index: int) -> None:
+        """Count a restart of slot ``index``."""
+        self._add(index, "restarts", 1)
+    
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Get the counters of every worker.
+        
+        Returns:
+            One dictionary per worker slot, with its uptime in seconds
+        """
+        with self._values.get_lock():
+            values: List[int] = self._values[:]
+        now = int(time.time())
+        workers = []
+        for index in range(self.workers):
+            start = index * len(self.FIELDS)
+            worker = dict(zip(self.FIELDS, values[start:start + len(self.FIELDS)]))
+            worker["worker"] = index
+            started = worker.pop("started")
+            worker["uptime"] = now - started if worker["pid"] else 0
+            workers.append(worker)
+        return workers
+
+
+# Set in worker processes started by WorkerSupervisor
+WORKER_STATS: Optional[WorkerStats] = None
+
+
+@mcp.resource("server://workers")
+def get_worker_stats() -> List[Dict[str, Any]]:
+    """
+    Get the counters of every worker process.
+    
+    Returns:
+        One entry per worker, or an empty list when not running with --workers
+    """
+    return WORKER_STATS.snapshot() if WORKER_STATS is not None else []
+
+
+def bind_socket(host: str, port: int, backlog: int, reuse_port: bool = False) -> socket.socket:
+    """
+    Create a listening TCP socket.
+    
+    Args:
+        host: Address to listen on
+        port: Port to listen on
+        backlog: Maximum number of pending connections
+        reuse_port: Whether to let other sockets bind the same port with SO_REUSEPORT
+        
+    Returns:
+        The listening socket
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve_worker(
+    index: int, sock: Optional[socket.socket], args: argparse.Namespace, stats: WorkerStats
+) -> None:
+    """
+    Serve streamable HTTP in a worker process.
+    
+    Args:
+        index: The worker slot
+        sock: The shared listening socket, or None to bind an SO_REUSEPORT socket
+        args: Parsed server command line arguments
+        stats: The shared worker counters
+    """
+    global WORKER_STATS
+    
+    logging.getLogger().setLevel(args.log_level.upper())
+    WORKER_STATS = stats
+    stats.worker_started(index)
+    if args.enable_profiler:
+        enable_profiler()
+    if "MCP_TOOL_WORKERS" not in os.environ:
+        # Workers already spread load over the cores; keep their tool pools from
+        # oversubscribing them
+        executor.max_workers = max(1, (os.cpu_count() or 1) // args.workers)
+    if sock is None:
+        sock = bind_socket(args.host, args.port, args.backlog, reuse_port=True)
+    
+    app = create_http_app(args)
+    
+    async def counted_app(
+        scope: Dict[str, Any], receive: Callable[..., Any], send: Callable[..., Any]
+    ) -> None:
+        if scope["type"] == "http":
+            stats.record_request(index)
+        await app(scope, receive, send)
+    
+    executor.warm()
+    try:
+        run_http(args, counted_app, [sock])
+    finally:
+        executor.shutdown()
+
+
+class WorkerSupervisor:
+    """
+    Pre-fork master running streamable HTTP workers behind one listening port.
+    
+    Workers share nothing but the port: each runs its own event loop, session
+    manager and tool pools, so throughput grows with the number of cores.
+    By default the master binds one socket that all workers accept from;
+    with ``reuse_port`` each worker binds its own SO_REUSEPORT socket and the
+    kernel spreads connections between them.
+    
+    Crashed workers are replaced. SIGHUP replaces workers one at a time,
+    letting each finish its in-flight requests, and SIGINT or SIGTERM shuts
+    all of them down gracefully.
+    """
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        """
+        Initialize the supervisor.
+        
+        Args:
+            args: Parsed server command line arguments
+        """
+        self.args = args
+        self.stats = WorkerStats(args.workers)
+        self.processes: List[Any] = []
+        self.socket: Optional[socket.socket] = None
+        self._context = multiprocessing.get_context("spawn")
+        self._should_exit = threading.Event()
+        self._should_restart = False
+    
+    def _spawn(self, index: int) -> Any:
+        """Start the worker process for slot ``index``."""
+        process = self._context.Process(
+            target=serve_worker,
+            args=(index, self.socket, self.args, self.stats),
+            name=f"mcp-worker-{index}",
+        )
+        process.start()
+        return process
+    
+    def _stop(self, process: Any, timeout: float = 30.0) -> None:
+        """Ask a worker to shut down gracefully, killing it if it does not."""
+        process.terminate()
+        process.join(timeout)
+        if process.is_alive():
+            process.kill()
+            process.join()
+    
+    def _wait_started(self, index: int, pid: int, timeout: float = 30.0) -> None:
+        """Wait until the worker with ``pid`` has claimed slot ``index``."""
+        deadline = time.monotonic() + timeout
+        while self.stats.snapshot()[index]["pid"] != pid and time.monotonic() < deadline:
+            time.sleep(0.05)
+    
+    def restart(self) -> None:
+        """Replace every worker, one at a time, so the port keeps being served."""
+        for index, old in enumerate(self.processes):
+            new = self._spawn(index)
+            self._wait_started(index, new.pid)
+            self.processes[index] = new
+            self._stop(old)
+            self.stats.record_restart(index)
+    
+    def _handle_signal(self, signum: int, frame: Any) -> None:
+        """Turn signals into requests for the supervision loop."""
+        if signum == getattr(signal, "SIGHUP", None):
+            self._should_restart = True
+        else:
+            self._should_exit.set()
+    
+    def run(self) -> None:
+        """Start the workers and supervise them until asked to exit."""
+        for signum in (signal.SIGINT, signal.SIGTERM, getattr(signal, "SIGHUP", None)):
+            if signum is not None:
+                signal.signal(signum, self._handle_signal)
+        
+        if not self.args.reuse_port:
+            self.socket = bind_socket(self.args.host, self.args.port, self.args.backlog)
+        self.processes = [self._spawn(index) for index in range(self.args.workers)]
+        try:
+            while not self._should_exit.wait(0.5):
+                if self._should_restart:
+                    self._should_restart = False
+                    self.restart()
+                for index, process in enumerate(self.processes):
+                    if not process.is_alive():
+                        logging.warning(
+                            "Worker %d (pid %s) exited with %s; restarting",
+                            index,
+                            process.pid,
+                            process.exitcode,
+                        )
+                        self.processes[index] = self._spawn(index)
+                        self.stats.record_restart(index)
+        finally:
+            for process in self.processes:
+                process.terminate()
+            for process in self.processes:
+                self._stop(process)
+            if self.socket is not None:
+                self.socket.close()
+
+
+def detach_stdio() -> None:
+    """
+    Keep the stdio transport from being inherited by child processes.
+    
+    The transport moves to private copies of stdin and stdout, and file
+    descriptors 0 and 1 are pointed at the null device. Otherwise the process
+    pool workers and multiprocessing's resource tracker would hold the
+    transport open, and the client would not see the server exit when it dies.
+    """
+    sys.stdin = open(os.dup(0), encoding=sys.stdin.encoding, errors=sys.stdin.errors)
+    sys.stdout = open(
+        os.dup(1), "w", encoding=sys.stdout.encoding, errors=sys.stdout.errors, buffering=1
+    )
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Run the MCP Demo Server.
+    
+    Args:
+        argv: Command line arguments; defaults to ``sys.argv[1:]``
+    """
+    args = build_arg_parser().parse_args(argv)
+    logging.getLogger().setLevel(args.log_level.upper())
+    if args.workers > 1:
+        if args.transport != "streamable-http":
+            raise SystemExit("--workers requires --transport streamable-http")
+        # Sessions live in one worker's memory, so requests must not depend on them, and
+        # plain JSON responses, unlike SSE streams, are completed when a worker shuts down
+        args.stateless = True
+        args.json_response = True
+        WorkerSupervisor(args).run()
+        return
+    
+    if args.enable_profiler:
+        enable_profiler()
+    if args.transport == "stdio":
+        detach_stdio()
+    executor.warm()
+    try:
+        if args.transport == "stdio":
+            mcp.run()
+        else:
+            run_http(args)
+    finally:
+        executor.shutdown()
 
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    main()
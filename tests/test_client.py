@@ -2,10 +2,44 @@
 # tests/test_client.py
 """Tests for the MCP client implementation."""
 
+import asyncio
+import io
+import json
+import os
+import signal
+import tempfile
+import threading
+import time
 import unittest
-from unittest.mock import MagicMock, patch
+from contextlib import asynccontextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from client import MCPDemoClient, OllamaClient
+import anyio
+from mcp import types
+
+from client import (
+    AsyncOllamaClient,
+    LLMResponseCache,
+    MCPDemoClient,
+    OllamaClient,
+    SessionPool,
+    TracedSession,
+    Tracer,
+    build_parser,
+    run_shell,
+)
+
+SERVER_PATH = str(Path(__file__).resolve().parent.parent / "server.py")
+
+
+def prompt_result(*texts):
+    """Build a prompt result with one user message per text."""
+    return types.GetPromptResult(messages=[
+        types.PromptMessage(role="user", content=types.TextContent(type="text", text=text))
+        for text in texts
+    ])
 
 
 class TestOllamaClient(unittest.TestCase):
@@ -14,8 +48,8 @@ class TestOllamaClient(unittest.TestCase):
     def setUp(self):
         """Set up test fixtures."""
         self.ollama = OllamaClient("http://test-ollama:11434", "test-model")
-        # Mock the requests.post method
-        self.post_patcher = patch("requests.post")
+        # Mock the pooled session's post method
+        self.post_patcher = patch("requests.Session.post")
         self.mock_post = self.post_patcher.start()
         
     def tearDown(self):
@@ -32,7 +66,7 @@ class TestOllamaClient(unittest.TestCase):
         # Call the method
         result = self.ollama.generate("Test prompt", "System message")
         
-        # Check that requests.post was called correctly
+        # Check that the session's post was called correctly
         self.mock_post.assert_called_once()
         args, kwargs = self.mock_post.call_args
         self.assertEqual(args[0], "http://test-ollama:11434/api/generate")
@@ -49,26 +83,9 @@ class TestOllamaClient(unittest.TestCase):
         self.ollama.generate = MagicMock(return_value="Generated response")
         
         # Test with valid prompt data
-        prompt_data = {
-            "messages": [
-                {
-                    "role": "system",
-                    "content": {
-                        "type": "text",
-                        "text": "System message"
-                    }
-                },
-                {
-                    "role": "user",
-                    "content": {
-                        "type": "text",
-                        "text": "User message"
-                    }
-                }
-            ]
-        }
+        prompt = prompt_result("System message", "User message")
         
-        result = self.ollama.process_mcp_prompt(prompt_data)
+        result = self.ollama.process_mcp_prompt(prompt)
         
         # Check that generate was called correctly
         self.ollama.generate.assert_called_once_with("User message", "System message")
@@ -80,9 +97,357 @@ class TestOllamaClient(unittest.TestCase):
         self.ollama.generate.reset_mock()
         result = self.ollama.process_mcp_prompt({})
         self.assertEqual(result, "Error: Invalid prompt format")
+        result = self.ollama.process_mcp_prompt(types.GetPromptResult(messages=[]))
+        self.assertEqual(result, "Error: Missing user message")
         self.ollama.generate.assert_not_called()
 
 
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for the Ollama generate endpoint."""
+
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment, avoiding delayed-ACK stalls on kept-alive connections
+    disable_nagle_algorithm = True
+    wbufsize = -1
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.payload = payload
+        self.server.connections.add(self.client_address)
+        self.server.requests += 1
+        time.sleep(self.server.delay)
+        if payload["stream"] and not self.server.failures:
+            self.stream_tokens()
+            return
+        if self.server.failures:
+            self.server.failures -= 1
+            status, body = 503, b"{}"
+        else:
+            status, body = 200, json.dumps({"response": "ok"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_tokens(self):
+        """Send NDJSON chunks, pausing before the final one."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for index, token in enumerate(self.server.tokens):
+            if index == len(self.server.tokens) - 1:
+                time.sleep(self.server.stream_pause)
+            line = json.dumps({"response": token, "done": False}).encode() + b"\n"
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+            self.wfile.flush()
+        line = json.dumps({"response": "", "done": True}).encode() + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestOllamaConnectionPool(unittest.TestCase):
+    """Test cases for the pooled Ollama HTTP session."""
+
+    def setUp(self):
+        """Start a local stand-in Ollama server."""
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+        self.server.connections = set()
+        self.server.requests = 0
+        self.server.failures = 0
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.ollama = OllamaClient(
+            f"http://127.0.0.1:{self.server.server_port}", "test-model", backoff_factor=0
+        )
+
+    def tearDown(self):
+        """Stop the stand-in server."""
+        self.ollama.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reuse(self):
+        """Test that consecutive requests share one kept-alive connection."""
+        results = [self.ollama.generate(f"prompt {i}") for i in range(20)]
+        
+        self.assertEqual(results, ["ok"] * 20)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_retry_busy_server(self):
+        """Test that busy responses are retried before giving up."""
+        self.server.failures = 2
+        self.assertEqual(self.ollama.generate("prompt"), "ok")
+        
+        self.server.failures = 10
+        with patch("builtins.print"):
+            self.assertTrue(self.ollama.generate("prompt").startswith("Error:"))
+
+
+class TestAsyncOllamaClient(unittest.TestCase):
+    """Test cases for the asyncio-native Ollama client."""
+
+    def setUp(self):
+        """Start a local stand-in Ollama server."""
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+        self.server.connections = set()
+        self.server.requests = 0
+        self.server.failures = 0
+        self.server.delay = 0
+        self.server.tokens = ["Veni", ", vidi", ", vici."]
+        self.server.stream_pause = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.ollama = AsyncOllamaClient(
+            f"http://127.0.0.1:{self.server.server_port}", "test-model", backoff_factor=0
+        )
+
+    def tearDown(self):
+        """Stop the stand-in server."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def run_closing(self, coro):
+        """Run ``coro`` and close the client's connections on the same loop."""
+        async def run():
+            try:
+                return await coro
+            finally:
+                await self.ollama.aclose()
+        
+        return asyncio.run(run())
+
+    def test_concurrent_generations(self):
+        """Test that generations run concurrently without blocking the loop."""
+        self.server.delay = 0.2
+        ticks = []
+        
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.02)
+        
+        async def scenario():
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(self.ollama.generate(f"prompt {i}") for i in range(5)), ticker()
+            )
+            return results[:5], time.perf_counter() - start
+        
+        results, elapsed = self.run_closing(scenario())
+        
+        self.assertEqual(results, ["ok"] * 5)
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(len(ticks), 5)
+        self.assertLess(ticks[-1] - ticks[0], 0.2)
+
+    def test_retry_busy_server(self):
+        """Test that busy responses are retried before giving up."""
+        self.server.failures = 2
+        self.assertEqual(self.run_closing(self.ollama.generate("prompt")), "ok")
+        
+        self.server.failures = 10
+        with patch("builtins.print"):
+            result = self.run_closing(self.ollama.generate("prompt"))
+        self.assertTrue(result.startswith("Error:"))
+
+    def test_process_mcp_prompt(self):
+        """Test that MCP prompts are sent as system and user texts."""
+        self.ollama.generate = AsyncMock(return_value="Generated response")
+        
+        prompt = prompt_result("System message", "User message")
+        result = asyncio.run(self.ollama.process_mcp_prompt(prompt))
+        
+        self.ollama.generate.assert_awaited_once_with("User message", "System message")
+        self.assertEqual(result, "Generated response")
+        result = asyncio.run(self.ollama.process_mcp_prompt({}))
+        self.assertEqual(result, "Error: Invalid prompt format")
+
+    def test_generate_stream(self):
+        """Test that tokens are yielded before the generation finishes."""
+        self.server.stream_pause = 0.3
+        
+        async def scenario():
+            start = time.perf_counter()
+            arrivals = []
+            async for token in self.ollama.generate_stream("prompt", "system"):
+                arrivals.append((token, time.perf_counter() - start))
+            return arrivals
+        
+        arrivals = self.run_closing(scenario())
+        
+        self.assertEqual([token for token, _ in arrivals], ["Veni", ", vidi", ", vici."])
+        self.assertLess(arrivals[0][1], 0.2)
+        self.assertGreaterEqual(arrivals[-1][1], 0.3)
+
+    def test_generate_stream_error(self):
+        """Test that a failed stream yields an error message."""
+        self.server.failures = 1
+        
+        async def scenario():
+            return [token async for token in self.ollama.generate_stream("prompt")]
+        
+        with patch("builtins.print"):
+            tokens = self.run_closing(scenario())
+        self.assertEqual(len(tokens), 1)
+        self.assertTrue(tokens[0].startswith("Error:"))
+
+    def test_client_streams_prompt_responses(self):
+        """Test that MCPDemoClient passes streamed tokens to on_token."""
+        client = MCPDemoClient(SERVER_PATH)
+        client.session = MagicMock()
+        client.session.get_prompt = AsyncMock(return_value=prompt_result("diff"))
+        client.ollama = self.ollama
+        received = []
+        
+        result = self.run_closing(client.get_commit_message("diff", received.append))
+        
+        client.session.get_prompt.assert_awaited_once_with("git_commit", {"changes": "diff"})
+        self.assertEqual(received, ["Veni", ", vidi", ", vici."])
+        self.assertEqual(result, "Veni, vidi, vici.")
+        self.assertEqual(self.server.payload["prompt"], "diff")
+        self.assertNotIn("system", self.server.payload)
+
+    def test_prompts_from_server_are_streamed(self):
+        """Test that prompts from the real server are sent to Ollama as system and user texts."""
+        async def scenario():
+            async with MCPDemoClient(SERVER_PATH) as client:
+                await client.ollama.aclose()
+                client.ollama = self.ollama
+                results = []
+                for request in (
+                    lambda on_token: client.chat_about_mcp("How do tools work?", on_token),
+                    lambda on_token: client.get_code_review("print(1)", "python", on_token),
+                    lambda on_token: client.get_commit_message("Added feature X", on_token),
+                ):
+                    received = []
+                    result = await request(received.append)
+                    results.append((received, result, self.server.payload))
+                return results
+        
+        results = asyncio.run(scenario())
+        
+        for received, result, payload in results:
+            self.assertEqual(received, ["Veni", ", vidi", ", vici."])
+            self.assertEqual(result, "Veni, vidi, vici.")
+            self.assertTrue(payload["stream"])
+        self.assertEqual(results[0][2]["prompt"], "Please tell me about tools")
+        self.assertIn("MCP", results[0][2]["system"])
+        self.assertIn("print(1)", results[1][2]["prompt"])
+        self.assertIn("python developer", results[1][2]["system"])
+        self.assertIn("Added feature X", results[2][2]["prompt"])
+        self.assertIn("commit messages", results[2][2]["system"])
+
+    def test_cached_generations(self):
+        """Test that identical prompts are answered from the cache."""
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LLMResponseCache(str(Path(directory) / "llm.sqlite"))
+            self.ollama.cache = cache
+            cache_threads = []
+            original_get = cache.get
+            
+            def get(key):
+                cache_threads.append(threading.get_ident())
+                return original_get(key)
+            
+            cache.get = get
+            
+            async def scenario():
+                self.loop_thread = threading.get_ident()
+                first = await self.ollama.generate("prompt", "system")
+                second = await self.ollama.generate("prompt", "system")
+                other = await self.ollama.generate("prompt", "other system")
+                streamed = [token async for token in self.ollama.generate_stream("stream")]
+                replayed = [token async for token in self.ollama.generate_stream("stream")]
+                return first, second, other, streamed, replayed
+            
+            first, second, other, streamed, replayed = self.run_closing(scenario())
+            cache.close()
+        
+        self.assertEqual((first, second, other), ("ok", "ok", "ok"))
+        self.assertEqual(streamed, ["Veni", ", vidi", ", vici."])
+        self.assertEqual(replayed, ["Veni, vidi, vici."])
+        self.assertEqual(self.server.requests, 3)
+        # SQLite is only used from worker threads, never on the event loop
+        self.assertEqual(len(cache_threads), 5)
+        self.assertNotIn(self.loop_thread, cache_threads)
+
+
+class TestLLMResponseCache(unittest.TestCase):
+    """Test cases for the on-disk LLM response cache."""
+
+    def setUp(self):
+        """Create a cache in a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = str(Path(self.directory.name) / "llm.sqlite")
+        self.cache = LLMResponseCache(self.path, max_entries=2)
+
+    def tearDown(self):
+        """Close and remove the cache."""
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_key(self):
+        """Test that keys depend on the request content but not on streaming."""
+        payload = {"model": "llama3", "prompt": "diff", "system": "review", "stream": False}
+        
+        self.assertEqual(self.cache.key(payload), self.cache.key({**payload, "stream": True}))
+        key = self.cache.key(payload)
+        self.assertNotEqual(key, self.cache.key({**payload, "model": "mistral"}))
+        self.assertNotEqual(key, self.cache.key({**payload, "system": "commit"}))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        self.cache.ttl = None
+        with patch("client.time.time", side_effect=[1, 2, 3, 4]):
+            self.cache.put("a", "A")
+            self.cache.put("b", "B")
+            self.assertEqual(self.cache.get("a"), "A")
+            self.cache.put("c", "C")
+        
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), "A")
+        self.assertEqual(self.cache.get("c"), "C")
+        self.assertEqual(self.cache.stats()["entries"], 2)
+
+    def test_size_limit(self):
+        """Test that the byte budget is enforced and oversized responses are skipped."""
+        self.cache.max_entries = 100
+        self.cache.max_bytes = 10
+        self.cache.put("big", "x" * 11)
+        self.cache.put("a", "x" * 6)
+        self.cache.put("b", "x" * 6)
+        
+        self.assertIsNone(self.cache.get("big"))
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get("b"), "x" * 6)
+        self.assertEqual(self.cache.stats()["bytes"], 6)
+
+    def test_ttl(self):
+        """Test that entries expire after the time to live."""
+        self.cache.ttl = 10
+        with patch("client.time.time", return_value=100):
+            self.cache.put("a", "A")
+        with patch("client.time.time", return_value=109):
+            self.assertEqual(self.cache.get("a"), "A")
+        with patch("client.time.time", return_value=110):
+            self.assertIsNone(self.cache.get("a"))
+        
+        self.assertEqual(self.cache.stats()["hits"], 1)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_persistence(self):
+        """Test that cached responses survive reopening the database."""
+        self.cache.put("a", "A")
+        self.cache.close()
+        self.cache = LLMResponseCache(self.path)
+        
+        self.assertEqual(self.cache.get("a"), "A")
+
+
 class TestMCPDemoClient(unittest.TestCase):
     """Test cases for the MCP Demo Client."""
 
@@ -154,6 +519,51 @@ class TestMCPDemoClient(unittest.TestCase):
         # Check that the client was called correctly
         self.client.client.get.assert_called_with("gods://", {"limit": 5})
 
+    def test_iter_greek_gods(self):
+        """Test streaming Greek gods page by page."""
+        pages = {
+            "gods://page/2": {"items": [{"name": "Zeus"}, {"name": "Hera"}], "next_cursor": "abc"},
+            "gods://page/2/abc": {"items": [{"name": "Ares"}], "next_cursor": None},
+        }
+        
+        async def read_resource(uri):
+            return MagicMock(contents=[MagicMock(text=json.dumps(pages[str(uri)]))])
+        
+        self.client.session = AsyncMock()
+        self.client.session.read_resource.side_effect = read_resource
+        
+        async def collect():
+            return [god async for god in self.client.iter_greek_gods(page_size=2)]
+        
+        result = asyncio.run(collect())
+        
+        self.assertEqual([god["name"] for god in result], ["Zeus", "Hera", "Ares"])
+        self.assertEqual(self.client.session.read_resource.await_count, 2)
+
+    def test_get_greek_gods_reuses_unchanged_versions(self):
+        """Test that unchanged gods data is neither fetched nor parsed again."""
+        resources = {
+            "gods://version": "v1",
+            "gods://text/1": json.dumps([{"name": "Zeus"}]),
+        }
+        
+        async def read_resource(uri):
+            return MagicMock(contents=[MagicMock(text=resources[str(uri)])])
+        
+        self.client.session = AsyncMock()
+        self.client.session.read_resource.side_effect = read_resource
+        
+        first = asyncio.run(self.client.get_greek_gods(limit=1))
+        second = asyncio.run(self.client.get_greek_gods(limit=1))
+        self.assertEqual(first, [{"name": "Zeus"}])
+        self.assertIs(first, second)
+        self.assertEqual(self.client.session.read_resource.await_count, 3)
+        
+        # A new version is fetched again
+        resources["gods://version"] = "v2"
+        resources["gods://text/1"] = json.dumps([{"name": "Hera"}])
+        self.assertEqual(asyncio.run(self.client.get_greek_gods(limit=1)), [{"name": "Hera"}])
+
     def test_get_greeting(self):
         """Test the greeting client method."""
         # Set up mock return value
@@ -282,5 +692,456 @@ class TestMCPDemoClient(unittest.TestCase):
         self.assertEqual(result, "feat: add new feature")
 
 
+class TestConnectionLifetime(unittest.TestCase):
+    """Test cases for keeping the server connection open across calls."""
+
+    def test_connect_keeps_transport_open(self):
+        """Test that the transport stays open until disconnect."""
+        events = []
+        
+        @asynccontextmanager
+        async def fake_stdio_client(params):
+            events.append("transport opened")
+            yield ("read", "write")
+            events.append("transport closed")
+        
+        session = AsyncMock()
+        session.__aenter__.return_value = session
+        client = MCPDemoClient(SERVER_PATH)
+        
+        async def scenario():
+            with patch("client.stdio_client", fake_stdio_client), \
+                    patch("client.ClientSession", return_value=session):
+                async with client:
+                    self.assertIs(client.session, session)
+                    self.assertEqual(events, ["transport opened"])
+                    session.initialize.assert_awaited_once()
+                    # Connecting again reuses the open session
+                    self.assertIs(await client.connect(), session)
+                self.assertIsNone(client.session)
+        
+        asyncio.run(scenario())
+        self.assertEqual(events, ["transport opened", "transport closed"])
+        session.__aexit__.assert_awaited_once()
+
+    def test_latin_resource_with_reserved_characters(self):
+        """Test that texts with spaces and slashes can be read through the seeded resource."""
+        text = "the big dog / the small cat"
+        
+        async def scenario():
+            async with MCPDemoClient(SERVER_PATH) as client:
+                return (
+                    await client.get_ancient_latin_text_resource(text, seed=5),
+                    await client.transform_to_ancient_latin(text, seed=5),
+                )
+        
+        from_resource, from_tool = asyncio.run(scenario())
+        self.assertEqual(from_resource, from_tool)
+        self.assertIn(" / ", from_resource)
+
+    def test_many_calls_over_one_connection(self):
+        """Test that one real connection serves many requests."""
+        async def scenario():
+            async with MCPDemoClient(SERVER_PATH) as client:
+                results = [await client.get_greeting(f"user{i}") for i in range(500)]
+            return results, client.session
+        
+        results, session = asyncio.run(scenario())
+        
+        self.assertEqual(results[0], "Hello, user0!")
+        self.assertEqual(results[-1], "Hello, user499!")
+        self.assertIsNone(session)
+
+
+class FakeSession:
+    """Stand-in for ClientSession used by the pool tests."""
+
+    def __init__(self, read_stream, write_stream, sampling_callback=None):
+        self.failed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def initialize(self):
+        pass
+
+    async def send_ping(self):
+        if self.failed:
+            raise anyio.ClosedResourceError()
+
+    async def call_tool(self, name, arguments=None):
+        if self.failed:
+            raise anyio.ClosedResourceError()
+        await asyncio.sleep(0.01)
+        return self
+
+
+@asynccontextmanager
+async def fake_stdio_client(params):
+    send, receive = anyio.create_memory_object_stream(0)
+    async with send, receive:
+        yield (receive, "write")
+
+
+def server_pids():
+    """Return the pids of the server.py processes started by this process."""
+    pids = []
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            status = (entry / "status").read_text()
+            cmdline = (entry / "cmdline").read_bytes()
+        except OSError:
+            continue
+        if f"PPid:\t{os.getpid()}\n" in status and SERVER_PATH.encode() in cmdline:
+            pids.append(int(entry.name))
+    return pids
+
+
+class TestSessionPool(unittest.TestCase):
+    """Test cases for the pool of server processes."""
+
+    def run_with_pool(self, scenario, size=3):
+        async def run():
+            with patch("client.stdio_client", fake_stdio_client), \
+                    patch("client.ClientSession", FakeSession):
+                pool = SessionPool(MagicMock(), size, None, health_check_interval=None)
+                await pool.start()
+                try:
+                    await scenario(pool)
+                finally:
+                    await pool.stop()
+            return pool
+        
+        return asyncio.run(run())
+
+    def test_least_outstanding_dispatch(self):
+        """Test that concurrent requests spread over idle members."""
+        async def scenario(pool):
+            sessions = await asyncio.gather(*(pool.call_tool("add") for _ in range(3)))
+            self.assertEqual(len({id(session) for session in sessions}), 3)
+        
+        pool = self.run_with_pool(scenario)
+        self.assertEqual([member["requests"] for member in pool.stats()], [1, 1, 1])
+        self.assertEqual([member["outstanding"] for member in pool.stats()], [0, 0, 0])
+
+    def test_restart_on_crash(self):
+        """Test that a member whose transport failed is replaced."""
+        async def scenario(pool):
+            crashed = pool.members[0].session
+            crashed.failed = True
+            with self.assertRaises(anyio.ClosedResourceError):
+                await pool.call_tool("add")
+            await asyncio.gather(*pool._restarts.values())
+            
+            self.assertIsNot(pool.members[0].session, crashed)
+            self.assertIsInstance(await pool.call_tool("add"), FakeSession)
+        
+        pool = self.run_with_pool(scenario)
+        self.assertEqual(pool.stats()[0]["restarts"], 1)
+
+    def test_health_check(self):
+        """Test that unresponsive members are restarted by health checks."""
+        async def scenario(pool):
+            pool.members[1].session.failed = True
+            await pool.check_health()
+            await asyncio.gather(*pool._restarts.values())
+            self.assertTrue(all(member.healthy for member in pool.members))
+        
+        pool = self.run_with_pool(scenario)
+        self.assertEqual([member["restarts"] for member in pool.stats()], [0, 1, 0])
+
+    @unittest.skipUnless(Path("/proc/self/status").exists(), "needs /proc to find server processes")
+    def test_killed_server_is_replaced(self):
+        """Test that requests avoid a killed server process while it is restarted."""
+        async def scenario():
+            async with MCPDemoClient(SERVER_PATH, pool_size=2) as client:
+                pool = client.session
+                pids = server_pids()
+                self.assertEqual(len(pids), 2)
+                os.kill(pids[0], signal.SIGKILL)
+                
+                start = time.perf_counter()
+                while all(member.healthy for member in pool.members):
+                    self.assertLess(time.perf_counter() - start, 5)
+                    await asyncio.sleep(0.01)
+                
+                results = [
+                    await asyncio.wait_for(client.get_greeting(f"user{i}"), 5) for i in range(6)
+                ]
+                await asyncio.gather(*pool._restarts.values())
+                return results, pool.stats()
+        
+        results, stats = asyncio.run(scenario())
+        
+        self.assertEqual(results, [f"Hello, user{i}!" for i in range(6)])
+        self.assertEqual(sorted(member["restarts"] for member in stats), [0, 1])
+        self.assertTrue(all(member["healthy"] for member in stats))
+        self.assertEqual(server_pids(), [])
+
+    def test_client_uses_pool(self):
+        """Test that a client with pool_size > 1 routes its session through a pool."""
+        client = MCPDemoClient(SERVER_PATH, pool_size=2)
+        
+        async def scenario():
+            with patch("client.stdio_client", fake_stdio_client), \
+                    patch("client.ClientSession", FakeSession):
+                async with client:
+                    self.assertIsInstance(client.session, SessionPool)
+                    self.assertEqual(len(client.session.members), 2)
+        
+        asyncio.run(scenario())
+        self.assertIsNone(client.session)
+
+
+class TestFanOut(unittest.TestCase):
+    """Test cases for the concurrent fan-out API."""
+
+    def test_map_tool_bounds_concurrency(self):
+        """Test that map_tool keeps at most ``concurrency`` calls in flight and keeps order."""
+        in_flight = []
+        peak = []
+        
+        async def call_tool(name, arguments):
+            in_flight.append(arguments)
+            peak.append(len(in_flight))
+            # Later calls finish first, so results complete out of order
+            await asyncio.sleep(0.001 * (20 - arguments["a"]))
+            in_flight.remove(arguments)
+            return arguments["a"] + arguments["b"]
+        
+        client = MCPDemoClient(SERVER_PATH)
+        client.session = MagicMock()
+        client.session.call_tool = call_tool
+        
+        results = asyncio.run(
+            client.map_tool("add", [{"a": i, "b": 1} for i in range(20)], concurrency=4)
+        )
+        
+        self.assertEqual(results, [i + 1 for i in range(20)])
+        self.assertEqual(max(peak), 4)
+
+    def test_map_tool_pulls_arguments_lazily(self):
+        """Test that arguments are only taken from the iterable as calls complete."""
+        pulled = []
+        completed = []
+        backlog = []
+        
+        def arguments():
+            for i in range(1000):
+                pulled.append(i)
+                yield {"a": i, "b": 1}
+        
+        async def call_tool(name, arguments):
+            backlog.append(len(pulled) - len(completed))
+            await asyncio.sleep(0)
+            completed.append(arguments["a"])
+            return arguments["a"] + arguments["b"]
+        
+        client = MCPDemoClient(SERVER_PATH)
+        client.session = MagicMock()
+        client.session.call_tool = call_tool
+        
+        results = asyncio.run(client.map_tool("add", arguments(), concurrency=8))
+        
+        self.assertEqual(results, [i + 1 for i in range(1000)])
+        self.assertLessEqual(max(backlog), 8)
+
+    def test_map_tool_cancels_on_failure(self):
+        """Test that a failed call cancels the calls still in flight."""
+        cancelled = []
+        
+        async def call_tool(name, arguments):
+            if arguments["a"] == 0:
+                raise RuntimeError("boom")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(arguments["a"])
+                raise
+        
+        client = MCPDemoClient(SERVER_PATH)
+        client.session = MagicMock()
+        client.session.call_tool = call_tool
+        
+        with self.assertRaises(RuntimeError):
+            asyncio.run(client.map_tool("add", [{"a": i, "b": 1} for i in range(3)]))
+        self.assertEqual(sorted(cancelled), [1, 2])
+
+    def test_map_tool_requires_connection(self):
+        """Test that map_tool fails when not connected."""
+        client = MCPDemoClient(SERVER_PATH)
+        with self.assertRaises(RuntimeError):
+            asyncio.run(client.map_tool("add", [{"a": 1, "b": 2}]))
+
+    def test_fan_out_over_one_connection(self):
+        """Test pipelined tool calls and resource reads against a real server."""
+        async def scenario():
+            async with MCPDemoClient(SERVER_PATH) as client:
+                sums = await client.map_tool(
+                    "add", [{"a": i, "b": i} for i in range(200)], concurrency=32
+                )
+                greetings = await client.map_resource(
+                    [f"greeting://user{i}" for i in range(200)], concurrency=32
+                )
+            return sums, greetings
+        
+        sums, greetings = asyncio.run(scenario())
+        
+        self.assertEqual(
+            [result.structuredContent["result"] for result in sums], [2 * i for i in range(200)]
+        )
+        self.assertEqual(greetings[0], "Hello, user0!")
+        self.assertEqual(greetings[-1], "Hello, user199!")
+
+
+class TestTracing(unittest.TestCase):
+    """Test cases for client-side request tracing."""
+
+    def test_spans(self):
+        """Test that spans are timed, nested and kept on one track per task."""
+        tracer = Tracer()
+        
+        async def request(name):
+            with tracer.span(name, "mcp", target=name) as span:
+                await asyncio.sleep(0.01)
+                span["done"] = True
+        
+        async def scenario():
+            with tracer.span("command"):
+                await asyncio.gather(request("first"), request("second"))
+            with self.assertRaises(ValueError):
+                with tracer.span("failing"):
+                    raise ValueError("boom")
+        
+        asyncio.run(scenario())
+        spans = {event["name"]: event for event in tracer.events if event["ph"] == "X"}
+        tracks = [event for event in tracer.events if event["ph"] == "M"]
+        
+        self.assertEqual(len(tracks), 3)
+        self.assertNotEqual(spans["first"]["tid"], spans["second"]["tid"])
+        self.assertEqual(spans["first"]["args"], {"target": "first", "done": True})
+        self.assertGreaterEqual(spans["first"]["dur"], 10000)
+        self.assertGreaterEqual(spans["command"]["dur"], spans["second"]["dur"])
+        self.assertLessEqual(spans["command"]["ts"], spans["second"]["ts"])
+        self.assertEqual(spans["failing"]["args"], {"error": "ValueError('boom')"})
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "trace.json"
+            tracer.write(str(path))
+            trace = json.loads(path.read_text())
+        self.assertEqual(trace["traceEvents"], tracer.events)
+
+    def test_traced_session(self):
+        """Test that session requests are traced and other attributes pass through."""
+        tracer = Tracer()
+        session = TracedSession(FakeSession("read", "write"), tracer)
+        
+        async def scenario():
+            await session.initialize()
+            await session.call_tool("add", {"a": 1, "b": 2})
+            await session.send_ping()
+        
+        asyncio.run(scenario())
+        
+        self.assertFalse(session.failed)
+        self.assertEqual(
+            [event["name"] for event in tracer.events if event["ph"] == "X"],
+            ["call_tool add", "send_ping"],
+        )
+
+    def test_traced_generation(self):
+        """Test that generations are traced with cache hits and time to first token."""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+        server.connections = set()
+        server.requests = 0
+        server.failures = 0
+        server.delay = 0
+        server.tokens = ["Veni", ", vidi", ", vici."]
+        server.stream_pause = 0
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        tracer = Tracer()
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = LLMResponseCache(str(Path(tmp) / "cache.db"))
+            ollama = AsyncOllamaClient(
+                f"http://127.0.0.1:{server.server_port}", "test-model", cache=cache, tracer=tracer
+            )
+            
+            async def scenario():
+                try:
+                    await ollama.generate("prompt")
+                    await ollama.generate("prompt")
+                    return [token async for token in ollama.generate_stream("streamed prompt")]
+                finally:
+                    await ollama.aclose()
+            
+            try:
+                tokens = asyncio.run(scenario())
+            finally:
+                cache.close()
+                server.shutdown()
+                server.server_close()
+        
+        spans = [event for event in tracer.events if event["ph"] == "X"]
+        self.assertEqual(tokens, ["Veni", ", vidi", ", vici."])
+        self.assertEqual(
+            [span["name"] for span in spans], ["ollama generate"] * 2 + ["ollama generate_stream"]
+        )
+        self.assertEqual(spans[0]["args"], {"model": "test-model"})
+        self.assertEqual(spans[1]["args"], {"model": "test-model", "cached": True})
+        self.assertEqual(spans[2]["args"]["tokens"], 3)
+        self.assertLessEqual(spans[2]["args"]["first_token_ms"], spans[2]["dur"] / 1000)
+
+    def test_traced_client(self):
+        """Test that connecting and requests of a real client are traced."""
+        tracer = Tracer()
+        
+        async def scenario():
+            async with MCPDemoClient(SERVER_PATH, tracer=tracer) as client:
+                return await client.get_greeting("Zeus")
+        
+        self.assertEqual(asyncio.run(scenario()), "Hello, Zeus!")
+        names = [event["name"] for event in tracer.events if event["ph"] == "X"]
+        self.assertEqual(
+            names,
+            [
+                "spawn server",
+                "initialize",
+                "connect",
+                "read_resource greeting://Zeus",
+                "disconnect",
+            ],
+        )
+
+
+class TestShell(unittest.TestCase):
+    """Test cases for the long-lived shell mode."""
+
+    def test_run_shell(self):
+        """Test that shell commands are dispatched over one client."""
+        client = MCPDemoClient("./server.py", "http://test-ollama:11434", "test-model")
+        client.get_greeting = AsyncMock(side_effect=lambda name: f"Hello, {name}!")
+        client.get_greek_gods = AsyncMock(return_value=[{"name": "Zeus"}])
+        
+        stdin = io.StringIO(
+            "greeting World\n\n# comment\nbogus\ngods --limit 1\nquit\ngreeting Never\n"
+        )
+        stdout = io.StringIO()
+        with patch("sys.stdin", stdin), patch("sys.stdout", stdout), \
+                patch("sys.stderr", io.StringIO()):
+            asyncio.run(run_shell(client, build_parser()))
+        
+        self.assertIn("Hello, World!", stdout.getvalue())
+        self.assertIn("Zeus", stdout.getvalue())
+        self.assertNotIn("Never", stdout.getvalue())
+        client.get_greeting.assert_awaited_once_with("World")
+        client.get_greek_gods.assert_awaited_once_with(1)
+
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
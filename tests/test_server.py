@@ -2,11 +2,30 @@
 # tests/test_server.py
 """Tests for the MCP server components."""
 
+import asyncio
+import base64
 import csv
 import io
+import json
+import os
+import pstats
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 import unittest
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
 from unittest.mock import patch
 
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.memory import create_connected_server_and_client_session
+
 import server
 
 
@@ -32,6 +51,172 @@ class TestTools(unittest.TestCase):
         # Test with empty string
         self.assertEqual(server.ancient_latin_text(""), "")
 
+    def test_ancient_latin_text_seed(self):
+        """Test that a seed makes the transformation reproducible."""
+        text = "The quick brown fox jumps over the lazy dog. " * 5
+        self.assertEqual(
+            server.ancient_latin_text(text, seed=42),
+            server.ancient_latin_text(text, seed=42),
+        )
+        self.assertEqual(
+            "".join(server.stream_ancient_latin_text(server.iter_text_chunks(text, 16), seed=7)),
+            "".join(server.stream_ancient_latin_text(server.iter_text_chunks(text, 16), seed=7)),
+        )
+        
+        # Different seeds explore different outputs
+        outputs = {server.ancient_latin_text(text, seed=seed) for seed in range(10)}
+        self.assertGreater(len(outputs), 1)
+
+    def test_ancient_latin_text_batch(self):
+        """Test the batch ancient Latin text transformation tool."""
+        texts = ["The quick brown fox jumps over the lazy dog.", "", "and of."]
+        results = server.ancient_latin_text_batch(texts, seed=5)
+        self.assertEqual(results, [server.ancient_latin_text(text, seed=5) for text in texts])
+        self.assertEqual(results[1:], ["", "et de."])
+        self.assertEqual(server.ancient_latin_text_batch([]), [])
+
+    def test_ancient_latin_text_preserves_case_and_punctuation(self):
+        """Test that replacements keep capitalization and trailing punctuation."""
+        # Short words never receive suffixes and short text never gets a phrase
+        self.assertEqual(server.ancient_latin_text("The and, of."), "Thy et, de.")
+        self.assertEqual(server.ancient_latin_text("  the\n\tWith  "), "thy Cum")
+
+    def test_long_tokens_bypass_word_cache(self):
+        """Test that only tokens up to LATIN_MAX_CACHED_WORD characters are memoized."""
+        server._compile_cached_latin_word.cache_clear()
+        long_token = "x" * (server.LATIN_MAX_CACHED_WORD + 1)
+        
+        words = server.transform_latin_words(["The", long_token], server.latin_rng(1))
+        
+        self.assertEqual(words[0], "Thy")
+        self.assertTrue(words[1].startswith(long_token))
+        self.assertEqual(server._compile_cached_latin_word.cache_info().currsize, 1)
+
+    def test_stream_ancient_latin_text(self):
+        """Test that streaming handles words split across chunk boundaries."""
+        chunks = ["The qu", "ick brown", " fox, and", " the", " lazy dog."]
+        # Disable random suffixes and phrase insertion
+        with patch.object(server.random.Random, "random", return_value=0.99):
+            pieces = list(server.stream_ancient_latin_text(chunks))
+            expected = server.ancient_latin_text("".join(chunks))
+        
+        self.assertEqual("".join(pieces), expected)
+        self.assertEqual(expected, "Thy quick brown fox, et thy lazy dog.")
+        self.assertGreater(len(pieces), 1)
+        
+        # Test with no input
+        self.assertEqual(list(server.stream_ancient_latin_text([])), [])
+        self.assertEqual(list(server.stream_ancient_latin_text(["", "  "])), [])
+
+    def test_ancient_latin_text_stream_tool(self):
+        """Test that the streaming tool sends the output as progress and returns a summary."""
+        text = "The quick brown fox jumps over the lazy dog. " * 20
+        chunks = []
+        
+        async def on_progress(progress, total, message):
+            chunks.append(message)
+        
+        async def scenario():
+            async with create_connected_server_and_client_session(
+                server.mcp._mcp_server
+            ) as session:
+                arguments = {"text": text, "chunk_size": 100, "seed": 3}
+                summary = await session.call_tool(
+                    "ancient_latin_text_stream", arguments, progress_callback=on_progress
+                )
+                full = await session.call_tool(
+                    "ancient_latin_text_stream", {**arguments, "return_text": True}
+                )
+                return summary.structuredContent["result"], full.structuredContent["result"]
+        
+        summary, full = asyncio.run(scenario())
+        
+        chunks_in = server.iter_text_chunks(text, 100)
+        expected = list(server.stream_ancient_latin_text(chunks_in, seed=3))
+        self.assertEqual(chunks, expected)
+        self.assertEqual(summary, {"chunks": len(chunks), "characters": len("".join(chunks))})
+        self.assertEqual(full, {**summary, "text": "".join(chunks)})
+
+    def test_iter_text_chunks(self):
+        """Test splitting text into fixed-size chunks."""
+        self.assertEqual(list(server.iter_text_chunks("abcdefg", 3)), ["abc", "def", "g"])
+        self.assertEqual(list(server.iter_text_chunks("", 3)), [])
+        with self.assertRaises(ValueError):
+            list(server.iter_text_chunks("abc", 0))
+
+
+class TestToolExecutor(unittest.TestCase):
+    """Test cases for per-tool execution policies."""
+
+    def test_policies(self):
+        """Test setting and parsing execution policies."""
+        executor = server.ToolExecutor(policies={"add": "thread"})
+        self.assertEqual(executor.get_policy("add"), "thread")
+        self.assertEqual(executor.get_policy("unknown"), "inline")
+        with self.assertRaises(ValueError):
+            executor.set_policy("add", "gpu")
+        
+        self.assertEqual(
+            server._parse_policies("ancient_latin_text=process, add=inline,"),
+            {"ancient_latin_text": "process", "add": "inline"},
+        )
+        self.assertEqual(server.executor.get_policy("ancient_latin_text"), "auto")
+    
+    def test_auto_policy(self):
+        """Test that auto runs small inputs inline and offloads large ones."""
+        executor = server.ToolExecutor(
+            max_workers=1, policies={"ancient_latin_text": "auto"}, offload_threshold=100
+        )
+        try:
+            latin = server.ancient_latin_text
+            asyncio.run(executor.run("ancient_latin_text", latin, {"text": "short"}))
+            self.assertEqual(executor._pools, {})
+            
+            text = "The quick brown fox jumps over the lazy dog. " * 10
+            arguments = {"text": text, "seed": 1}
+            result = asyncio.run(executor.run("ancient_latin_text", latin, arguments))
+            self.assertEqual(result, server.ancient_latin_text(text, seed=1))
+            self.assertIn("process", executor._pools)
+        finally:
+            executor.shutdown()
+        
+        self.assertEqual(server.input_size({"texts": ["ab", "cde"], "seed": 1}), 5)
+
+    def test_warm_and_shutdown(self):
+        """Test that the server starts pool workers before serving and stops them on exit."""
+        executor = server.ToolExecutor(max_workers=1, policies={"ancient_latin_text": "auto"})
+        with patch.object(server, "executor", executor), patch.object(server.mcp, "run") as run, \
+                patch.object(server, "detach_stdio"):
+            run.side_effect = lambda: self.assertIn("process", executor._pools)
+            server.main([])
+        
+        run.assert_called_once_with()
+        self.assertEqual(executor._pools, {})
+        
+        # Without offloaded tools there is nothing to warm
+        idle = server.ToolExecutor(policies={"add": "inline"})
+        idle.warm()
+        self.assertEqual(idle._pools, {})
+
+    def test_run(self):
+        """Test running a tool function under each policy."""
+        executor = server.ToolExecutor(max_workers=1)
+        try:
+            for policy in server.EXECUTION_POLICIES:
+                executor.set_policy("add", policy)
+                result = asyncio.run(executor.run("add", server.add, {"a": 2, "b": 3}))
+                self.assertEqual(result, 5)
+        finally:
+            executor.shutdown()
+
+    def test_offloaded_tool_registration(self):
+        """Test that offloaded tools keep their schema and stay directly callable."""
+        tools = {tool.name: tool for tool in asyncio.run(server.mcp.list_tools())}
+        schema = tools["ancient_latin_text"].inputSchema
+        self.assertEqual(set(schema["properties"]), {"text", "seed"})
+        self.assertEqual(tools["ancient_latin_text"].inputSchema["required"], ["text"])
+        self.assertEqual(server.add(1, 2), 3)
+
 
 class TestResources(unittest.TestCase):
     """Test cases for MCP resources."""
@@ -60,6 +245,148 @@ class TestResources(unittest.TestCase):
         self.assertTrue(all("symbol" in god for god in gods))
         self.assertTrue(all("roman_name" in god for god in gods))
 
+    def test_gods_table(self):
+        """Test the indexed Greek gods table."""
+        self.assertEqual(len(server.GREEK_GODS), 14)
+        self.assertEqual(server.GREEK_GODS.head(2), server.get_greek_gods(limit=2))
+        self.assertEqual(server.GREEK_GODS.head(0), [])
+        self.assertEqual(server.GREEK_GODS.head(-1), [])
+        
+        zeus = server.get_greek_god_by_name("zeus")
+        self.assertEqual(zeus["roman_name"], "Jupiter")
+        self.assertEqual(server.get_greek_god_by_roman_name("NEPTUNE")["name"], "Poseidon")
+        with self.assertRaises(ValueError):
+            server.get_greek_god_by_name("Odin")
+        
+        war_gods = [god["name"] for god in server.get_greek_gods_by_domain("War")]
+        self.assertEqual(war_gods, ["Athena", "Ares"])
+        self.assertEqual(server.get_greek_gods_by_domain("and"), [])
+
+    def test_mapped_gods_table(self):
+        """Test serving the gods dataset from a memory-mapped CSV file."""
+        extra = (
+            'Nyx,"Night, and ""Darkness""",Black wings,Nox\n'
+            'Mnemosyne,"Memory\nand Time",Pool,Moneta\n'
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "gods.csv"
+            path.write_text(server.GREEK_GODS_CSV + "\n" + extra, encoding="utf-8")
+            table = server.load_gods_table(str(path))
+            try:
+                self.assertIsInstance(table, server.MappedGodsTable)
+                self.assertEqual(table.fieldnames, ("name", "domain", "symbol", "roman_name"))
+                
+                # Only the requested rows are indexed
+                self.assertEqual(table.head(3), server.GREEK_GODS.head(3))
+                self.assertEqual(table.indexed_rows, 3)
+                
+                self.assertEqual(len(table), 16)
+                self.assertEqual(table.find_by_name("nyx")["domain"], 'Night, and "Darkness"')
+                self.assertEqual(table.find_by_roman_name("Moneta")["domain"], "Memory\nand Time")
+                self.assertEqual(
+                    [god["name"] for god in table.find_by_domain("war")], ["Athena", "Ares"]
+                )
+                self.assertEqual(len(table.head()), 16)
+            finally:
+                table.close()
+
+    def test_replaced_gods_file_is_reloaded(self):
+        """Test that replacing the mapped gods file serves the new data and closes the old map."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "gods.csv"
+            path.write_text(server.GREEK_GODS_CSV, encoding="utf-8")
+            server.reload_gods_table(str(path))
+            self.addCleanup(server.reload_gods_table)
+            original = server.GREEK_GODS
+            
+            with patch.object(server, "GODS_CHECK_INTERVAL", 0):
+                self.assertEqual(server.get_greek_gods(limit=1)[0]["name"], "Zeus")
+                self.assertEqual(server.get_greek_god_by_name("zeus")["roman_name"], "Jupiter")
+                version = server.get_gods_version()
+                
+                replacement = Path(tmp) / "gods.csv.new"
+                replacement.write_text(
+                    "name,domain,symbol,roman_name\nNyx,Night,Wings,Nox\n", encoding="utf-8"
+                )
+                os.replace(replacement, path)
+                
+                self.assertEqual(
+                    server.get_greek_gods(limit=1),
+                    [{"name": "Nyx", "domain": "Night", "symbol": "Wings", "roman_name": "Nox"}],
+                )
+                self.assertNotEqual(server.get_gods_version(), version)
+                self.assertEqual(server.get_greek_god_by_name("nyx")["roman_name"], "Nox")
+                self.assertTrue(original._mmap.closed)
+                
+                # Without a change the table is kept
+                current = server.GREEK_GODS
+                server.gods_table()
+                self.assertIs(server.GREEK_GODS, current)
+
+    def test_gods_pagination(self):
+        """Test cursor-based pagination of the Greek gods resource."""
+        names = []
+        page = server.get_greek_gods_first_page(5)
+        pages = 1
+        while page["next_cursor"]:
+            names.extend(god["name"] for god in page["items"])
+            page = server.get_greek_gods_page(5, page["next_cursor"])
+            pages += 1
+        names.extend(god["name"] for god in page["items"])
+        
+        self.assertEqual(pages, 3)
+        self.assertEqual(names, [god["name"] for god in server.get_greek_gods(limit=None)])
+        
+        # Cursors round-trip and reject anything they did not produce
+        self.assertEqual(server.decode_cursor(server.encode_cursor(1234)), 1234)
+        for cursor in ["bogus", "!!", server.encode_cursor(5)[:-1]]:
+            with self.assertRaises(ValueError):
+                server.get_greek_gods_page(5, cursor)
+        with self.assertRaises(ValueError):
+            server.get_greek_gods_first_page(0)
+
+    def test_cached_json_resources(self):
+        """Test that static gods resources are served as cached JSON."""
+        server.json_response_cache.clear()
+        server.json_page_cache.clear()
+        
+        def read(uri):
+            return list(asyncio.run(server.mcp.read_resource(uri)))[0]
+        
+        first = read("gods://text/3")
+        self.assertEqual(first.mime_type, "application/json")
+        self.assertEqual(json.loads(first.content), server.get_greek_gods(limit=3))
+        self.assertIs(read("gods://text/3").content, first.content)
+        # Client-sized responses stay out of the cache of static responses, and cursor
+        # pages are not cached at all
+        cursor = json.loads(read("gods://page/2").content)["next_cursor"]
+        page = json.loads(read(f"gods://page/2/{cursor}").content)
+        self.assertEqual(page["items"][0], server.GREEK_GODS.head(3)[2])
+        self.assertEqual(server.json_page_cache.stats()["entries"], 2)
+        self.assertEqual(server.json_response_cache.stats()["entries"], 0)
+        self.assertEqual(json.loads(read("gods://text").content), server.GREEK_GODS.head())
+        self.assertEqual(read("gods://version").content, server.GREEK_GODS.version)
+        
+        # Changing the data changes the version and the response
+        original = server.GREEK_GODS
+        try:
+            csv_text = "name,domain,symbol,roman_name\nNyx,Night,Wings,Nox\n"
+            server.GREEK_GODS = server.GodsTable.from_csv(csv_text)
+            self.assertNotEqual(read("gods://version").content, original.version)
+            self.assertEqual(json.loads(read("gods://text/3").content)[0]["name"], "Nyx")
+        finally:
+            server.GREEK_GODS = original
+
+    def test_gods_text_row_cap(self):
+        """Test that gods://text refuses to return more than GODS_MAX_TEXT_ROWS records."""
+        with patch.object(server, "GODS_MAX_TEXT_ROWS", 3):
+            self.assertEqual(len(server.get_greek_gods(limit=3)), 3)
+            for limit in (4, None):
+                with self.assertRaisesRegex(ValueError, "gods://page"):
+                    server.get_greek_gods(limit=limit)
+            with self.assertRaisesRegex(ValueError, "gods://page"):
+                server.get_all_greek_gods()
+
     def test_get_greeting(self):
         """Test the greeting resource."""
         self.assertEqual(server.get_greeting("World"), "Hello, World!")
@@ -84,6 +411,158 @@ class TestResources(unittest.TestCase):
             self.assertEqual(server.get_ancient_latin_text("Test"), "Mocked Latin text")
             mock_tool.assert_called_once_with("Test")
 
+    def test_get_seeded_ancient_latin_text(self):
+        """Test the seeded ancient Latin text resource."""
+        text = "The quick brown fox jumps over the lazy dog."
+        result = server.get_seeded_ancient_latin_text(text, 3)
+        self.assertEqual(result, server.ancient_latin_text(text, seed=3))
+        self.assertEqual(result, server.get_seeded_ancient_latin_text(text, 3))
+
+    def test_ancient_latin_text_resources_decode_text(self):
+        """Test that URL-encoded text is decoded before it is transformed and cached."""
+        server.latin_cache.clear()
+        expected = server.ancient_latin_text("the big/dog", seed=5)
+        
+        self.assertEqual(server.get_seeded_ancient_latin_text("the%20big%2Fdog", 5), expected)
+        self.assertEqual(server.latin_cache.get(("the big/dog", 5)), expected)
+        self.assertNotIn("%", server.get_ancient_latin_text("the%20big%2Fdog"))
+
+    def test_seeded_ancient_latin_text_is_cached(self):
+        """Test that seeded resource reads are served from the cache."""
+        server.latin_cache.clear()
+        with patch('server.ancient_latin_text') as mock_tool:
+            mock_tool.return_value = "Mocked Latin text"
+            self.assertEqual(server.get_seeded_ancient_latin_text("Test", 1), "Mocked Latin text")
+            self.assertEqual(server.get_seeded_ancient_latin_text("Test", 1), "Mocked Latin text")
+            mock_tool.assert_called_once_with("Test", seed=1)
+        
+        stats = server.get_latin_cache_stats()
+        self.assertGreaterEqual(stats["hits"], 1)
+        self.assertEqual(stats["entries"], 1)
+        server.latin_cache.clear()
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cases for the bounded result cache."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = server.ResultCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        self.assertEqual(cache.get("a"), "1")
+        cache.put("c", "3")
+        
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("c"), "3")
+        
+        stats = cache.stats()
+        self.assertEqual(stats["entries"], 2)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(stats["hits"], 3)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_byte_bound(self):
+        """Test that the total size stays within max_bytes."""
+        value = "x" * 1000
+        entry_size = len(value) + 200
+        cache = server.ResultCache(max_entries=100, max_bytes=3 * entry_size)
+        for i in range(10):
+            cache.put(i, value)
+        
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 3 * entry_size)
+        self.assertLess(stats["entries"], 10)
+        
+        # Values larger than the whole budget are not cached
+        cache.put("big", "x" * (4 * entry_size))
+        self.assertIsNone(cache.get("big"))
+
+    def test_key_contents_are_counted(self):
+        """Test that the text inside tuple keys counts towards max_bytes."""
+        text = "x" * 100000
+        cache = server.ResultCache(max_entries=100, max_bytes=350000)
+        for seed in range(4):
+            cache.put((text, seed), "result")
+        
+        stats = cache.stats()
+        self.assertGreaterEqual(stats["bytes"], 3 * len(text))
+        self.assertEqual(stats["entries"], 3)
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL."""
+        cache = server.ResultCache(ttl=10)
+        with patch("server.time.monotonic", return_value=100.0):
+            cache.put("a", "1")
+            self.assertEqual(cache.get("a"), "1")
+        with patch("server.time.monotonic", return_value=110.0):
+            self.assertIsNone(cache.get("a"))
+        
+        stats = cache.stats()
+        self.assertEqual(stats["expirations"], 1)
+        self.assertEqual(stats["entries"], 0)
+        self.assertEqual(stats["bytes"], 0)
+
+
+class TestTemplateRegistry(unittest.TestCase):
+    """Test cases for the directory-backed template registry."""
+
+    def setUp(self):
+        """Create a template directory."""
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+        (self.path / "tools.txt").write_text("Tools text\n")
+        (self.path / "notes.md").write_text("Not a template")
+        self.registry = server.TemplateRegistry(self.path, check_interval=0)
+
+    def tearDown(self):
+        """Remove the template directory."""
+        self.directory.cleanup()
+
+    def test_lazy_loading(self):
+        """Test that templates are read on first use and then served from memory."""
+        original = Path.read_text
+        with patch.object(Path, "read_text", autospec=True, side_effect=original) as read_text:
+            registry = server.TemplateRegistry(self.path)
+            read_text.assert_not_called()
+            
+            self.assertEqual(registry.get("TOOLS"), "Tools text")
+            self.assertIs(registry.get("tools"), registry.get("tools"))
+            self.assertEqual(read_text.call_count, 1)
+        
+        self.assertIsNone(registry.get("notes"))
+        self.assertEqual(registry.names(), ["tools"])
+
+    def test_hot_reload(self):
+        """Test that added, edited and removed files are picked up."""
+        self.assertIsNone(self.registry.get("prompts"))
+        (self.path / "prompts.txt").write_text("Prompts text")
+        self.assertEqual(self.registry.get("prompts"), "Prompts text")
+        
+        (self.path / "tools.txt").write_text("Edited tools text")
+        self.assertEqual(self.registry.get("tools"), "Edited tools text")
+        
+        (self.path / "tools.txt").unlink()
+        self.assertIsNone(self.registry.get("tools"))
+        self.assertEqual(self.registry.names(), ["prompts"])
+
+    def test_check_interval(self):
+        """Test that changes are only looked for once per check interval."""
+        self.registry.check_interval = 3600
+        self.assertEqual(self.registry.get("tools"), "Tools text")
+        (self.path / "tools.txt").write_text("Edited tools text")
+        self.assertEqual(self.registry.get("tools"), "Tools text")
+        
+        self.registry.reload()
+        self.assertEqual(self.registry.get("tools"), "Edited tools text")
+
+    def test_missing_directory(self):
+        """Test that a missing directory has no templates."""
+        registry = server.TemplateRegistry(self.path / "missing")
+        self.assertIsNone(registry.get("tools"))
+        self.assertEqual(registry.names(), [])
+
 
 class TestPrompts(unittest.TestCase):
     """Test cases for MCP prompts."""
@@ -94,39 +573,81 @@ class TestPrompts(unittest.TestCase):
         prompt = server.get_mcp_expert_prompt()
         
         # Check the structure
-        self.assertIsInstance(prompt, dict)
-        self.assertIn("messages", prompt)
-        self.assertIsInstance(prompt["messages"], list)
-        self.assertEqual(len(prompt["messages"]), 2)
-        
-        # Check system message
-        system_message = prompt["messages"][0]
-        self.assertEqual(system_message["role"], "system")
-        self.assertIn("content", system_message)
-        self.assertIn("type", system_message["content"])
-        self.assertEqual(system_message["content"]["type"], "text")
-        self.assertIn("text", system_message["content"])
-        self.assertIn("MCP", system_message["content"]["text"])
-        self.assertIn("Tools", system_message["content"]["text"])
-        self.assertIn("Resources", system_message["content"]["text"])
-        self.assertIn("Prompts", system_message["content"]["text"])
+        self.assertIsInstance(prompt, list)
+        self.assertEqual(len(prompt), 2)
+        
+        # Check the instructions, sent as the first user message
+        system_message = prompt[0]
+        self.assertEqual(system_message.role, "user")
+        self.assertEqual(system_message.content.type, "text")
+        self.assertIn("MCP", system_message.content.text)
+        self.assertIn("Tools", system_message.content.text)
+        self.assertIn("Resources", system_message.content.text)
+        self.assertIn("Prompts", system_message.content.text)
         
         # Check user message
-        user_message = prompt["messages"][1]
-        self.assertEqual(user_message["role"], "user")
-        self.assertIn("content", user_message)
-        self.assertIn("type", user_message["content"])
-        self.assertEqual(user_message["content"]["type"], "text")
-        self.assertIn("text", user_message["content"])
-        self.assertIn("MCP in general", user_message["content"]["text"])
+        user_message = prompt[1]
+        self.assertEqual(user_message.role, "user")
+        self.assertEqual(user_message.content.type, "text")
+        self.assertIn("MCP in general", user_message.content.text)
         
         # Test with specific topic
         for topic in ["tools", "resources", "prompts"]:
             prompt = server.get_mcp_expert_prompt(topic=topic)
-            system_message = prompt["messages"][0]
-            self.assertIn(topic.capitalize(), system_message["content"]["text"])
-            user_message = prompt["messages"][1]
-            self.assertIn(topic, user_message["content"]["text"])
+            self.assertIn(topic.capitalize(), prompt[0].content.text)
+            self.assertIn(topic, prompt[1].content.text)
+
+    def test_mcp_expert_prompts_are_reused(self):
+        """Test that rendered prompts are reused while their topic text is unchanged."""
+        for topic in [None, "tools", "resources", "prompts"]:
+            self.assertIs(server.get_mcp_expert_prompt(topic), server.get_mcp_expert_prompt(topic))
+        
+        # Topics are case-insensitive, but the user message keeps the requested spelling
+        prompt = server.get_mcp_expert_prompt("Tools")
+        self.assertEqual(prompt[0], server.get_mcp_expert_prompt("tools")[0])
+        self.assertEqual(prompt[1].content.text, "Please tell me about Tools")
+        prompt = server.get_mcp_expert_prompt("sampling")
+        self.assertEqual(prompt[0].content.text, server.MCP_EXPERT_BASE_PROMPT)
+
+    def test_cached_mcp_expert_prompts_are_served(self):
+        """Test that cached prompts are served unchanged through the protocol."""
+        async def scenario():
+            async with create_connected_server_and_client_session(
+                server.mcp._mcp_server
+            ) as session:
+                return [
+                    await session.get_prompt("mcp_expert", {"topic": "tools"}) for _ in range(3)
+                ]
+        
+        server.mcp_expert_prompts.clear()
+        results = asyncio.run(scenario())
+        
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0], results[2])
+        self.assertEqual([message.role for message in results[0].messages], ["user", "user"])
+        self.assertIn("Tools", results[0].messages[0].content.text)
+        self.assertEqual(results[0].messages[1].content.text, "Please tell me about tools")
+
+    def test_mcp_expert_topic_hot_reload(self):
+        """Test that mcp_expert picks up added and edited topic files."""
+        with tempfile.TemporaryDirectory() as directory:
+            registry = server.TemplateRegistry(directory, check_interval=0)
+            with patch.object(server, "mcp_expert_topics", registry):
+                self.assertNotIn("Sampling", self.system_text("sampling"))
+                
+                topic_file = Path(directory, "sampling.txt")
+                topic_file.write_text("Sampling lets servers request completions.\n")
+                self.assertTrue(self.system_text("sampling").endswith(
+                    "user control.\nSampling lets servers request completions."
+                ))
+                
+                topic_file.write_text("Sampling is client-controlled.\n")
+                self.assertIn("Sampling is client-controlled.", self.system_text("sampling"))
+
+    def system_text(self, topic):
+        """Return the instructions of the mcp_expert prompt for a topic, as served by FastMCP."""
+        result = asyncio.run(server.mcp.get_prompt("mcp_expert", {"topic": topic}))
+        return result.messages[0].content.text
 
     def test_get_code_review_prompt(self):
         """Test the code review prompt."""
@@ -134,28 +655,20 @@ class TestPrompts(unittest.TestCase):
         prompt = server.get_code_review_prompt(code=code, language="python")
         
         # Check the structure
-        self.assertIsInstance(prompt, dict)
-        self.assertIn("messages", prompt)
-        self.assertIsInstance(prompt["messages"], list)
-        self.assertEqual(len(prompt["messages"]), 2)
-        
-        # Check system message
-        system_message = prompt["messages"][0]
-        self.assertEqual(system_message["role"], "system")
-        self.assertIn("content", system_message)
-        self.assertIn("type", system_message["content"])
-        self.assertEqual(system_message["content"]["type"], "text")
-        self.assertIn("text", system_message["content"])
-        self.assertIn("python", system_message["content"]["text"])
+        self.assertIsInstance(prompt, list)
+        self.assertEqual(len(prompt), 2)
+        
+        # Check the instructions, sent as the first user message
+        system_message = prompt[0]
+        self.assertEqual(system_message.role, "user")
+        self.assertEqual(system_message.content.type, "text")
+        self.assertIn("python", system_message.content.text)
         
         # Check user message
-        user_message = prompt["messages"][1]
-        self.assertEqual(user_message["role"], "user")
-        self.assertIn("content", user_message)
-        self.assertIn("type", user_message["content"])
-        self.assertEqual(user_message["content"]["type"], "text")
-        self.assertIn("text", user_message["content"])
-        self.assertIn(code, user_message["content"]["text"])
+        user_message = prompt[1]
+        self.assertEqual(user_message.role, "user")
+        self.assertEqual(user_message.content.type, "text")
+        self.assertIn(code, user_message.content.text)
 
     def test_get_git_commit_prompt(self):
         """Test the Git commit prompt."""
@@ -163,28 +676,358 @@ class TestPrompts(unittest.TestCase):
         prompt = server.get_git_commit_prompt(changes=changes)
         
         # Check the structure
-        self.assertIsInstance(prompt, dict)
-        self.assertIn("messages", prompt)
-        self.assertIsInstance(prompt["messages"], list)
-        self.assertEqual(len(prompt["messages"]), 2)
-        
-        # Check system message
-        system_message = prompt["messages"][0]
-        self.assertEqual(system_message["role"], "system")
-        self.assertIn("content", system_message)
-        self.assertIn("type", system_message["content"])
-        self.assertEqual(system_message["content"]["type"], "text")
-        self.assertIn("text", system_message["content"])
-        self.assertIn("commit", system_message["content"]["text"].lower())
+        self.assertIsInstance(prompt, list)
+        self.assertEqual(len(prompt), 2)
+        
+        # Check the instructions, sent as the first user message
+        system_message = prompt[0]
+        self.assertEqual(system_message.role, "user")
+        self.assertEqual(system_message.content.type, "text")
+        self.assertIn("commit", system_message.content.text.lower())
         
         # Check user message
-        user_message = prompt["messages"][1]
-        self.assertEqual(user_message["role"], "user")
-        self.assertIn("content", user_message)
-        self.assertIn("type", user_message["content"])
-        self.assertEqual(user_message["content"]["type"], "text")
-        self.assertIn("text", user_message["content"])
-        self.assertIn(changes, user_message["content"]["text"])
+        user_message = prompt[1]
+        self.assertEqual(user_message.role, "user")
+        self.assertEqual(user_message.content.type, "text")
+        self.assertIn(changes, user_message.content.text)
+
+    def test_prompts_are_served(self):
+        """Test that every prompt is accepted by FastMCP and served as user messages."""
+        arguments = {
+            "mcp_expert": {"topic": "tools"},
+            "code_review": {"code": "print(1)", "language": "python"},
+            "git_commit": {"changes": "Added new feature X"},
+        }
+        for name, args in arguments.items():
+            result = asyncio.run(server.mcp.get_prompt(name, args))
+            self.assertEqual([message.role for message in result.messages], ["user", "user"])
+            self.assertTrue(all(message.content.type == "text" for message in result.messages))
+
+
+class TestTransports(unittest.TestCase):
+    """Test cases for the server transports."""
+
+    def test_default_transport(self):
+        """Test that the server speaks stdio unless told otherwise."""
+        args = server.build_arg_parser().parse_args([])
+        self.assertEqual(args.transport, "stdio")
+        
+        with patch.object(server.mcp, "run") as run, patch.object(server.executor, "warm"), \
+                patch.object(server, "detach_stdio") as detach_stdio:
+            server.main([])
+        run.assert_called_once_with()
+        detach_stdio.assert_called_once_with()
+
+    def test_http_settings(self):
+        """Test that HTTP options are applied to the served application."""
+        args = server.build_arg_parser().parse_args(
+            ["--transport", "streamable-http", "--port", "9000", "--stateless", "--json-response"]
+        )
+        settings = server.mcp.settings.model_copy()
+        with patch.object(server.mcp, "settings", settings), \
+                patch.object(server.mcp, "streamable_http_app") as streamable_http_app:
+            self.assertIs(server.create_http_app(args), streamable_http_app.return_value)
+        
+        self.assertEqual(settings.port, 9000)
+        self.assertTrue(settings.stateless_http)
+        self.assertTrue(settings.json_response)
+
+    def test_concurrent_http_clients(self):
+        """Test that one streamable-http server process serves many clients at once."""
+        process, url = start_http_server()
+        try:
+            async def client(i):
+                async with streamablehttp_client(url) as (read_stream, write_stream, _):
+                    async with ClientSession(read_stream, write_stream) as session:
+                        await session.initialize()
+                        result = await session.call_tool("add", {"a": i, "b": i})
+                        greeting = await session.read_resource(f"greeting://user{i}")
+                        return result.structuredContent["result"], greeting.contents[0].text
+            
+            async def scenario():
+                return await asyncio.gather(*(client(i) for i in range(10)))
+            
+            results = asyncio.run(scenario())
+        finally:
+            process.terminate()
+            process.wait()
+        
+        self.assertEqual(results, [(2 * i, f"Hello, user{i}!") for i in range(10)])
+
+
+class TestWorkers(unittest.TestCase):
+    """Test cases for the multi-worker launcher."""
+
+    def test_worker_stats(self):
+        """Test the shared per-worker counters."""
+        stats = server.WorkerStats(2)
+        stats.worker_started(1)
+        stats.record_request(1)
+        stats.record_request(1)
+        stats.record_restart(0)
+        
+        workers = stats.snapshot()
+        
+        self.assertEqual(
+            workers[0], {"pid": 0, "requests": 0, "restarts": 1, "worker": 0, "uptime": 0}
+        )
+        self.assertEqual(workers[1]["pid"], os.getpid())
+        self.assertEqual(workers[1]["requests"], 2)
+        self.assertEqual(server.get_worker_stats(), [])
+
+    def test_workers_require_streamable_http(self):
+        """Test that only the streamable-http transport can run several workers."""
+        with self.assertRaises(SystemExit):
+            server.main(["--transport", "sse", "--workers", "2"])
+
+    def test_supervisor(self):
+        """Test that workers share the port and crashed workers are replaced."""
+        process, url = start_http_server("--workers", "2")
+        
+        async def read_workers():
+            async with streamablehttp_client(url) as (read_stream, write_stream, _):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    result = await session.read_resource("server://workers")
+                    return json.loads(result.contents[0].text)
+        
+        try:
+            workers = wait_for(
+                lambda: asyncio.run(read_workers()), lambda w: all(x["pid"] for x in w)
+            )
+            self.assertEqual(len({worker["pid"] for worker in workers}), 2)
+            
+            os.kill(workers[0]["pid"], signal.SIGKILL)
+            workers = wait_for(lambda: asyncio.run(read_workers()), lambda w: w[0]["restarts"] == 1)
+            self.assertNotIn(workers[0]["pid"], (0, workers[1]["pid"]))
+            self.assertGreater(sum(worker["requests"] for worker in workers), 0)
+        finally:
+            process.terminate()
+            self.assertEqual(process.wait(timeout=30), 0)
+
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for the handler metrics."""
+
+    def setUp(self):
+        """Start every test with empty metrics."""
+        server.server_metrics.reset()
+        self.addCleanup(server.server_metrics.reset)
+
+    def test_latency_histogram(self):
+        """Test that percentiles are accurate to within one sub-bucket."""
+        histogram = server.LatencyHistogram()
+        self.assertEqual(histogram.percentile(99), 0.0)
+        for millis in range(1, 1001):
+            histogram.record(millis / 1000)
+        
+        for percent in (50, 95, 99):
+            expected = percent / 100
+            self.assertGreaterEqual(histogram.percentile(percent), expected)
+            tolerance = 1 + 1 / histogram.SUB_BUCKETS
+            self.assertLessEqual(histogram.percentile(percent), expected * tolerance)
+        self.assertEqual(histogram.percentile(100), 1.0)
+        self.assertEqual(histogram.count, 1000)
+
+    def test_bucket_limits(self):
+        """Test that every latency falls into the bucket it is within the limits of."""
+        for micros in range(100000):
+            index = server.LatencyHistogram.bucket_index(micros)
+            self.assertLessEqual(micros, server.LatencyHistogram.bucket_limit(index))
+            if index:
+                self.assertGreater(micros, server.LatencyHistogram.bucket_limit(index - 1))
+
+    def test_instrumented_handlers(self):
+        """Test that tool calls, resource reads and prompts are recorded per handler."""
+        async def scenario():
+            async with create_connected_server_and_client_session(
+                server.mcp._mcp_server
+            ) as session:
+                await session.call_tool("add", {"a": 1, "b": 2})
+                await session.call_tool("add", {"a": "one", "b": 2})
+                await session.read_resource("greeting://Zeus")
+                await session.read_resource("greeting://Hera")
+                await session.read_resource("gods://version")
+                result = await session.read_resource("metrics://server")
+                return json.loads(result.contents[0].text)
+        
+        metrics = {(entry["kind"], entry["name"]): entry for entry in asyncio.run(scenario())}
+        
+        self.assertEqual(metrics[("tool", "add")]["calls"], 2)
+        self.assertEqual(metrics[("tool", "add")]["errors"], 1)
+        self.assertEqual(metrics[("resource", "greeting://{name}")]["calls"], 2)
+        self.assertEqual(
+            metrics[("resource", "greeting://{name}")]["response_chars"], len("Hello, Zeus!") * 2
+        )
+        self.assertEqual(metrics[("resource", "gods://version")]["calls"], 1)
+        latency = metrics[("tool", "add")]["latency_ms"]
+        self.assertLessEqual(latency["p50"], latency["p99"])
+        self.assertLessEqual(latency["p99"], latency["max"])
+
+    def test_handler_labels(self):
+        """Test that requests are labelled by registered handlers only."""
+        def request(**params):
+            return SimpleNamespace(params=SimpleNamespace(**params))
+        
+        names = server.HandlerNames()
+        
+        async def labels():
+            return [
+                await names.label("tool", request(name="add")),
+                await names.label("tool", request(name="no_such_tool")),
+                await names.label("prompt", request(name="no_such_prompt")),
+                await names.label("resource", request(uri="gods://version")),
+                await names.label("resource", request(uri="greeting://" + "Zeus" * 10000)),
+                await names.label("resource", request(uri="nowhere://at/all")),
+            ]
+        
+        self.assertEqual(
+            asyncio.run(labels()),
+            ["add", "unknown", "unknown", "gods://version", "greeting://{name}", "unknown"],
+        )
+
+    def test_prometheus(self):
+        """Test the Prometheus text rendering."""
+        server.server_metrics.record("tool", "add", 0.002)
+        server.server_metrics.record("resource", 'say://"hi"', 0.5, error=True)
+        
+        text = server.server_metrics.prometheus()
+        
+        self.assertIn('mcp_handler_calls_total{kind="tool",name="add"} 1\n', text)
+        self.assertIn('mcp_handler_errors_total{kind="resource",name="say://\\"hi\\""} 1\n', text)
+        self.assertIn(
+            'mcp_handler_latency_seconds{kind="tool",name="add",quantile="0.99"} 0.002000\n', text
+        )
+        self.assertIn('mcp_handler_latency_seconds_count{kind="tool",name="add"} 1\n', text)
+
+    def test_prometheus_endpoint(self):
+        """Test that --metrics-path serves the metrics over HTTP."""
+        process, url = start_http_server("--metrics-path", "/metrics")
+        
+        async def call_add():
+            async with streamablehttp_client(url) as (read_stream, write_stream, _):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    await session.call_tool("add", {"a": 1, "b": 2})
+        
+        try:
+            asyncio.run(call_add())
+            with urllib.request.urlopen(url.replace("/mcp", "/metrics"), timeout=10) as response:
+                text = response.read().decode()
+        finally:
+            process.terminate()
+            process.wait()
+        
+        self.assertIn('mcp_handler_calls_total{kind="tool",name="add"} 1\n', text)
+
+
+class TestProfiler(unittest.TestCase):
+    """Test cases for the on-demand profiler."""
+
+    def test_disabled_by_default(self):
+        """Test that the profiler tool is only offered when enabled."""
+        with patch.dict(os.environ, {"MCP_ENABLE_PROFILER": ""}):
+            self.assertFalse(server.build_arg_parser().parse_args([]).enable_profiler)
+        with patch.dict(os.environ, {"MCP_ENABLE_PROFILER": "1"}):
+            self.assertTrue(server.build_arg_parser().parse_args([]).enable_profiler)
+        def tool_names():
+            return {tool.name for tool in asyncio.run(server.mcp.list_tools())}
+        
+        self.assertNotIn("profile_server", tool_names())
+        
+        self.addCleanup(server.mcp.remove_tool, "profile_server")
+        with patch.object(server.mcp, "run"), patch.object(server.executor, "warm"), \
+                patch.object(server, "detach_stdio"):
+            server.main(["--enable-profiler"])
+        self.assertIn("profile_server", tool_names())
+
+    def test_sampling(self):
+        """Test that sampling finds the function keeping a thread busy."""
+        def spin():
+            deadline = time.monotonic() + 0.5
+            while time.monotonic() < deadline:
+                sum(range(100))
+        
+        thread = threading.Thread(target=spin)
+        thread.start()
+        result = asyncio.run(server.profile_server(0.3, "sampling", top=5, interval_ms=1))
+        thread.join()
+        
+        self.assertGreater(result["samples"], 0)
+        self.assertIn("spin", [entry["function"].split(" ")[0] for entry in result["functions"]])
+        lines = result["collapsed"].splitlines()
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+        self.assertIn(";spin (", result["collapsed"])
+
+    def test_deterministic(self):
+        """Test that deterministic profiles of concurrent requests load with pstats."""
+        async def requests():
+            for i in range(20):
+                server.add(i, i)
+                await asyncio.sleep(0.001)
+        
+        async def scenario():
+            result, _ = await asyncio.gather(
+                server.profile_server(0.2, "deterministic", top=5), requests()
+            )
+            return result
+        
+        result = asyncio.run(scenario())
+        
+        self.assertEqual(len(result["functions"]), 5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "server.prof"
+            path.write_bytes(base64.b64decode(result["pstats"]))
+            stats = pstats.Stats(str(path))
+        calls = {name: counts[1] for (_, _, name), counts in stats.stats.items()}
+        self.assertEqual(calls["add"], 20)
+
+    def test_invalid_requests(self):
+        """Test that bad arguments and overlapping profiles are rejected."""
+        with self.assertRaises(ValueError):
+            asyncio.run(server.profile_server(1, "tracing"))
+        with self.assertRaises(ValueError):
+            asyncio.run(server.profile_server(0))
+        
+        async def overlapping():
+            return await asyncio.gather(
+                server.profile_server(0.2), server.profile_server(0.2), return_exceptions=True
+            )
+        
+        first, second = asyncio.run(overlapping())
+        self.assertEqual(first["mode"], "sampling")
+        self.assertIsInstance(second, RuntimeError)
+
+
+def start_http_server(*args):
+    """Start server.py serving streamable-http on a free port and wait until it listens."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, server.__file__, "--transport", "streamable-http",
+         "--port", str(port), "--log-level", "WARNING", *args],
+    )
+    wait_for(
+        lambda: socket.create_connection(("127.0.0.1", port), timeout=1).close(), lambda _: True
+    )
+    return process, f"http://127.0.0.1:{port}/mcp"
+
+
+def wait_for(probe, done, timeout=30):
+    """Call ``probe`` until it returns a value accepted by ``done``, retrying on errors."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            value = probe()
+            if done(value):
+                return value
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the server")
+        time.sleep(0.1)
 
 
 if __name__ == "__main__":